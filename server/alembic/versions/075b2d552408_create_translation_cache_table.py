@@ -0,0 +1,48 @@
+"""create_translation_cache_table
+
+Revision ID: 075b2d552408
+Revises: 84400330e2b9
+Create Date: 2026-10-18 10:12:37.408122
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from tripcraft.constants import POSTGRES_SCHEMA
+
+# revision identifiers, used by Alembic.
+revision: str = "075b2d552408"
+down_revision: Union[str, None] = "84400330e2b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(f"SET search_path TO {POSTGRES_SCHEMA}, public;"))
+
+    op.create_table(
+        "translation_cache",
+        sa.Column("source", sa.TEXT, primary_key=True),
+        sa.Column("locale", sa.TEXT, primary_key=True),
+        sa.Column("translation", sa.TEXT, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime,
+            nullable=False,
+            server_default=sa.func.timezone("UTC", sa.func.now()),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime,
+            nullable=False,
+            server_default=sa.func.timezone("UTC", sa.func.now()),
+        ),
+        schema=POSTGRES_SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("translation_cache", schema=POSTGRES_SCHEMA)
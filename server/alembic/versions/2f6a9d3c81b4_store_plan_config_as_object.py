@@ -0,0 +1,40 @@
+"""store_plan_config_as_object
+
+Revision ID: 2f6a9d3c81b4
+Revises: e5b2c8d41f07
+Create Date: 2026-10-18 21:12:37.514209
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from tripcraft.constants import POSTGRES_SCHEMA
+
+# revision identifiers, used by Alembic.
+revision: str = "2f6a9d3c81b4"
+down_revision: Union[str, None] = "e5b2c8d41f07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(f"SET search_path TO {POSTGRES_SCHEMA}, public;"))
+
+    # Plan configs used to be written as JSON strings holding the serialized
+    # config, rather than as JSON objects.
+    op.execute(
+        "UPDATE plan SET config = (config #>> '{}')::jsonb "
+        "WHERE jsonb_typeof(config) = 'string'"
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.text(f"SET search_path TO {POSTGRES_SCHEMA}, public;"))
+
+    op.execute(
+        "UPDATE plan SET config = to_jsonb(config::text) "
+        "WHERE jsonb_typeof(config) = 'object'"
+    )
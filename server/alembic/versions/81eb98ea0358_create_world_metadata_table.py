@@ -0,0 +1,49 @@
+"""create_world_metadata_table
+
+Revision ID: 81eb98ea0358
+Revises: d0b7fe1a99d2
+Create Date: 2026-10-18 13:40:12.583301
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from tripcraft.constants import POSTGRES_SCHEMA
+
+# revision identifiers, used by Alembic.
+revision: str = "81eb98ea0358"
+down_revision: Union[str, None] = "d0b7fe1a99d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(f"SET search_path TO {POSTGRES_SCHEMA}, public;"))
+
+    world_metadata = op.create_table(
+        "world_metadata",
+        sa.Column("key", sa.TEXT, primary_key=True),
+        sa.Column("value", sa.TEXT, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime,
+            nullable=False,
+            server_default=sa.func.timezone("UTC", sa.func.now()),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime,
+            nullable=False,
+            server_default=sa.func.timezone("UTC", sa.func.now()),
+        ),
+        schema=POSTGRES_SCHEMA,
+    )
+
+    op.bulk_insert(world_metadata, [{"key": "version", "value": "1"}])
+
+
+def downgrade() -> None:
+    op.drop_table("world_metadata", schema=POSTGRES_SCHEMA)
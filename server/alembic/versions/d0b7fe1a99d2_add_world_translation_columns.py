@@ -0,0 +1,38 @@
+"""add_world_translation_columns
+
+Revision ID: d0b7fe1a99d2
+Revises: 075b2d552408
+Create Date: 2026-10-18 11:02:51.194734
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from tripcraft.constants import POSTGRES_SCHEMA
+
+# revision identifiers, used by Alembic.
+revision: str = "d0b7fe1a99d2"
+down_revision: Union[str, None] = "075b2d552408"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(f"SET search_path TO {POSTGRES_SCHEMA}, public;"))
+
+    op.execute("ALTER TABLE states ADD COLUMN zh_hans text")
+    op.execute("ALTER TABLE states ADD COLUMN zh_hant text")
+    op.execute("ALTER TABLE cities ADD COLUMN zh_hans text")
+    op.execute("ALTER TABLE cities ADD COLUMN zh_hant text")
+
+
+def downgrade() -> None:
+    op.execute(sa.text(f"SET search_path TO {POSTGRES_SCHEMA}, public;"))
+
+    op.execute("ALTER TABLE states DROP COLUMN zh_hans")
+    op.execute("ALTER TABLE states DROP COLUMN zh_hant")
+    op.execute("ALTER TABLE cities DROP COLUMN zh_hans")
+    op.execute("ALTER TABLE cities DROP COLUMN zh_hant")
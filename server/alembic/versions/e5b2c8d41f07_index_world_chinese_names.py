@@ -0,0 +1,36 @@
+"""index_world_chinese_names
+
+Revision ID: e5b2c8d41f07
+Revises: 81eb98ea0358
+Create Date: 2026-10-18 19:48:06.912345
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from tripcraft.constants import POSTGRES_SCHEMA
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b2c8d41f07"
+down_revision: Union[str, None] = "81eb98ea0358"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(f"SET search_path TO {POSTGRES_SCHEMA}, public;"))
+
+    # Changing a column type rebuilds the zombodb indexes of the table, which
+    # then analyze the simplified Chinese names as full text.
+    op.execute("ALTER TABLE states ALTER COLUMN zh_hans TYPE zdb.fulltext")
+    op.execute("ALTER TABLE cities ALTER COLUMN zh_hans TYPE zdb.fulltext")
+
+
+def downgrade() -> None:
+    op.execute(sa.text(f"SET search_path TO {POSTGRES_SCHEMA}, public;"))
+
+    op.execute("ALTER TABLE states ALTER COLUMN zh_hans TYPE text")
+    op.execute("ALTER TABLE cities ALTER COLUMN zh_hans TYPE text")
@@ -0,0 +1,27 @@
+"""
+Runs the benchmarks named on the command line, or every benchmark, e.g.
+
+    python -m benchmarks chinese_conversion
+"""
+
+import importlib
+import sys
+
+BENCHMARKS = [
+    "chinese_conversion",
+    "parsed_translations",
+    "plan_config",
+    "spatial_index",
+    "world_fragments",
+]
+
+
+def main(names):
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            raise SystemExit(f"Unknown benchmark {name}, expected one of {BENCHMARKS}")
+        importlib.import_module(f"benchmarks.{name}").main()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,110 @@
+"""
+chinese_conversion measures converting the simplified Chinese names of a page
+of nested cities to traditional Chinese. Every row carries five names: its
+region, subregion, country, state and city, of which the first three repeat
+across the page. Creating an OpenCC instance per name is how they were
+converted before ChineseConverter.
+"""
+
+import random
+from typing import List
+
+import opencc
+
+from benchmarks.common import measure, report
+from tripcraft.utils.translate import ChineseConverter
+
+PAGE_SIZE = 100
+PAGES = 50
+CHARACTERS = "东京大阪北京上海广州深圳香港台湾岛省市区县州山河江湖海风云龙凤门关"
+
+
+def generate_names(rng: random.Random, count: int) -> List[str]:
+    return [
+        "".join(rng.choice(CHARACTERS) for _ in range(rng.randint(2, 4)))
+        for _ in range(count)
+    ]
+
+
+def generate_page(rng: random.Random) -> List[str]:
+    """
+    generate_page returns the names of a page, five per row.
+    """
+    regions = generate_names(rng, 5)
+    sub_regions = generate_names(rng, 20)
+    countries = generate_names(rng, 200)
+    names: List[str] = []
+    for state, city in zip(
+        generate_names(rng, PAGE_SIZE), generate_names(rng, PAGE_SIZE)
+    ):
+        names.extend(
+            (
+                rng.choice(regions),
+                rng.choice(sub_regions),
+                rng.choice(countries),
+                state,
+                city,
+            )
+        )
+    return names
+
+
+def main():
+    rng = random.Random(0)
+    pages = [generate_page(rng) for _ in range(PAGES)]
+
+    def per_call_instance():
+        for name in pages[0]:
+            opencc.OpenCC("s2t.json").convert(name)
+
+    shared = ChineseConverter("s2t.json")
+    for name in pages[0]:
+        shared.convert(name)
+
+    def memo_hit():
+        for name in pages[0]:
+            shared.convert(name)
+
+    # Every run converts pages the converters have not seen yet.
+    unseen = iter(pages[1:])
+    misses = ChineseConverter("s2t.json")
+
+    def memo_miss():
+        for name in next(unseen):
+            misses.convert(name)
+
+    batches = ChineseConverter("s2t.json")
+
+    def batch_miss():
+        batches.convert_many(next(unseen))
+
+    us_per_row = 1e6 / PAGE_SIZE
+    report(
+        f"chinese_conversion: converting a page of {PAGE_SIZE} rows of 5 names",
+        [
+            (
+                "OpenCC instance per name (before)",
+                measure(per_call_instance, 1, 3) * us_per_row,
+                "us/row",
+            ),
+            (
+                "shared converter, memo miss",
+                measure(memo_miss, 4, 3) * us_per_row,
+                "us/row",
+            ),
+            (
+                "convert_many, memo miss",
+                measure(batch_miss, 4, 3) * us_per_row,
+                "us/row",
+            ),
+            (
+                "shared converter, memo hit",
+                measure(memo_hit, 20) * us_per_row,
+                "us/row",
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
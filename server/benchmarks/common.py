@@ -0,0 +1,165 @@
+"""
+Helpers shared by the benchmarks. Every benchmark builds its own seeded,
+synthetic data, in memory or in an in-memory SQLite database, so that its
+results can be compared between runs without Postgres or the network.
+"""
+
+import gc
+import json
+import os
+import random
+import time
+from typing import Callable, Sequence, Tuple
+
+# The app reads its settings at import time, so they are set before importing
+# it: nothing is sent to a translator or read from a world file, and the app
+# tables are created without a schema in SQLite.
+os.environ["TRANSLATOR_BACKEND"] = "identity"
+os.environ["WORLD_FILE_PATH"] = ""
+os.environ.setdefault("POSTGRES_SCHEMA", "tripcraft")
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from tripcraft.constants import POSTGRES_SCHEMA
+from tripcraft.models import (
+    WORLD_VERSION_KEY,
+    City,
+    Country,
+    Region,
+    State,
+    SubRegion,
+    WorldMetadata,
+)
+from tripcraft.models.world import Base as WorldBase
+from tripcraft.utils.translate import (
+    IdentityTranslatorBackend,
+    TranslationStore,
+    configure_translation_cache,
+)
+
+REGION_COUNT = 5
+SUB_REGION_COUNT = 20
+COUNTRY_COUNT = 200
+
+
+def measure(fn: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """
+    measure returns the mean time in seconds of a call to fn, over the fastest
+    of repeat runs of number calls. Like timeit, it disables garbage collection
+    while timing, so that collections of unrelated objects do not skew runs.
+    """
+    best = float("inf")
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def report(title: str, rows: Sequence[Tuple[str, float, str]]):
+    """
+    report prints the (name, value, unit) rows of a benchmark under its title.
+    """
+    print(title)
+    width = max(len(name) for name, _, _ in rows)
+    for name, value, unit in rows:
+        print(f"  {name:<{width}}  {value:>12,.2f} {unit}")
+    print()
+
+
+def create_world_engine(city_count: int, seed: int = 0) -> sa.Engine:
+    """
+    create_world_engine returns an in-memory SQLite database of 5 regions, 20
+    subregions, 200 countries and city_count cities, each in its own state,
+    with names in simplified Chinese stored for all of them. Translations go
+    to IdentityTranslatorBackend and are not stored.
+    """
+    configure_translation_cache(
+        translator=IdentityTranslatorBackend(), store=TranslationStore()
+    )
+    engine = sa.create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    ).execution_options(schema_translate_map={POSTGRES_SCHEMA: None})
+    WorldBase.metadata.create_all(engine)
+    metadata = sa.MetaData()
+    world_metadata = WorldMetadata.__table__.to_metadata(metadata, schema=None)
+    for column in world_metadata.columns:
+        if column.server_default is not None:
+            column.server_default = sa.DefaultClause(sa.func.current_timestamp())
+    metadata.create_all(engine)
+
+    rng = random.Random(seed)
+    with Session(engine) as session:
+        session.add(WorldMetadata(key=WORLD_VERSION_KEY, value="1"))
+        for id_ in range(1, REGION_COUNT + 1):
+            session.add(
+                Region(
+                    id=id_,
+                    name=f"Region {id_}",
+                    _translations=json.dumps({"cn": f"地区{id_}"}),
+                )
+            )
+        for id_ in range(1, SUB_REGION_COUNT + 1):
+            session.add(
+                SubRegion(
+                    id=id_,
+                    name=f"Subregion {id_}",
+                    region_id=id_ % REGION_COUNT + 1,
+                    _translations=json.dumps({"chinese": f"次区域{id_}"}),
+                )
+            )
+        for id_ in range(1, COUNTRY_COUNT + 1):
+            sub_region_id = id_ % SUB_REGION_COUNT + 1
+            session.add(
+                Country(
+                    id=id_,
+                    name=f"Country {id_}",
+                    iso2=f"{id_:02}"[-2:],
+                    iso3=f"{id_:03}",
+                    emoji="",
+                    latitude=rng.uniform(-60, 70),
+                    longitude=rng.uniform(-180, 180),
+                    region_id=sub_region_id % REGION_COUNT + 1,
+                    sub_region_id=sub_region_id,
+                    _translations=json.dumps({"cn": f"国家{id_}"}),
+                )
+            )
+        session.flush()
+        for id_ in range(1, city_count + 1):
+            country_id = rng.randint(1, COUNTRY_COUNT)
+            latitude = rng.uniform(-60, 70)
+            longitude = rng.uniform(-180, 180)
+            session.add(
+                State(
+                    id=id_,
+                    name=f"State {id_}",
+                    zh_hans=f"州{id_}",
+                    country_id=country_id,
+                    latitude=latitude,
+                    longitude=longitude,
+                )
+            )
+            session.add(
+                City(
+                    id=id_,
+                    name=f"City {id_}",
+                    zh_hans=f"城市{id_}",
+                    state_id=id_,
+                    country_id=country_id,
+                    latitude=latitude,
+                    longitude=longitude,
+                )
+            )
+        session.commit()
+    return engine
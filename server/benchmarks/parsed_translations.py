@@ -0,0 +1,80 @@
+"""
+parsed_translations measures mapping a page of 100 cities to nested schemas
+when their countries miss the world cache, so that the translations of every
+region, subregion and country are read twice per city: through city.country
+and through city.state.country. Parsing the translations JSON on every read is
+how they were read before JSONTranslationsMixin memoized them.
+"""
+
+from unittest import mock
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, selectinload
+
+from benchmarks.common import create_world_engine, measure, report
+from tripcraft.handlers.world import create_map_city
+from tripcraft.models import City, Country, Region, State, SubRegion
+from tripcraft.models.world import JSONTranslationsMixin
+from tripcraft.queries import WorldQuery
+from tripcraft.queries.world_cache import WorldCache
+
+PAGE_SIZE = 100
+
+
+def main():
+    engine = create_world_engine(PAGE_SIZE)
+    with Session(engine) as session:
+        world_query = WorldQuery(session)
+        # Every relationship is loaded up front, so that only mapping is timed.
+        cities = session.scalars(
+            sa.select(City)
+            .options(
+                selectinload(City.country).options(
+                    selectinload(Country.region), selectinload(Country.sub_region)
+                ),
+                selectinload(City.state)
+                .selectinload(State.country)
+                .options(
+                    selectinload(Country.region), selectinload(Country.sub_region)
+                ),
+            )
+            .order_by(City.id)
+            .limit(PAGE_SIZE)
+        ).all()
+        world_cache = WorldCache(
+            "1",
+            session.scalars(sa.select(Region)).all(),
+            session.scalars(sa.select(SubRegion)).all(),
+            session.scalars(sa.select(Country)).all(),
+        )
+
+        def map_page(world_cache: WorldCache):
+            map_city = create_map_city(world_query, world_cache)
+            return lambda: [map_city(city) for city in cities]
+
+        empty_cache = WorldCache("1", [], [], [])
+        with mock.patch.object(
+            JSONTranslationsMixin,
+            "_get_parsed_translations",
+            JSONTranslationsMixin._parse_translations,
+        ):
+            parsed_every_read = measure(map_page(empty_cache), 20)
+        memoized = measure(map_page(empty_cache), 20)
+        cached = measure(map_page(world_cache), 20)
+
+    report(
+        f"parsed_translations: mapping a page of {PAGE_SIZE} nested cities",
+        [
+            (
+                "cache miss, parsed on every read (before)",
+                parsed_every_read * 1e3,
+                "ms",
+            ),
+            ("cache miss, memoized", memoized * 1e3, "ms"),
+            ("countries from the world cache", cached * 1e3, "ms"),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
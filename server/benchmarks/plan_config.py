@@ -0,0 +1,122 @@
+"""
+plan_config measures GET /plan for a user with 200 plans of 30 days: sorting
+the plans by their start date, alone and followed by mapping them to the
+response. Each request loads the plans again, so their configs are parsed
+again. Parsing the config JSON on every access of Plan.config is how it was
+read before the parsed config was kept on the plan. Destination holidays are left out of the
+response, as looking them up takes as long either way.
+"""
+
+import datetime
+import json
+import random
+from typing import List
+from unittest import mock
+
+from benchmarks.common import measure, report
+from tripcraft.handlers.plan import plan_multiple_response
+from tripcraft.models import Plan, PlanConfig, PlanUserRole
+from tripcraft.schemas import PlanSchema
+from tripcraft.schemas.fields import FieldSet
+
+PLAN_COUNT = 200
+DAY_COUNT = 30
+FIELDS = (
+    "id,name,isEditable,config.dateStart,config.dateEnd,config.details.date,"
+    "config.details.destinations,config.details.schedules"
+)
+
+
+def create_plan(rng: random.Random, id_: int) -> Plan:
+    date_start = datetime.date(2024, 1, 1) + datetime.timedelta(rng.randrange(365))
+    details = []
+    for day in range(DAY_COUNT):
+        date = date_start + datetime.timedelta(day)
+        time = datetime.datetime.combine(date, datetime.time(9))
+        destination_id = rng.randint(1, 1000)
+        details.append(
+            {
+                "date": date,
+                "destinations": [
+                    {
+                        "type": "city",
+                        "id": destination_id,
+                        "name": {
+                            "en": f"City {destination_id}",
+                            "zh_hans": f"城市{destination_id}",
+                            "zh_hant": f"城市{destination_id}",
+                        },
+                        "country_iso2": "JP",
+                    }
+                ],
+                "schedules": [
+                    {
+                        "place": f"Place {i}",
+                        "time_start": time + datetime.timedelta(hours=2 * i),
+                        "time_end": time + datetime.timedelta(hours=2 * i + 1),
+                    }
+                    for i in range(3)
+                ],
+            }
+        )
+    return Plan(
+        id=str(id_),
+        name=f"Plan {id_}",
+        config=PlanConfig(
+            date_start=date_start,
+            date_end=date_start + datetime.timedelta(DAY_COUNT - 1),
+            details=details,
+        ),
+        public_role=PlanUserRole.editor,
+        public_visibility=True,
+    )
+
+
+def main():
+    rng = random.Random(0)
+    plans = [create_plan(rng, id_) for id_ in range(1, PLAN_COUNT + 1)]
+    fields = FieldSet.parse(FIELDS, PlanSchema)
+
+    # Configs used to be stored as JSON strings holding the serialized config.
+    strings = [json.dumps(plan.config.model_dump_json()) for plan in plans]
+    objects = [json.dumps(plan.config.model_dump(mode="json")) for plan in plans]
+
+    def sort_plans(stored_configs: List[str]):
+        # Decode the config column as the database driver does when the plans
+        # are loaded again.
+        for plan, stored in zip(plans, stored_configs):
+            plan._config = json.loads(stored)
+        return sorted(plans, key=lambda p: p.config.date_start)
+
+    def get_plans(stored_configs: List[str]):
+        plan_multiple_response(sort_plans(stored_configs), "nested", fields)
+
+    with mock.patch.object(
+        Plan, "config", property(lambda p: PlanConfig.model_validate_json(p._config))
+    ):
+        sorted_every_access = measure(lambda: sort_plans(strings), 5)
+        parsed_every_access = measure(lambda: get_plans(strings), 5)
+    sorted_once = measure(lambda: sort_plans(objects), 5)
+    parsed_once = measure(lambda: get_plans(objects), 5)
+
+    report(
+        f"plan_config: GET /plan for {PLAN_COUNT} plans of {DAY_COUNT} days",
+        [
+            (
+                "sorting, parsed on every access (before)",
+                sorted_every_access * 1e3,
+                "ms",
+            ),
+            ("sorting, parsed once per load", sorted_once * 1e3, "ms"),
+            (
+                "request, parsed on every access (before)",
+                parsed_every_access * 1e3,
+                "ms",
+            ),
+            ("request, parsed once per load", parsed_once * 1e3, "ms"),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+spatial_index measures radius and nearest-city searches over 150k cities
+clustered like the real ones, from GridIndex and from a scan measuring the
+distance to every city. The scan is the work of a query without the index.
+"""
+
+import heapq
+import itertools
+import random
+import time
+from typing import List, Tuple
+
+from benchmarks.common import measure, report
+from tripcraft.queries.world_spatial import GridIndex, haversine
+
+CITY_COUNT = 150000
+CLUSTER_COUNT = 300
+RADIUS = 50
+LIMIT = 10
+
+
+def generate_cities(rng: random.Random) -> List[Tuple[int, float, float]]:
+    centers = [
+        (rng.uniform(-45, 65), rng.uniform(-130, 150)) for _ in range(CLUSTER_COUNT)
+    ]
+    cities = []
+    for id_ in range(1, CITY_COUNT + 1):
+        lat, lng = rng.choice(centers)
+        cities.append(
+            (
+                id_,
+                max(-89.9, min(89.9, lat + rng.gauss(0, 3))),
+                (lng + rng.gauss(0, 4) + 180) % 360 - 180,
+            )
+        )
+    return cities
+
+
+def main():
+    rng = random.Random(0)
+    cities = generate_cities(rng)
+    start = time.perf_counter()
+    grid = GridIndex(cities)
+    build = time.perf_counter() - start
+
+    # Points near cities, as searched from a map, and anywhere on the globe,
+    # which includes oceans far from every city.
+    near = [
+        (lat + rng.gauss(0, 0.1), lng + rng.gauss(0, 0.1))
+        for _, lat, lng in rng.sample(cities, 200)
+    ]
+    anywhere = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(200)]
+
+    def scan_nearby(lat: float, lng: float):
+        found = []
+        for id_, city_lat, city_lng in cities:
+            distance = haversine(lat, lng, city_lat, city_lng)
+            if distance <= RADIUS:
+                found.append((distance, id_))
+        return heapq.nsmallest(LIMIT, found)
+
+    def scan_nearest(lat: float, lng: float):
+        return min(
+            (haversine(lat, lng, city_lat, city_lng), id_)
+            for id_, city_lat, city_lng in cities
+        )
+
+    def grid_nearby(lat: float, lng: float):
+        return grid.nearby(lat, lng, RADIUS, LIMIT)
+
+    def per_query(search, points, count):
+        queries = itertools.cycle(points)
+        return measure(lambda: search(*next(queries)), count, 3)
+
+    # Scanning takes long enough that a few queries are timed.
+    rows = [
+        ("nearby, scan (before)", scan_nearby, near, 3),
+        ("nearby, GridIndex", grid_nearby, near, 200),
+        ("nearest, scan (before)", scan_nearest, near, 3),
+        ("nearest near a city, GridIndex", grid.nearest, near, 200),
+        ("nearest anywhere, GridIndex", grid.nearest, anywhere, 200),
+    ]
+    report(
+        f"spatial_index: {CITY_COUNT} cities, nearby within {RADIUS} km",
+        [("building GridIndex", build * 1e3, "ms")]
+        + [
+            (name, per_query(search, points, count) * 1e6, "us/query")
+            for name, search, points, count in rows
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+world_fragments measures requests to the world endpoints for pages of 100
+cities and states, served through the app with an in-memory database. Building
+every fragment on every request, as they were built before WorldCache
+memoized them, is compared with splicing the memoized fragments.
+"""
+
+import logging
+from unittest import mock
+from urllib.parse import urlencode
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import create_world_engine, measure, report
+from tripcraft.app import app
+from tripcraft.queries.world_cache import WorldCache
+from tripcraft.utils import with_db_session
+
+PAGE_SIZE = 100
+CITY_COUNT = 1000
+REQUESTS = [
+    ("/world/city", {}),
+    ("/world/city", {"format": "normalized"}),
+    ("/world/state", {}),
+    ("/world/city", {"locale": "zh_hans", "fields": "id,name,country.name"}),
+]
+
+
+def build_fragment(self, kind, id_, locale, build, fields):
+    schema = build()
+    return schema.model_dump_json(
+        by_alias=True, include=fields.include(schema)
+    ).encode()
+
+
+def main():
+    session_factory = sessionmaker(create_world_engine(CITY_COUNT))
+
+    def override_db_session():
+        with session_factory() as session:
+            yield session
+
+    # httpx logs every request.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app.dependency_overrides[with_db_session] = override_db_session
+    client = TestClient(app)
+    rows = []
+    try:
+        for path, params in REQUESTS:
+            name = f"{path}?{urlencode(params, safe=',')}" if params else path
+            params = {**params, "pageSize": PAGE_SIZE}
+
+            def get():
+                response = client.get(path, params=params)
+                assert response.status_code == 200, response.text
+
+            with mock.patch.object(WorldCache, "fragment", build_fragment):
+                built = measure(get, 20)
+            # Fill the fragments of the page before timing.
+            get()
+            spliced = measure(get, 20)
+            rows += [
+                (f"{name}, built (before)", 1 / built, "requests/s"),
+                (f"{name}, spliced", 1 / spliced, "requests/s"),
+            ]
+    finally:
+        app.dependency_overrides.pop(with_db_session)
+
+    report(f"world_fragments: pages of {PAGE_SIZE} of {CITY_COUNT} cities", rows)
+
+
+if __name__ == "__main__":
+    main()
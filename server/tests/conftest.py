@@ -0,0 +1,225 @@
+import json
+import os
+from contextlib import contextmanager
+from typing import Iterator, List
+
+# The app reads its settings at import time, so they are set before importing
+# it: the world is served from the database only, and the tables of the app
+# schema are created without a schema in SQLite.
+os.environ.setdefault("POSTGRES_SCHEMA", "tripcraft")
+os.environ["WORLD_FILE_PATH"] = ""
+os.environ["WORLD_SEARCH_BACKEND"] = "index"
+
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from tripcraft.app import app
+from tripcraft.constants import POSTGRES_SCHEMA
+from tripcraft.models import (
+    WORLD_VERSION_KEY,
+    City,
+    Country,
+    Plan,
+    Region,
+    State,
+    SubRegion,
+    WorldMetadata,
+)
+from tripcraft.models.translation import CachedTranslation
+from tripcraft.models.world import Base as WorldBase
+from tripcraft.utils import with_db_session
+from tripcraft.utils.translate import (
+    IdentityTranslatorBackend,
+    TranslationStore,
+    Translator,
+    configure_translation_cache,
+)
+
+CITY_COUNT = 120
+
+
+@compiles(JSONB, "sqlite")
+def compile_jsonb(type_, compiler, **kw):
+    return "JSON"
+
+
+class FailingTranslator(Translator):
+    def translate(self, s: str, target: str) -> str:
+        raise AssertionError(f"translated {s!r} to {target}")
+
+
+class QueryCounter:
+    """
+    QueryCounter records the statements executed on the test database.
+    """
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self._recording = False
+
+    def record(self, statement: str):
+        if self._recording:
+            self.statements.append(statement)
+
+    @contextmanager
+    def count(self) -> Iterator[List[str]]:
+        self.statements = []
+        self._recording = True
+        try:
+            yield self.statements
+        finally:
+            self._recording = False
+
+
+def create_app_tables(engine: sa.Engine):
+    """
+    create_app_tables creates the app tables needed by the tests. SQLite cannot
+    evaluate their server defaults, so they default to the current time.
+    """
+    metadata = sa.MetaData()
+    for table in (
+        WorldMetadata.__table__,
+        Plan.__table__,
+        CachedTranslation.__table__,
+    ):
+        table = table.to_metadata(metadata, schema=None)
+        for column in table.columns:
+            if column.server_default is not None:
+                column.server_default = sa.DefaultClause(sa.func.current_timestamp())
+    metadata.create_all(engine)
+
+
+def seed_world(session: Session):
+    session.add_all(
+        [
+            Region(id=1, name="Asia", _translations=json.dumps({"cn": "亚洲"})),
+            Region(id=2, name="Europe", _translations=json.dumps({"cn": "欧洲"})),
+            SubRegion(
+                id=1,
+                name="Eastern Asia",
+                region_id=1,
+                _translations=json.dumps({"chinese": "东亚"}),
+            ),
+            SubRegion(
+                id=2,
+                name="Western Europe",
+                region_id=2,
+                _translations=json.dumps({"chinese": "西欧"}),
+            ),
+            Country(
+                id=1,
+                name="Japan",
+                iso2="JP",
+                iso3="JPN",
+                emoji="🇯🇵",
+                latitude=36,
+                longitude=138,
+                region_id=1,
+                sub_region_id=1,
+                _translations=json.dumps({"cn": "日本"}),
+            ),
+            Country(
+                id=2,
+                name="France",
+                iso2="FR",
+                iso3="FRA",
+                emoji="🇫🇷",
+                latitude=46,
+                longitude=2,
+                region_id=2,
+                sub_region_id=2,
+                _translations=json.dumps({"cn": "法国"}),
+            ),
+        ]
+    )
+    # Every city is in its own state, so that loading the states of a page
+    # lazily would cost a query per city.
+    for id_ in range(1, CITY_COUNT + 1):
+        country_id = id_ % 2 + 1
+        session.add(
+            State(
+                id=id_,
+                name=f"State {id_}",
+                country_id=country_id,
+                latitude=30 + id_ * 0.1,
+                longitude=100 + id_ * 0.1,
+            )
+        )
+        session.add(
+            City(
+                id=id_,
+                name=f"City {id_}",
+                state_id=id_,
+                country_id=country_id,
+                latitude=30 + id_ * 0.1,
+                longitude=100 + id_ * 0.1,
+            )
+        )
+    session.add(WorldMetadata(key=WORLD_VERSION_KEY, value="1"))
+    session.commit()
+
+
+@pytest.fixture
+def no_translation() -> Iterator[None]:
+    """
+    no_translation fails the test if anything is sent to the translator.
+    """
+    configure_translation_cache(
+        translator=FailingTranslator(), store=TranslationStore()
+    )
+    yield
+    configure_translation_cache(
+        translator=IdentityTranslatorBackend(), store=TranslationStore()
+    )
+
+
+@pytest.fixture(scope="session")
+def query_counter() -> QueryCounter:
+    return QueryCounter()
+
+
+@pytest.fixture(scope="session")
+def engine(query_counter: QueryCounter) -> sa.Engine:
+    configure_translation_cache(
+        translator=IdentityTranslatorBackend(), store=TranslationStore()
+    )
+    engine = sa.create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    ).execution_options(schema_translate_map={POSTGRES_SCHEMA: None})
+    WorldBase.metadata.create_all(engine)
+    create_app_tables(engine)
+    with Session(engine) as session:
+        seed_world(session)
+
+    @sa.event.listens_for(engine, "before_cursor_execute")
+    def receive_before_cursor_execute(conn, cursor, statement, *args):
+        query_counter.record(statement)
+
+    return engine
+
+
+@pytest.fixture(scope="session")
+def session_factory(engine: sa.Engine) -> sessionmaker:
+    return sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture(scope="session")
+def client(session_factory: sessionmaker) -> Iterator[TestClient]:
+    def override_db_session():
+        session = session_factory()
+        try:
+            yield session
+            session.commit()
+        finally:
+            session.close()
+
+    app.dependency_overrides[with_db_session] = override_db_session
+    yield TestClient(app)
+    app.dependency_overrides.pop(with_db_session)
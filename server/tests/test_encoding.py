@@ -0,0 +1,34 @@
+from typing import Optional
+
+import pytest
+from fastapi import Request
+
+from tripcraft.utils import accepts_gzip
+
+
+def make_request(accept_encoding: Optional[str]) -> Request:
+    headers = []
+    if accept_encoding is not None:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, False),
+        ("", False),
+        ("gzip", True),
+        ("GZIP; q=1", True),
+        ("x-gzip", True),
+        ("br, *;q=0.5", True),
+        ("identity", False),
+        ("gzip;q=0", False),
+        ("deflate, gzip;q=0.0", False),
+        ("gzip;q=0, *", False),
+        ("notgzip, br", False),
+        ("gzip;q=invalid", False),
+    ],
+)
+def test_accepts_gzip(accept_encoding: Optional[str], expected: bool):
+    assert accepts_gzip(make_request(accept_encoding)) is expected
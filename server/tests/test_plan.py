@@ -0,0 +1,97 @@
+import datetime
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from tripcraft.models import Plan, PlanConfig, PlanUserRole
+from tripcraft.queries.world_query import CityQuery, StateQuery
+
+from .conftest import CITY_COUNT, QueryCounter
+
+PLAN_ID = "put-queries"
+DATE_START = datetime.date(2024, 5, 1)
+
+
+@pytest.fixture(scope="module")
+def plan_id(session_factory: sessionmaker) -> str:
+    with session_factory() as session:
+        session.add(
+            Plan(
+                id=PLAN_ID,
+                name="Trip",
+                config=PlanConfig(
+                    date_start=DATE_START, date_end=DATE_START, details=[]
+                ),
+                public_role=PlanUserRole.editor,
+                public_visibility=True,
+            )
+        )
+        session.commit()
+    return PLAN_ID
+
+
+def plan_body(days: int, destinations_per_day: int) -> Dict[str, Any]:
+    """
+    plan_body returns a plan of days days, each with destinations_per_day
+    distinct countries, states or cities.
+    """
+    types = ("country", "state", "city")
+    details = []
+    for day in range(days):
+        destinations = []
+        for i in range(destinations_per_day):
+            n = day * destinations_per_day + i
+            type_ = types[n % len(types)]
+            id_ = n % 2 + 1 if type_ == "country" else n % CITY_COUNT + 1
+            destinations.append({"type": type_, "id": id_})
+        details.append(
+            {
+                "date": str(DATE_START + datetime.timedelta(day)),
+                "destinations": destinations,
+                "schedules": [],
+            }
+        )
+    return {
+        "name": "Trip",
+        "config": {
+            "dateStart": str(DATE_START),
+            "dateEnd": str(DATE_START + datetime.timedelta(days - 1)),
+            "details": details,
+        },
+    }
+
+
+def test_put_plan_queries_do_not_grow_with_plan_size(
+    client: TestClient,
+    query_counter: QueryCounter,
+    monkeypatch: pytest.MonkeyPatch,
+    plan_id: str,
+):
+    # Every PUT must look up its states and its cities once each.
+    lookups: List[str] = []
+    for type_, query in (("state", StateQuery), ("city", CityQuery)):
+        get_by_ids = query.get_by_ids
+
+        def spy(self, ids, *args, type_=type_, get_by_ids=get_by_ids, **kwargs):
+            lookups.append(type_)
+            return get_by_ids(self, ids, *args, **kwargs)
+
+        monkeypatch.setattr(query, "get_by_ids", spy)
+
+    # Load the world cache, which countries are read from.
+    client.put(f"/plan/{plan_id}", json=plan_body(1, 3))
+
+    counts = []
+    for days, destinations_per_day in ((10, 1), (60, 3)):
+        lookups.clear()
+        with query_counter.count() as statements:
+            response = client.put(
+                f"/plan/{plan_id}", json=plan_body(days, destinations_per_day)
+            )
+        assert response.status_code == 200
+        assert len(response.json()["config"]["details"]) == days
+        assert sorted(lookups) == ["city", "state"]
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
@@ -0,0 +1,113 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from tripcraft.utils.translate import (
+    DatabaseTranslationStore,
+    IdentityTranslatorBackend,
+    TranslationCache,
+    TranslationStore,
+    configure_translation_cache,
+)
+
+from .conftest import FailingTranslator, QueryCounter
+
+
+class CountingTranslator(IdentityTranslatorBackend):
+    def __init__(self):
+        self.translated: List[str] = []
+
+    def translate(self, s: str, target: str) -> str:
+        self.translated.append(s)
+        return super().translate(s, target)
+
+
+class MemoryTranslationStore(TranslationStore):
+    """
+    MemoryTranslationStore keeps translations in a dict and records the sources
+    of every call.
+    """
+
+    def __init__(self, translations: Dict[Tuple[str, str], str]):
+        self.translations = translations
+        self.gets: List[List[str]] = []
+        self.sets: List[List[str]] = []
+
+    def get_many(
+        self, sources: Sequence[str], locale: str, session: Optional[Session] = None
+    ) -> Dict[str, str]:
+        self.gets.append(list(sources))
+        return {
+            s: self.translations[(s, locale)]
+            for s in sources
+            if (s, locale) in self.translations
+        }
+
+    def set_many(
+        self,
+        translations: Dict[str, str],
+        locale: str,
+        session: Optional[Session] = None,
+    ):
+        self.sets.append(list(translations))
+        for source, translation in translations.items():
+            self.translations[(source, locale)] = translation
+
+
+def test_translate_many_reads_the_lru_then_the_store_then_the_translator():
+    translator = CountingTranslator()
+    store = MemoryTranslationStore({("Paris", "zh-CN"): "巴黎"})
+    cache = TranslationCache(translator, store)
+
+    assert cache.translate_many(["Paris", "Lyon", "Paris", "Nice"], "zh-CN") == [
+        "巴黎",
+        "Lyon",
+        "巴黎",
+        "Nice",
+    ]
+    assert store.gets == [["Paris", "Lyon", "Nice"]]
+    assert store.sets == [["Lyon", "Nice"]]
+    assert translator.translated == ["Lyon", "Nice"]
+
+    assert cache.translate_many(["Nice", "Paris"], "zh-CN") == ["Nice", "巴黎"]
+    assert cache.translate("Lyon", "zh-CN") == "Lyon"
+    assert len(store.gets) == 1
+    assert len(translator.translated) == 2
+
+
+@pytest.fixture
+def database_store() -> Iterator[None]:
+    configure_translation_cache(
+        translator=IdentityTranslatorBackend(), store=DatabaseTranslationStore()
+    )
+    yield
+    configure_translation_cache(
+        translator=IdentityTranslatorBackend(), store=TranslationStore()
+    )
+
+
+def test_world_page_translates_names_in_one_statement_each(
+    client: TestClient, query_counter: QueryCounter, database_store: None
+):
+    params = {"pageSize": 10, "pageIndex": 3, "locale": "zh_hans"}
+    with query_counter.count() as statements:
+        response = client.get("/world/city", params=params)
+    assert response.status_code == 200
+    assert response.json()["results"][0]["name"] == {"zhHans": "City 31"}
+    translation_statements = [s for s in statements if "translation_cache" in s]
+    assert len(translation_statements) == 2
+    assert translation_statements[0].startswith("SELECT")
+    assert translation_statements[1].startswith("INSERT")
+
+    # A new process reads the stored translations without translating them.
+    configure_translation_cache(
+        translator=FailingTranslator(), store=DatabaseTranslationStore()
+    )
+    with query_counter.count() as statements:
+        response = client.get("/world/city", params=params)
+    assert response.status_code == 200
+    assert [s for s in statements if "translation_cache" in s] == [
+        translation_statements[0]
+    ]
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from tripcraft.models import City, State
+from tripcraft.queries import world_query
+from tripcraft.queries.world_cache import WorldCache
+from tripcraft.queries.world_file import WorldFile, write_world_file
+
+from .conftest import QueryCounter
+
+
+def test_world_file_reads_back_every_string(
+    tmp_path: Path, session_factory: sessionmaker
+):
+    path = str(tmp_path / "world.bin")
+    with session_factory() as session:
+        session.get(State, 1).zh_hans = "东京都"
+        session.get(City, 2).zh_hant = "大阪"
+        session.flush()
+        write_world_file(session, path)
+        session.rollback()
+
+    world_file = WorldFile(path)
+    states = [world_file.state(row) for row in range(2)]
+    assert [(s.name, s.zh_hans, s.zh_hant) for s in states] == [
+        ("State 1", "东京都", None),
+        ("State 2", None, None),
+    ]
+    cities = [world_file.city(row) for row in range(2)]
+    assert [(c.name, c.zh_hans, c.zh_hant) for c in cities] == [
+        ("City 1", None, None),
+        ("City 2", None, "大阪"),
+    ]
+    assert cities[1].state.name == "State 2"
+
+
+@pytest.fixture
+def world_file(
+    tmp_path: Path, session_factory: sessionmaker, monkeypatch: pytest.MonkeyPatch
+) -> WorldFile:
+    path = str(tmp_path / "world.bin")
+    with session_factory() as session:
+        write_world_file(session, path)
+    world_file = WorldFile(path)
+    monkeypatch.setattr(world_query, "load_world_file", lambda session: world_file)
+    return world_file
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/world/state", {}),
+        ("/world/state", {"format": "normalized"}),
+        ("/world/city", {}),
+        ("/world/city", {"format": "normalized"}),
+        ("/world/city/nearby", {"lat": 30.1, "lng": 100.1}),
+        ("/world/reverse", {"lat": 30.1, "lng": 100.1, "format": "normalized"}),
+    ],
+)
+def test_world_file_rows_load_countries_missing_from_cache(
+    client: TestClient,
+    query_counter: QueryCounter,
+    world_file: WorldFile,
+    monkeypatch: pytest.MonkeyPatch,
+    path: str,
+    params: dict,
+):
+    monkeypatch.setattr(WorldCache, "country", lambda *args: None)
+    monkeypatch.setattr(WorldCache, "normalized_country", lambda *args: None)
+    params = {**params, "locale": "en"}
+
+    with query_counter.count() as statements:
+        response = client.get(path, params=params)
+    assert response.status_code == 200
+    assert "France" in response.text
+    assert any("FROM countries" in statement for statement in statements)
@@ -0,0 +1,17 @@
+from fastapi.testclient import TestClient
+
+
+def test_locale_only_returns_its_language(client: TestClient):
+    response = client.get("/world/city", params={"pageSize": 1, "locale": "en"})
+    assert response.status_code == 200
+    city = response.json()["results"][0]
+    assert city["name"] == {"en": "City 1"}
+    assert city["country"]["name"] == {"en": "France"}
+
+
+def test_translations_require_every_language(client: TestClient):
+    schemas = client.get("/openapi.json").json()["components"]["schemas"]
+    assert set(schemas["Translations"]["required"]) == {"en", "zhHans", "zhHant"}
+    assert schemas["CitySchema"]["properties"]["name"] == {
+        "$ref": "#/components/schemas/Translations"
+    }
@@ -0,0 +1,68 @@
+from fastapi.testclient import TestClient
+
+from .conftest import QueryCounter
+
+
+def test_normalized_city_only_includes_referenced_parents(
+    client: TestClient, query_counter: QueryCounter, no_translation: None
+):
+    params = {"format": "normalized", "pageSize": 5}
+    # Load the world cache and the total count.
+    client.get("/world/city", params={**params, "fields": "id"})
+
+    with query_counter.count() as statements:
+        response = client.get("/world/city", params={**params, "fields": "id,name.en"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"][0] == {"id": 1, "name": {"en": "City 1"}}
+    assert body["included"] == {
+        "region": {},
+        "subRegion": {},
+        "country": {},
+        "state": {},
+    }
+    assert not any("FROM states" in statement for statement in statements)
+
+
+def test_normalized_city_includes_referenced_state(client: TestClient):
+    response = client.get(
+        "/world/city",
+        params={"format": "normalized", "pageSize": 5, "fields": "id,stateId"},
+    )
+    included = response.json()["included"]
+    assert set(included["state"]) == {"1", "2", "3", "4", "5"}
+    assert set(included["country"]) == {"1", "2"}
+
+
+def test_normalized_state_only_includes_referenced_country(client: TestClient):
+    params = {"format": "normalized", "pageSize": 5}
+    response = client.get("/world/state", params={**params, "fields": "id,name.en"})
+    assert response.status_code == 200
+    assert response.json()["included"] == {
+        "region": {},
+        "subRegion": {},
+        "country": {},
+        "state": {},
+    }
+
+    response = client.get("/world/state", params={**params, "fields": "id,countryId"})
+    included = response.json()["included"]
+    assert set(included["country"]) == {"1", "2"}
+    assert set(included["region"]) == {"1", "2"}
+
+
+def test_normalized_country_only_includes_referenced_parents(client: TestClient):
+    params = {"format": "normalized"}
+    response = client.get("/world/country", params={**params, "fields": "id,name"})
+    assert response.status_code == 200
+    assert response.json()["included"] == {
+        "region": {},
+        "subRegion": {},
+        "country": {},
+        "state": {},
+    }
+
+    response = client.get("/world/country", params={**params, "fields": "id,regionId"})
+    included = response.json()["included"]
+    assert set(included["region"]) == {"1", "2"}
+    assert included["subRegion"] == {}
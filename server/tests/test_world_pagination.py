@@ -0,0 +1,71 @@
+from typing import List, Tuple
+
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from tripcraft.queries.world_query import CountryQuery
+from tripcraft.schemas import Pagination, PaginationCursor
+
+from .conftest import QueryCounter
+
+
+def count_city_page_queries(
+    client: TestClient, query_counter: QueryCounter, pages: List[Tuple[int, int]]
+) -> List[int]:
+    """
+    count_city_page_queries returns the number of statements executed for each
+    page of /world/city, by page size and page index.
+    """
+    # Load the world cache and the total count, which later pages reuse.
+    client.get("/world/city", params={"pageSize": 1})
+
+    counts = []
+    for page_size, page_index in pages:
+        with query_counter.count() as statements:
+            response = client.get(
+                "/world/city", params={"pageSize": page_size, "pageIndex": page_index}
+            )
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == page_size
+        counts.append(len(statements))
+    return counts
+
+
+def test_city_page_queries_do_not_grow_with_page_size(
+    client: TestClient, query_counter: QueryCounter
+):
+    # Every page covers cities that no earlier page mapped, so that none of
+    # their states are served from a cached fragment.
+    counts = count_city_page_queries(client, query_counter, [(5, 1), (20, 1), (50, 1)])
+    assert counts[0] == counts[1] == counts[2]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"pageSize": 0},
+        {"pageSize": 0, "name": "c"},
+        {"pageIndex": -1},
+        {"pageIndex": -1, "name": "c"},
+    ],
+)
+def test_page_size_must_be_positive(client: TestClient, params):
+    response = client.get("/world/city", params=params)
+    assert response.status_code == 422
+
+
+def test_country_zombodb_search_pages_by_cursor(
+    session_factory: sessionmaker, query_counter: QueryCounter
+):
+    pagination = Pagination(
+        page_index=0, page_size=10, cursor=PaginationCursor(id=1, score=2.5)
+    )
+    with session_factory() as session, query_counter.count() as statements:
+        # SQLite cannot run ZomboDB queries, only record them.
+        with pytest.raises(sa.exc.DBAPIError):
+            CountryQuery(session)._get_by_name_from_zombodb("ja", pagination)
+    assert "score < ?" in statements[-1]
+    assert "ORDER BY score DESC, id" in statements[-1]
+    assert "OFFSET 0" in statements[-1]
@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from tripcraft.queries import world_query
+from tripcraft.queries.world_index import NameIndex
+from tripcraft.queries.world_query import CityQuery
+from tripcraft.schemas import Pagination, PaginationCursor
+
+
+@pytest.mark.parametrize("name", ["", " ", "!?", "-"])
+def test_name_without_letters_matches_nothing(client: TestClient, name: str):
+    index = NameIndex([(1, ["Tokyo"], 0.0), (2, ["Kyoto"], 0.0)])
+    assert index.search(name) == []
+    assert index.search_fuzzy(name) == []
+
+    response = client.get("/world/city", params={"name": name})
+    assert response.status_code == 200
+    assert response.json()["results"] == []
+
+
+@pytest.mark.parametrize(
+    "page_index, cursor, expected",
+    [
+        (0, None, [1]),
+        (1, None, []),
+        (0, PaginationCursor(id=1, score=100.0), []),
+    ],
+)
+def test_zombodb_falls_back_to_index_on_first_page_only(
+    session_factory: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+    page_index: int,
+    cursor: Optional[PaginationCursor],
+    expected: List[int],
+):
+    monkeypatch.setattr(world_query, "WORLD_SEARCH_BACKEND", "zombodb")
+    # ZomboDB finds no city, as on a page past its last match.
+    monkeypatch.setattr(
+        CityQuery, "_get_by_name_from_zombodb", lambda self, *args, **kwargs: []
+    )
+    pagination = Pagination(page_index=page_index, page_size=10, cursor=cursor)
+    with session_factory() as session:
+        cities = CityQuery(session).get_by_name("City 1", pagination)
+    assert [city.id for city in cities][:1] == expected
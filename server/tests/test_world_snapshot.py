@@ -0,0 +1,24 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from tripcraft.queries.world_cache import WorldSnapshot
+
+
+def test_failed_load_is_retried_at_next_check(session_factory: sessionmaker):
+    values: List[Optional[str]] = [None, "loaded"]
+
+    def load(session: Session, version: str) -> Optional[str]:
+        return values.pop(0)
+
+    snapshot: WorldSnapshot[Optional[str]] = WorldSnapshot("test", load)
+    with session_factory() as session:
+        assert snapshot.get(session) is None
+        # Within WORLD_CACHE_TTL, the failed load is not retried.
+        assert snapshot.get(session) is None
+        assert values == ["loaded"]
+
+        snapshot._checked_at = 0.0
+        assert snapshot.get(session) == "loaded"
+        snapshot._checked_at = 0.0
+        assert snapshot.get(session) == "loaded"
@@ -0,0 +1,53 @@
+import sys
+from typing import List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tripcraft.queries import world_spatial
+from tripcraft.queries.world_spatial import GridIndex, haversine
+
+from .conftest import CITY_COUNT
+
+# The cities of the test world, as seeded in conftest.
+CITIES: List[Tuple[int, float, float]] = [
+    (id_, 30 + id_ * 0.1, 100 + id_ * 0.1) for id_ in range(1, CITY_COUNT + 1)
+]
+
+
+@pytest.mark.parametrize(
+    "lat, lng", [(-60, -100), (89.9, -80), (-89.9, 179.9), (35, 105), (36, -179)]
+)
+def test_nearest_measures_few_distances(
+    monkeypatch: pytest.MonkeyPatch, lat: float, lng: float
+):
+    grid = GridIndex(CITIES)
+    measured: List[float] = []
+
+    def counting_haversine(*args: float) -> float:
+        distance = haversine(*args)
+        measured.append(distance)
+        return distance
+
+    monkeypatch.setattr(world_spatial, "haversine", counting_haversine)
+    found = grid.nearest(lat, lng)
+    assert found is not None
+    assert len(measured) <= 20
+
+    expected = min((haversine(lat, lng, la, ln), id_) for id_, la, ln in CITIES)
+    assert found[1] == expected[1]
+    assert found[0] == pytest.approx(expected[0])
+
+
+def test_reverse_batch_caps_distances_measured(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    body = {"points": [{"lat": -60, "lng": -100}, {"lat": 40, "lng": 0}]}
+    response = client.post("/world/reverse", json=body)
+    assert response.status_code == 200
+    assert [result["city"]["id"] for result in response.json()["results"]] == [1, 120]
+
+    world = sys.modules["tripcraft.handlers.world"]
+    monkeypatch.setattr(world, "WORLD_REVERSE_MAX_DISTANCES", 1)
+    response = client.post("/world/reverse", json=body)
+    assert response.status_code == 400
@@ -0,0 +1,93 @@
+import gzip
+import json
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from tripcraft.jobs import backfill_translations
+from tripcraft.models import State
+from tripcraft.queries.world_tree import WorldTree
+from tripcraft.utils.translate import (
+    IdentityTranslatorBackend,
+    TranslationStore,
+    Translator,
+    configure_translation_cache,
+)
+
+
+class SuffixTranslator(Translator):
+    def translate(self, s: str, target: str) -> str:
+        return f"{s} 中"
+
+
+def test_tree_load_does_not_translate(
+    session_factory: sessionmaker, no_translation: None
+):
+    with session_factory() as session:
+        tree = WorldTree.load(session, "1")
+    assert tree.has(("state", 1))
+
+
+def test_tree_etag_depends_on_encoding(client: TestClient):
+    plain = client.get("/world/tree", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/world/tree", headers={"Accept-Encoding": "gzip"})
+    assert plain.headers.get("Content-Encoding") is None
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert plain.json() == compressed.json()
+    assert plain.headers["ETag"] != compressed.headers["ETag"]
+
+    refused = client.get("/world/tree", headers={"Accept-Encoding": "gzip;q=0"})
+    assert refused.headers.get("Content-Encoding") is None
+    assert refused.headers["ETag"] == plain.headers["ETag"]
+
+    for encoding, response in (("identity", plain), ("gzip", compressed)):
+        etag = response.headers["ETag"]
+        not_modified = client.get(
+            "/world/tree",
+            headers={"Accept-Encoding": encoding, "If-None-Match": etag},
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == etag
+
+
+def state_names(tree: WorldTree, country_id: int) -> List[str]:
+    subtree = json.loads(gzip.decompress(tree.subtree(("country", country_id), 1)))
+    return [state["name"]["zhHans"] for state in subtree["results"][0]["children"]]
+
+
+@pytest.fixture
+def backfilled_states(
+    session_factory: sessionmaker, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[None]:
+    @contextmanager
+    def open_db_session(read_write=True) -> Iterator[Session]:
+        with session_factory() as session:
+            yield session
+            session.commit()
+
+    monkeypatch.setattr(backfill_translations, "open_db_session", open_db_session)
+    configure_translation_cache(translator=SuffixTranslator(), store=TranslationStore())
+    yield
+    configure_translation_cache(
+        translator=IdentityTranslatorBackend(), store=TranslationStore()
+    )
+    with session_factory() as session:
+        session.execute(sa.update(State).values(zh_hans=None, zh_hant=None))
+        session.commit()
+
+
+def test_tree_names_states_stored_by_backfill(
+    session_factory: sessionmaker, backfilled_states: None
+):
+    with session_factory() as session:
+        tree = WorldTree.load(session, "1")
+    assert state_names(tree, 1)[:2] == ["State 2", "State 4"]
+
+    backfill_translations.backfill(State, chunk_size=50, concurrency=2)
+    with session_factory() as session:
+        tree = WorldTree.load(session, "2")
+    assert state_names(tree, 1)[:2] == ["State 2 中", "State 4 中"]
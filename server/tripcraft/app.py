@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,6 +7,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from tripcraft.constants import ALLOW_ORIGINS, LOG_LEVEL
 from tripcraft.handlers import make_route
 from tripcraft.logging import SlogFormatter
+from tripcraft.queries.world_cache import warm_up_world_cache
+from tripcraft.queries.world_file import warm_up_world_file
+from tripcraft.queries.world_index import warm_up_world_index
+from tripcraft.queries.world_spatial import warm_up_city_grid
+from tripcraft.queries.world_tree import warm_up_world_tree
 
 stream_handler = logging.StreamHandler()
 formatter = SlogFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
@@ -15,7 +21,18 @@ logging.basicConfig(
     level=LOG_LEVEL,
 )
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_world_cache()
+    warm_up_world_file()
+    warm_up_world_index()
+    warm_up_city_grid()
+    warm_up_world_tree()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOW_ORIGINS,
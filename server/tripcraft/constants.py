@@ -9,8 +9,29 @@ POSTGRES_SCHEMA = os.environ.get("POSTGRES_SCHEMA", "")
 
 ELASTICSEARCH_URL = os.environ.get("ELASTICSEARCH_URL", "")
 
+WORLD_CACHE_TTL = int(os.environ.get("WORLD_CACHE_TTL", 60))
+WORLD_COUNT_CACHE_TTL = int(os.environ.get("WORLD_COUNT_CACHE_TTL", 300))
+WORLD_COUNT_CACHE_SIZE = int(os.environ.get("WORLD_COUNT_CACHE_SIZE", 10000))
+WORLD_SEARCH_BACKEND = os.environ.get("WORLD_SEARCH_BACKEND", "index")
+WORLD_SEARCH_CACHE_SIZE = int(os.environ.get("WORLD_SEARCH_CACHE_SIZE", 1024))
+WORLD_SEARCH_CACHE_MAX_RESULTS = int(
+    os.environ.get("WORLD_SEARCH_CACHE_MAX_RESULTS", 1000)
+)
+WORLD_FUZZY_MAX_CANDIDATES = int(os.environ.get("WORLD_FUZZY_MAX_CANDIDATES", 256))
+WORLD_FRAGMENT_CACHE_SIZE = int(os.environ.get("WORLD_FRAGMENT_CACHE_SIZE", 100000))
+WORLD_REVERSE_MAX_DISTANCES = int(os.environ.get("WORLD_REVERSE_MAX_DISTANCES", 200000))
+WORLD_TREE_CACHE_SIZE = int(os.environ.get("WORLD_TREE_CACHE_SIZE", 1024))
+WORLD_FILE_PATH = os.environ.get("WORLD_FILE_PATH", "")
+WORLD_CACHE_CONTROL_MAX_AGE = int(os.environ.get("WORLD_CACHE_CONTROL_MAX_AGE", 300))
+
 REDIS_URL = os.environ.get("REDIS_URL", "")
 
+TRANSLATOR_BACKEND = os.environ.get("TRANSLATOR_BACKEND", "google")
+TRANSLATION_CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", 10000))
+CHINESE_CONVERSION_CACHE_SIZE = int(
+    os.environ.get("CHINESE_CONVERSION_CACHE_SIZE", 10000)
+)
+
 SMTP_HOST = os.environ.get("SMTP_HOST", "")
 SMTP_PORT = int(os.environ.get("SMTP_PORT", 0))
 SMTP_SSL = os.environ.get("SMTP_SSL", "true").lower() == "true"
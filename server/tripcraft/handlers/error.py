@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 from fastapi import HTTPException
 
@@ -20,6 +20,10 @@ def not_found():
     )
 
 
+def not_modified(headers: Dict[str, str]):
+    return HTTPException(status_code=304, headers=headers)
+
+
 def invalid_request(desc: str, detail: Optional[Any] = None):
     return HTTPException(
         detail=ApiError(
@@ -1,7 +1,8 @@
 import datetime
-from typing import Annotated, List, Optional
+from typing import Annotated, Dict, List, Optional, Sequence, Union
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from tripcraft.handlers import error
@@ -15,13 +16,25 @@ from tripcraft.models.plan import (
 from tripcraft.queries import WorldQuery, with_world_query
 from tripcraft.queries.plan_query import PlanQuery, with_plan_query
 from tripcraft.schemas import (
+    ALL_FIELDS,
+    FieldSet,
+    NormalizedPlanMultipleResponse,
+    NormalizedPlanSchema,
+    NormalizedPlanSingleResponse,
     PlanConfigSchema,
+    PlanIncludedSchema,
     PlanMultipleResponse,
     PlanRequest,
     PlanSchema,
     PlanSingleResponse,
+    ResponseFormat,
+    build_sparse,
+    with_fields_param,
 )
 from tripcraft.schemas.plan import (
+    NormalizedPlanConfigDetailSchema,
+    NormalizedPlanConfigSchema,
+    PlanConfigDetailDestinationReferenceSchema,
     PlanConfigDetailDestinationSchema,
     PlanConfigDetailScheduleSchema,
     PlanConfigDetailSchema,
@@ -52,46 +65,177 @@ def map_plan_config_detail_schedule(
     )
 
 
-def map_plan_config_detail(detail: PlanConfigDetail) -> PlanConfigDetailSchema:
-    return PlanConfigDetailSchema(
-        date=detail.date,
-        destinations=list(map(map_plan_config_detail_destination, detail.destinations)),
-        destination_holidays=detail.destination_holidays,
-        schedules=list(map(map_plan_config_detail_schedule, detail.schedules)),
+def create_map_plan_config_detail(
+    fields: FieldSet = ALL_FIELDS, included: Optional[PlanIncludedSchema] = None
+):
+    """
+    create_map_plan_config_detail maps details to nested schemas, or given
+    included, to normalized schemas whose destinations reference the schemas
+    added to included.
+    """
+    detail_schema = (
+        PlanConfigDetailSchema if included is None else NormalizedPlanConfigDetailSchema
     )
 
-
-def create_map_plan(is_editable: bool):
-    def map_plan(plan: Plan) -> PlanSchema:
-        return PlanSchema(
-            id=plan.id,
-            name=plan.name,
-            config=PlanConfigSchema(
-                date_start=plan.config.date_start,
-                date_end=plan.config.date_end,
-                details=list(map(map_plan_config_detail, plan.config.details)),
+    def map_destinations(
+        detail: PlanConfigDetail,
+    ) -> Union[
+        List[PlanConfigDetailDestinationSchema],
+        List[PlanConfigDetailDestinationReferenceSchema],
+    ]:
+        if included is None:
+            return list(map(map_plan_config_detail_destination, detail.destinations))
+        destinations: List[PlanConfigDetailDestinationReferenceSchema] = []
+        for destination in detail.destinations:
+            type_ = destination.type.value
+            included_destinations = getattr(included, type_)
+            if destination.id not in included_destinations:
+                included_destinations[destination.id] = (
+                    map_plan_config_detail_destination(destination)
+                )
+            destinations.append(
+                PlanConfigDetailDestinationReferenceSchema(
+                    type=type_, id=destination.id
+                )
+            )
+        return destinations
+
+    def map_plan_config_detail(
+        detail: PlanConfigDetail,
+    ) -> Union[PlanConfigDetailSchema, NormalizedPlanConfigDetailSchema]:
+        return build_sparse(
+            detail_schema,
+            fields,
+            date=lambda: detail.date,
+            destinations=lambda: map_destinations(detail),
+            destination_holidays=lambda: detail.destination_holidays,
+            schedules=lambda: list(
+                map(map_plan_config_detail_schedule, detail.schedules)
             ),
-            is_editable=is_editable,
+        )
+
+    return map_plan_config_detail
+
+
+def create_map_plan(
+    is_editable: bool,
+    fields: FieldSet = ALL_FIELDS,
+    included: Optional[PlanIncludedSchema] = None,
+):
+    """
+    create_map_plan maps plans to nested schemas, or given included, to
+    normalized schemas whose destinations are added to included.
+    """
+    config_fields = fields.get("config")
+    map_plan_config_detail = create_map_plan_config_detail(
+        config_fields.get("details"), included
+    )
+    plan_schema = PlanSchema if included is None else NormalizedPlanSchema
+    config_schema = PlanConfigSchema if included is None else NormalizedPlanConfigSchema
+
+    def map_plan_config(
+        config: PlanConfig,
+    ) -> Union[PlanConfigSchema, NormalizedPlanConfigSchema]:
+        return build_sparse(
+            config_schema,
+            config_fields,
+            date_start=lambda: config.date_start,
+            date_end=lambda: config.date_end,
+            details=lambda: list(map(map_plan_config_detail, config.details)),
+        )
+
+    def map_plan(plan: Plan) -> Union[PlanSchema, NormalizedPlanSchema]:
+        return build_sparse(
+            plan_schema,
+            fields,
+            id=lambda: plan.id,
+            name=lambda: plan.name,
+            config=lambda: map_plan_config(plan.config),
+            is_editable=lambda: is_editable,
         )
 
     return map_plan
 
 
-@plan.get("/plan", operation_id="plan_get", response_model=PlanMultipleResponse)
-def _plan(user: Annotated[User, Depends(with_current_user(False))]):
-    plans = sorted(user.plans, key=lambda p: p.config.date_start)
-    return PlanMultipleResponse(
-        results=list(map(create_map_plan(is_editable=True), plans))
+def json_response(schema: BaseModel, fields: FieldSet = ALL_FIELDS) -> Response:
+    """
+    json_response serializes a schema trimmed to fields directly, skipping the
+    validation of the return value against a union of response models.
+    """
+    return Response(
+        content=schema.model_dump_json(by_alias=True, include=fields.include(schema)),
+        media_type="application/json",
+    )
+
+
+def plan_single_response(
+    plan: Plan,
+    is_editable: bool,
+    format: ResponseFormat,
+    fields: FieldSet = ALL_FIELDS,
+):
+    if format == "normalized":
+        included = PlanIncludedSchema(country={}, state={}, city={})
+        normalized = create_map_plan(is_editable, fields, included)(plan)
+        return json_response(
+            NormalizedPlanSingleResponse.model_construct(
+                **dict(normalized), included=included
+            ),
+            fields.plus("included"),
+        )
+    schema = create_map_plan(is_editable, fields)(plan)
+    return schema if fields.is_all else json_response(schema, fields)
+
+
+def plan_multiple_response(
+    plans: Sequence[Plan], format: ResponseFormat, fields: FieldSet = ALL_FIELDS
+):
+    if format == "normalized":
+        included = PlanIncludedSchema(country={}, state={}, city={})
+        map_plan = create_map_plan(True, fields, included)
+        return json_response(
+            NormalizedPlanMultipleResponse(
+                results=list(map(map_plan, plans)), included=included
+            ),
+            fields.within("results", NormalizedPlanMultipleResponse),
+        )
+    schemas = PlanMultipleResponse(
+        results=list(map(create_map_plan(True, fields), plans))
     )
+    if fields.is_all:
+        return schemas
+    return json_response(schemas, fields.within("results", PlanMultipleResponse))
+
+
+@plan.get(
+    "/plan",
+    operation_id="plan_get",
+    response_model=Union[PlanMultipleResponse, NormalizedPlanMultipleResponse],
+)
+def _plan(
+    user: Annotated[User, Depends(with_current_user(False))],
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet, Depends(with_fields_param(PlanSchema, NormalizedPlanSchema))
+    ] = ALL_FIELDS,
+):
+    plans = sorted(user.plans, key=lambda p: p.config.date_start)
+    return plan_multiple_response(plans, format, fields)
 
 
 @plan.get(
-    "/plan/{plan_id}", operation_id="plan_id_get", response_model=PlanSingleResponse
+    "/plan/{plan_id}",
+    operation_id="plan_id_get",
+    response_model=Union[PlanSingleResponse, NormalizedPlanSingleResponse],
 )
 def _plan(
     plan_id: str,
     user: Annotated[Optional[User], Depends(with_current_user(True))],
     plan_query: Annotated[PlanQuery, Depends(with_plan_query())],
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet, Depends(with_fields_param(PlanSchema, NormalizedPlanSchema))
+    ] = ALL_FIELDS,
 ):
     plan: Plan = plan_query.get_by_id(plan_id)
     if plan is None or not plan.is_visible(user):
@@ -99,14 +243,22 @@ def _plan(
 
     is_editable = plan.is_editable(user)
 
-    return create_map_plan(is_editable=is_editable)(plan)
+    return plan_single_response(plan, is_editable, format, fields)
 
 
-@plan.post("/plan", operation_id="plan_post", response_model=PlanSingleResponse)
+@plan.post(
+    "/plan",
+    operation_id="plan_post",
+    response_model=Union[PlanSingleResponse, NormalizedPlanSingleResponse],
+)
 def _plan(
     body: PlanRequest,
     session: Annotated[Session, Depends(with_db_session)],
     user: Annotated[User, Depends(with_current_user(False))],
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet, Depends(with_fields_param(PlanSchema, NormalizedPlanSchema))
+    ] = ALL_FIELDS,
 ):
     date_start = body.config.date_start
     date_end = body.config.date_end
@@ -147,11 +299,13 @@ def _plan(
 
     session.flush()
 
-    return create_map_plan(is_editable=True)(plan)
+    return plan_single_response(plan, True, format, fields)
 
 
 @plan.put(
-    "/plan/{plan_id}", operation_id="plan_id_put", response_model=PlanSingleResponse
+    "/plan/{plan_id}",
+    operation_id="plan_id_put",
+    response_model=Union[PlanSingleResponse, NormalizedPlanSingleResponse],
 )
 def _plan(
     plan_id: str,
@@ -160,6 +314,10 @@ def _plan(
     user: Annotated[User, Depends(with_current_user(True))],
     world_query: Annotated[WorldQuery, Depends(with_world_query())],
     plan_query: Annotated[PlanQuery, Depends(with_plan_query())],
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet, Depends(with_fields_param(PlanSchema, NormalizedPlanSchema))
+    ] = ALL_FIELDS,
 ):
     plan: Plan = plan_query.get_by_id(plan_id)
     if plan is None or not plan.is_visible(user):
@@ -170,28 +328,39 @@ def _plan(
 
     date_start = body.config.date_start
     date_end = body.config.date_end
+
+    # Index the details by date, keeping the first detail of every date.
+    body_details: Dict[datetime.date, PlanConfigDetailSchema] = {}
+    for detail in body.config.details:
+        if date_start <= detail.date <= date_end:
+            body_details.setdefault(detail.date, detail)
+    plan_details: Dict[datetime.date, PlanConfigDetail] = {}
+    for detail in plan.config.details:
+        plan_details.setdefault(detail.date, detail)
+
+    world_destinations = world_query.get_destinations_by_type_ids(
+        (d.type, d.id) for detail in body_details.values() for d in detail.destinations
+    )
+    for detail in body_details.values():
+        for d in detail.destinations:
+            if (d.type, d.id) not in world_destinations:
+                raise error.invalid_request(f"Unknown {d.type} {d.id}")
+
     details: List[PlanConfigDetail] = []
     last_detination: Optional[PlanConfigDetailDestination] = None
     for day in range((date_end - date_start).days + 1):
         date = date_start + datetime.timedelta(day)
-        detail = next(filter(lambda d: d.date == date, body.config.details), None)
-        detail_original = next(
-            filter(lambda d: d.date == date, plan.config.details), None
-        )
+        detail = body_details.get(date)
         if detail is not None:
-            destinations = list(
-                map(
-                    lambda d: PlanConfigDetailDestination(
-                        type=d.type,
-                        id=d.id,
-                        name=world_query.get_name_by_type_id(d.type, d.id),
-                        country_iso2=world_query.get_country_iso2_by_type_id(
-                            d.type, d.id
-                        ),
-                    ),
-                    detail.destinations,
+            destinations = [
+                PlanConfigDetailDestination(
+                    type=d.type,
+                    id=d.id,
+                    name=world_destinations[(d.type, d.id)][0],
+                    country_iso2=world_destinations[(d.type, d.id)][1],
                 )
-            )
+                for d in detail.destinations
+            ]
             schedules = list(
                 map(
                     lambda s: PlanConfigDetailSchedule(
@@ -209,7 +378,7 @@ def _plan(
             if len(destinations) > 0:
                 last_detination = destinations[-1]
         else:
-            detail = next(filter(lambda d: d.date == date, plan.config.details), None)
+            detail = plan_details.get(date)
             if detail is None:
                 detail = PlanConfigDetail(
                     date=date,
@@ -217,7 +386,8 @@ def _plan(
                     schedules=[],
                 )
             if last_detination is not None:
-                detail.destinations = [last_detination]
+                # Copy, as the details of plan.config are cached on the plan.
+                detail = detail.model_copy(update={"destinations": [last_detination]})
         details.append(detail)
 
     plan = Plan(
@@ -241,18 +411,22 @@ def _plan(
     session.merge(plan)
     session.flush()
 
-    return create_map_plan(is_editable=True)(plan)
+    return plan_single_response(plan, True, format, fields)
 
 
 @plan.delete(
     "/plan/{plan_id}",
     operation_id="plan_id_delete",
-    response_model=PlanMultipleResponse,
+    response_model=Union[PlanMultipleResponse, NormalizedPlanMultipleResponse],
 )
 def _plan(
     plan_id: str,
     session: Annotated[Session, Depends(with_db_session)],
     user: Annotated[User, Depends(with_current_user(False))],
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet, Depends(with_fields_param(PlanSchema, NormalizedPlanSchema))
+    ] = ALL_FIELDS,
 ):
     plan = next(filter(lambda plan: plan.id == plan_id, user.plans), None)
     if plan is None:
@@ -264,6 +438,4 @@ def _plan(
     session.flush()
     session.expire(user)
 
-    return PlanMultipleResponse(
-        results=list(map(create_map_plan(is_editable=True), user.plans))
-    )
+    return plan_multiple_response(user.plans, format, fields)
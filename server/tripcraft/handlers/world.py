@@ -1,82 +1,578 @@
-from typing import Annotated, List, Optional
+import gzip
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
-from tripcraft.models import City, Country, Region, State, SubRegion
+from tripcraft.constants import WORLD_CACHE_CONTROL_MAX_AGE, WORLD_REVERSE_MAX_DISTANCES
+from tripcraft.handlers.error import invalid_request, not_found, not_modified
+from tripcraft.models import City, Country, Region, State, SubRegion, open_db_session
 from tripcraft.queries import WorldQuery, with_world_query
+from tripcraft.queries.base_query import LoadPlan
+from tripcraft.queries.world_cache import (
+    WorldCache,
+    build_country_schema,
+    build_normalized_country_schema,
+    build_normalized_sub_region_schema,
+    build_region_schema,
+    build_sub_region_schema,
+    with_world_cache,
+)
+from tripcraft.queries.world_query import CITY_LOAD_PLAN
+from tripcraft.queries.world_spatial import GridIndex, with_city_grid
+from tripcraft.queries.world_tree import TreeNode, WorldTree, with_world_tree
 from tripcraft.schemas import (
+    ALL_FIELDS,
+    MAX_NEARBY_LIMIT,
+    MAX_NEARBY_RADIUS,
+    MAX_SEARCH_LIMIT,
+    MAX_TREE_DEPTH,
+    WORLD_SEARCH_TYPES,
     CityResponse,
     CitySchema,
     CountryResponse,
     CountrySchema,
+    FieldSet,
+    Locale,
+    NearbyCityResponse,
+    NearbyCitySchema,
+    NormalizedCityResponse,
+    NormalizedCitySchema,
+    NormalizedCountryResponse,
+    NormalizedCountrySchema,
+    NormalizedNearbyCityResponse,
+    NormalizedNearbyCitySchema,
+    NormalizedReverseGeocodeMultipleResponse,
+    NormalizedReverseGeocodeResponse,
+    NormalizedStateResponse,
+    NormalizedStateSchema,
+    NormalizedWorldSearchResponse,
+    NormalizedWorldSearchSchema,
     Pagination,
     PaginationParams,
     RegionResponse,
-    RegionSchema,
+    ResponseFormat,
+    ReverseGeocodeMultipleResponse,
+    ReverseGeocodeRequest,
+    ReverseGeocodeResponse,
     StateResponse,
     StateSchema,
     SubRegionResponse,
-    SubRegionSchema,
+    WorldIncludedSchema,
+    WorldSearchResponse,
+    WorldSearchSchema,
+    WorldSearchType,
+    WorldTreeResponse,
+    build_sparse,
+    paginated_response_json,
+    select_locale,
+    with_fields_param,
+    with_ids_param,
     with_pagination_params,
+    with_search_types_param,
+    with_tree_root_param,
+)
+from tripcraft.utils import (
+    accepts_gzip,
+    etag_matches,
+    gzip_etag,
+    make_etag,
+    to_chinese_simplified_many,
 )
+from tripcraft.utils.export import csv_columns, encode_csv, encode_ndjson, gzip_chunks
 
-world = APIRouter(tags=["world"])
+WorldKind = Literal["country", "state", "city"]
 
 
-def map_region(region: Region) -> RegionSchema:
-    return RegionSchema(
-        id=region.id,
-        name=region.translations,
-    )
+def with_world_etag():
+    """
+    with_world_etag tags GET responses with an ETag of the world version and the
+    query parameters. A matching If-None-Match is answered with 304 before the
+    handler runs, and the world version is cached, so no query is made.
+    """
 
+    def depend_etag(
+        request: Request,
+        response: Response,
+        world_cache: Annotated[WorldCache, Depends(with_world_cache())],
+    ):
+        if request.method not in ("GET", "HEAD"):
+            return
 
-def map_sub_region(sub_region: SubRegion) -> SubRegionSchema:
-    return SubRegionSchema(
-        id=sub_region.id,
-        name=sub_region.translations,
-        region=map_region(sub_region.region),
-    )
+        etag = make_etag(world_cache.version, request)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={WORLD_CACHE_CONTROL_MAX_AGE}",
+        }
+        if_none_match = request.headers.get("If-None-Match")
+        if etag_matches(if_none_match, etag):
+            raise not_modified(headers)
+        # Responses compressed by their handler are tagged with gzip_etag.
+        if accepts_gzip(request) and etag_matches(if_none_match, gzip_etag(etag)):
+            raise not_modified({**headers, "ETag": gzip_etag(etag)})
+        response.headers.update(headers)
 
+    return depend_etag
 
-def map_country(country: Country) -> CountrySchema:
-    return CountrySchema(
-        id=country.id,
-        name=country.translations,
-        iso3=country.iso3,
-        iso2=country.iso2,
-        latitude=country.latitude,
-        longitude=country.longitude,
-        emoji=country.emoji,
-        region=map_region(country.region) if country.region is not None else None,
-        sub_region=(
-            map_sub_region(country.sub_region)
-            if country.sub_region is not None
-            else None
-        ),
-    )
+
+def json_response(content: bytes, response: Response) -> Response:
+    """
+    json_response returns pre-serialized JSON. FastAPI only copies the headers
+    set by dependencies onto responses it builds, so they are copied here.
+    """
+    json_ = Response(content=content, media_type="application/json")
+    json_.raw_headers.extend(response.raw_headers)
+    return json_
 
 
-def map_state(state: State) -> StateSchema:
-    return StateSchema(
-        id=state.id,
-        name=state.translations,
-        latitude=state.latitude,
-        longitude=state.longitude,
-        country=map_country(state.country),
+def model_response(
+    content: BaseModel, response: Response, fields: FieldSet = ALL_FIELDS
+) -> Response:
+    """
+    model_response serializes a response schema trimmed to fields, without
+    validating it again against the union of its response models.
+    """
+    return json_response(
+        content.model_dump_json(
+            by_alias=True, include=fields.include(content)
+        ).encode(),
+        response,
     )
 
 
-def map_city(city: City) -> CitySchema:
-    return CitySchema(
-        id=city.id,
-        name=city.translations,
-        latitude=city.latitude,
-        longitude=city.longitude,
-        country=map_country(city.country),
-        state=map_state(city.state),
+world = APIRouter(tags=["world"], dependencies=[Depends(with_world_etag())])
+
+
+def create_map_country(world_cache: WorldCache, locale: Optional[Locale] = None):
+    def map_country(country_id: int, country: Callable[[], Country]) -> CountrySchema:
+        schema = world_cache.country(country_id, locale)
+        if schema is None:
+            schema = build_country_schema(country(), locale)
+        return schema
+
+    return map_country
+
+
+def country_of(world_query: WorldQuery, row: Union[State, City]) -> Country:
+    """
+    country_of returns the country of a state or city missing from the world
+    cache. Rows from the WorldFile are transient, with no country loaded, so
+    their country is queried by id.
+    """
+    country = row.country
+    if country is None:
+        country = world_query.country.get_by_id(row.country_id)
+    return country
+
+
+def create_map_state(
+    world_query: WorldQuery,
+    world_cache: WorldCache,
+    locale: Optional[Locale] = None,
+    fields: FieldSet = ALL_FIELDS,
+):
+    map_country = create_map_country(world_cache, locale)
+    name_locale = select_locale(fields.get("name"), locale)
+
+    def map_state(state: State) -> StateSchema:
+        return build_sparse(
+            StateSchema,
+            fields,
+            id=lambda: state.id,
+            name=lambda: state.get_translations(name_locale),
+            latitude=lambda: state.latitude,
+            longitude=lambda: state.longitude,
+            country=lambda: map_country(
+                state.country_id, lambda: country_of(world_query, state)
+            ),
+        )
+
+    return map_state
+
+
+def create_map_city(
+    world_query: WorldQuery,
+    world_cache: WorldCache,
+    locale: Optional[Locale] = None,
+    fields: FieldSet = ALL_FIELDS,
+):
+    map_country = create_map_country(world_cache, locale)
+    map_state = create_map_state(world_query, world_cache, locale, fields.get("state"))
+    name_locale = select_locale(fields.get("name"), locale)
+
+    def map_city(city: City) -> CitySchema:
+        return build_sparse(
+            CitySchema,
+            fields,
+            id=lambda: city.id,
+            name=lambda: city.get_translations(name_locale),
+            latitude=lambda: city.latitude,
+            longitude=lambda: city.longitude,
+            country=lambda: map_country(
+                city.country_id, lambda: country_of(world_query, city)
+            ),
+            state=lambda: map_state(city.state),
+        )
+
+    return map_city
+
+
+def city_load_plan(fields: FieldSet) -> LoadPlan:
+    """
+    city_load_plan only loads the states of cities when they are selected.
+    """
+    return CITY_LOAD_PLAN if fields.has("state") else ()
+
+
+def normalized_city_load_plan(fields: FieldSet) -> LoadPlan:
+    """
+    normalized_city_load_plan only loads the states of normalized cities when
+    they are referenced, as only then are they included.
+    """
+    return CITY_LOAD_PLAN if fields.has("state_id") else ()
+
+
+def world_load_plan(
+    kind: WorldKind, format: ResponseFormat, fields: FieldSet = ALL_FIELDS
+) -> LoadPlan:
+    """
+    world_load_plan returns the relationships to load with rows of kind for the
+    schemas of format.
+    """
+    if kind != "city":
+        return ()
+    if format == "normalized":
+        return normalized_city_load_plan(fields)
+    return city_load_plan(fields)
+
+
+def create_map_normalized_country(
+    world_cache: WorldCache, locale: Optional[Locale] = None
+):
+    def map_country(
+        country_id: int, country: Callable[[], Country]
+    ) -> NormalizedCountrySchema:
+        schema = world_cache.normalized_country(country_id, locale)
+        if schema is None:
+            schema = build_normalized_country_schema(country(), locale)
+        return schema
+
+    return map_country
+
+
+def create_map_normalized_state(
+    locale: Optional[Locale] = None, fields: FieldSet = ALL_FIELDS
+):
+    name_locale = select_locale(fields.get("name"), locale)
+
+    def map_state(state: State) -> NormalizedStateSchema:
+        return build_sparse(
+            NormalizedStateSchema,
+            fields,
+            id=lambda: state.id,
+            name=lambda: state.get_translations(name_locale),
+            latitude=lambda: state.latitude,
+            longitude=lambda: state.longitude,
+            country_id=lambda: state.country_id,
+        )
+
+    return map_state
+
+
+def create_map_normalized_city(
+    locale: Optional[Locale] = None, fields: FieldSet = ALL_FIELDS
+):
+    name_locale = select_locale(fields.get("name"), locale)
+
+    def map_city(city: City) -> NormalizedCitySchema:
+        return build_sparse(
+            NormalizedCitySchema,
+            fields,
+            id=lambda: city.id,
+            name=lambda: city.get_translations(name_locale),
+            latitude=lambda: city.latitude,
+            longitude=lambda: city.longitude,
+            country_id=lambda: city.country_id,
+            state_id=lambda: city.state_id,
+        )
+
+    return map_city
+
+
+class WorldIncluded:
+    """
+    WorldIncluded collects the parents referenced by the results of a normalized
+    response, each of them once, along with the parents of those parents.
+    """
+
+    def __init__(
+        self,
+        world_query: WorldQuery,
+        world_cache: WorldCache,
+        locale: Optional[Locale] = None,
+    ):
+        self._world_query = world_query
+        self._world_cache = world_cache
+        self._locale = locale
+        self._map_country = create_map_normalized_country(world_cache, locale)
+        self._map_state = create_map_normalized_state(locale)
+        self.schema = WorldIncludedSchema(
+            region={}, sub_region={}, country={}, state={}
+        )
+
+    def _add_region(self, region_id: int, region: Callable[[], Region]):
+        if region_id in self.schema.region:
+            return
+        schema = self._world_cache.region(region_id, self._locale)
+        if schema is None:
+            schema = build_region_schema(region(), self._locale)
+        self.schema.region[region_id] = schema
+
+    def _add_sub_region(self, sub_region_id: int, sub_region: Callable[[], SubRegion]):
+        if sub_region_id in self.schema.sub_region:
+            return
+        schema = self._world_cache.normalized_sub_region(sub_region_id, self._locale)
+        if schema is None:
+            schema = build_normalized_sub_region_schema(sub_region(), self._locale)
+        self.schema.sub_region[sub_region_id] = schema
+        self._add_region(schema.region_id, lambda: sub_region().region)
+
+    def _add_country(self, country_id: int, country: Callable[[], Country]):
+        if country_id in self.schema.country:
+            return
+        self.schema.country[country_id] = self._map_country(country_id, country)
+        self.add_country_parents(country_id, country)
+
+    def _add_state(self, state: State):
+        if state.id in self.schema.state:
+            return
+        self.schema.state[state.id] = self._map_state(state)
+        self._add_country(
+            state.country_id, lambda: country_of(self._world_query, state)
+        )
+
+    def add_country_parents(
+        self,
+        country_id: int,
+        country: Callable[[], Country],
+        fields: FieldSet = ALL_FIELDS,
+    ):
+        """
+        add_country_parents adds the region and subregion of a country when the
+        fields selected of it reference them.
+        """
+        schema = self._map_country(country_id, country)
+        if schema.region_id is not None and fields.has("region_id"):
+            self._add_region(schema.region_id, lambda: country().region)
+        if schema.sub_region_id is not None and fields.has("sub_region_id"):
+            self._add_sub_region(schema.sub_region_id, lambda: country().sub_region)
+
+    def add_state_parents(self, state: State, fields: FieldSet = ALL_FIELDS):
+        """
+        add_state_parents adds the country of a state when the fields selected of
+        it reference it.
+        """
+        if fields.has("country_id"):
+            self._add_country(
+                state.country_id, lambda: country_of(self._world_query, state)
+            )
+
+    def add_city_parents(self, city: City, fields: FieldSet = ALL_FIELDS):
+        """
+        add_city_parents adds the parents of city which the fields selected of
+        it reference.
+        """
+        if fields.has("country_id"):
+            self._add_country(
+                city.country_id, lambda: country_of(self._world_query, city)
+            )
+        if fields.has("state_id"):
+            self._add_state(city.state)
+
+    def add_parents(self, kind: WorldKind, row: Any, fields: FieldSet = ALL_FIELDS):
+        """
+        add_parents adds the parents of a country, state or city of kind which
+        the fields selected of it reference.
+        """
+        if kind == "country":
+            self.add_country_parents(row.id, lambda: row, fields)
+        elif kind == "state":
+            self.add_state_parents(row, fields)
+        else:
+            self.add_city_parents(row, fields)
+
+    def json(self) -> bytes:
+        return self.schema.model_dump_json(by_alias=True).encode()
+
+
+def translate_world_names(
+    session: Optional[Session],
+    kind: WorldKind,
+    rows: Sequence[Any],
+    format: ResponseFormat,
+    locale: Optional[Locale] = None,
+    fields: FieldSet = ALL_FIELDS,
+):
+    """
+    translate_world_names translates in one batch the names without a stored
+    Chinese name of the states or cities of rows, and of the states of cities,
+    which the response selects, so that mapping the rows reads them from memory.
+    """
+    if kind == "country":
+        return
+
+    def selects_chinese(fields: FieldSet) -> bool:
+        return fields.has("name") and select_locale(fields.get("name"), locale) != "en"
+
+    named: List[Union[State, City]] = []
+    if selects_chinese(fields):
+        named.extend(rows)
+    if kind == "city":
+        if format == "normalized":
+            # The states included by normalized responses are mapped whole.
+            selects_states = fields.has("state_id") and locale != "en"
+        else:
+            selects_states = fields.has("state") and selects_chinese(
+                fields.get("state")
+            )
+        if selects_states:
+            named.extend(city.state for city in rows)
+    names = [row.name for row in named if row.zh_hans is None]
+    if len(names) > 0:
+        to_chinese_simplified_many(names, session)
+
+
+def create_map_world(
+    world_query: WorldQuery,
+    world_cache: WorldCache,
+    kind: WorldKind,
+    format: ResponseFormat,
+    locale: Optional[Locale] = None,
+    fields: FieldSet = ALL_FIELDS,
+    included: Optional[WorldIncluded] = None,
+) -> Callable[[Any], BaseModel]:
+    """
+    create_map_world maps countries, states or cities of kind to the schemas of
+    format, so that handlers query their rows once whatever the format. Given
+    included, it adds the parents which the normalized schemas reference.
+    """
+    normalized = format == "normalized"
+    if kind == "country":
+        map_country = (
+            create_map_normalized_country(world_cache, locale)
+            if normalized
+            else create_map_country(world_cache, locale)
+        )
+
+        def map_row(country: Country) -> BaseModel:
+            return map_country(country.id, lambda: country)
+
+    elif kind == "state":
+        map_row = (
+            create_map_normalized_state(locale, fields)
+            if normalized
+            else create_map_state(world_query, world_cache, locale, fields)
+        )
+    else:
+        map_row = (
+            create_map_normalized_city(locale, fields)
+            if normalized
+            else create_map_city(world_query, world_cache, locale, fields)
+        )
+    if included is None:
+        return map_row
+
+    def map_included_row(row: Any) -> BaseModel:
+        included.add_parents(kind, row, fields)
+        return map_row(row)
+
+    return map_included_row
+
+
+def world_included(
+    world_query: WorldQuery,
+    world_cache: WorldCache,
+    format: ResponseFormat,
+    locale: Optional[Locale] = None,
+) -> Optional[WorldIncluded]:
+    if format != "normalized":
+        return None
+    return WorldIncluded(world_query, world_cache, locale)
+
+
+def world_response(
+    response: Response,
+    world_query: WorldQuery,
+    world_cache: WorldCache,
+    pagination: Pagination,
+    kind: WorldKind,
+    rows: Sequence[Any],
+    format: ResponseFormat,
+    locale: Optional[Locale] = None,
+    fields: FieldSet = ALL_FIELDS,
+) -> Response:
+    """
+    world_response serializes a page of countries, states or cities of kind in
+    format from the fragments cached of each of them. The parents which the
+    rows reference are added to included whether or not their fragments were
+    cached.
+    """
+    map_row = create_map_world(world_query, world_cache, kind, format, locale, fields)
+    included = world_included(world_query, world_cache, format, locale)
+    translate_world_names(world_query.session, kind, rows, format, locale, fields)
+    fragment_kind = kind if included is None else f"normalized_{kind}"
+    results: List[bytes] = []
+    for row in rows:
+        if included is not None:
+            included.add_parents(kind, row, fields)
+        results.append(
+            world_cache.fragment(
+                fragment_kind, row.id, locale, lambda: map_row(row), fields
+            )
+        )
+    return json_response(
+        paginated_response_json(
+            pagination, results, included.json() if included is not None else None
+        ),
+        response,
     )
 
 
+def world_model_response(
+    response: Response,
+    nested: Type[BaseModel],
+    normalized: Type[BaseModel],
+    included: Optional[WorldIncluded],
+    fields: FieldSet,
+    **content: Any,
+) -> Response:
+    """
+    world_model_response wraps content in the nested response model, or in the
+    normalized one along with included, with the single field of content
+    trimmed to fields.
+    """
+    if included is None:
+        schema = nested(**content)
+    else:
+        schema = normalized(**content, included=included.schema)
+    (name,) = content
+    return model_response(schema, response, fields.within(name, type(schema)))
+
+
 @world.get(
     "/world/region",
     operation_id="world_region_get",
@@ -84,14 +580,19 @@ def map_city(city: City) -> CitySchema:
 )
 def _world_region(
     world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
     name: Annotated[Optional[str], Query(alias="name")] = None,
     id: Annotated[Optional[int], Query(alias="id")] = None,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
 ):
     if name is not None:
-        regions = world_query.region.get_by_name(name=name)
+        regions = [
+            world_cache.region(region.id, locale) or build_region_schema(region, locale)
+            for region in world_query.region.get_by_name(name=name)
+        ]
     else:
-        regions = world_query.region.get_all(region_id=id)
-    return RegionResponse(results=list(map(map_region, regions)))
+        regions = world_cache.regions(locale, region_id=id)
+    return RegionResponse(results=regions)
 
 
 @world.get(
@@ -101,40 +602,60 @@ def _world_region(
 )
 def _world_sub_region(
     world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
     name: Annotated[Optional[str], Query(alias="name")] = None,
     id: Annotated[Optional[int], Query(alias="id")] = None,
     region_id: Annotated[Optional[int], Query(alias="regionId")] = None,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
 ):
     if name is not None:
-        sub_regions = world_query.sub_region.get_by_name(name)
+        sub_regions = [
+            world_cache.sub_region(sub_region.id, locale)
+            or build_sub_region_schema(sub_region, locale)
+            for sub_region in world_query.sub_region.get_by_name(name)
+        ]
     else:
-        sub_regions = world_query.sub_region.get_all(
+        sub_regions = world_cache.sub_regions(
+            locale,
             sub_region_id=id,
             region_id=region_id,
         )
-    return SubRegionResponse(results=list(map(map_sub_region, sub_regions)))
+    return SubRegionResponse(results=sub_regions)
 
 
 @world.get(
     "/world/country",
     operation_id="world_country_get",
-    response_model=CountryResponse,
+    response_model=Union[CountryResponse, NormalizedCountryResponse],
 )
 def _world_country(
+    response: Response,
     pagination: Annotated[PaginationParams, Depends(with_pagination_params)],
     world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
     name: Annotated[Optional[str], Query(alias="name")] = None,
     id: Annotated[Optional[int], Query(alias="id")] = None,
+    ids: Annotated[Optional[List[int]], Depends(with_ids_param)] = None,
     sub_region_id: Annotated[Optional[int], Query(alias="subRegionId")] = None,
     region_id: Annotated[Optional[int], Query(alias="regionId")] = None,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet, Depends(with_fields_param(CountrySchema, NormalizedCountrySchema))
+    ] = ALL_FIELDS,
 ):
     pagination_object = Pagination.from_query_params(params=pagination)
-    if name is not None:
+    if ids is not None:
+        countries = world_query.country.get_by_ids_in_order(ids)
+        pagination_object.total_count = len(countries)
+        pagination_object.has_next_page = False
+    elif name is not None:
         countries = world_query.country.get_by_name(
             pagination=pagination_object,
             name=name,
         )
-        pagination_object.total_count = world_query.country.count_by_name(name=name)
+        if pagination_object.include_total and pagination_object.total_count is None:
+            pagination_object.total_count = world_query.country.count_by_name(name=name)
     else:
         countries = world_query.country.get_all(
             pagination=pagination_object,
@@ -142,91 +663,488 @@ def _world_country(
             sub_region_id=sub_region_id,
             region_id=region_id,
         )
-        pagination_object.total_count = world_query.country.count(
-            country_id=id,
-            sub_region_id=sub_region_id,
-            region_id=region_id,
-        )
+        if pagination_object.include_total:
+            pagination_object.total_count = world_query.country.count(
+                country_id=id,
+                sub_region_id=sub_region_id,
+                region_id=region_id,
+            )
 
-    return CountryResponse(
-        total_count=pagination_object.total_count or 0,
-        next_page_index=pagination_object.next_page_index,
-        results=list(map(map_country, countries)),
+    return world_response(
+        response,
+        world_query,
+        world_cache,
+        pagination_object,
+        "country",
+        countries,
+        format,
+        locale,
+        fields,
     )
 
 
 @world.get(
     "/world/state",
     operation_id="world_state_get",
-    response_model=StateResponse,
+    response_model=Union[StateResponse, NormalizedStateResponse],
 )
 def _world_state(
+    response: Response,
     pagination: Annotated[PaginationParams, Depends(with_pagination_params)],
     world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
     name: Annotated[Optional[str], Query(alias="name")] = None,
     id: Annotated[Optional[int], Query(alias="id")] = None,
+    ids: Annotated[Optional[List[int]], Depends(with_ids_param)] = None,
     country_id: Annotated[Optional[int], Query(alias="countryId")] = None,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet, Depends(with_fields_param(StateSchema, NormalizedStateSchema))
+    ] = ALL_FIELDS,
 ):
     pagination_object = Pagination.from_query_params(params=pagination)
-    if name is not None:
+    if ids is not None:
+        states = world_query.state.get_by_ids_in_order(ids)
+        pagination_object.total_count = len(states)
+        pagination_object.has_next_page = False
+    elif name is not None:
         states = world_query.state.get_by_name(
             pagination=pagination_object,
             name=name,
         )
-        pagination_object.total_count = world_query.state.count_by_name(name=name)
+        if pagination_object.include_total and pagination_object.total_count is None:
+            pagination_object.total_count = world_query.state.count_by_name(name=name)
     else:
         states = world_query.state.get_all(
             pagination=pagination_object,
             state_id=id,
             country_id=country_id,
         )
-        pagination_object.total_count = world_query.state.count(
-            state_id=id,
-            country_id=country_id,
-        )
+        if pagination_object.include_total:
+            pagination_object.total_count = world_query.state.count(
+                state_id=id,
+                country_id=country_id,
+            )
 
-    return StateResponse(
-        total_count=pagination_object.total_count or 0,
-        next_page_index=pagination_object.next_page_index,
-        results=list(map(map_state, states)),
+    return world_response(
+        response,
+        world_query,
+        world_cache,
+        pagination_object,
+        "state",
+        states,
+        format,
+        locale,
+        fields,
     )
 
 
 @world.get(
     "/world/city",
     operation_id="world_city_get",
-    response_model=CityResponse,
+    response_model=Union[CityResponse, NormalizedCityResponse],
 )
 def _world_city(
+    response: Response,
     pagination: Annotated[PaginationParams, Depends(with_pagination_params)],
     world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
     name: Annotated[Optional[str], Query(alias="name")] = None,
     id: Annotated[Optional[int], Query(alias="id")] = None,
+    ids: Annotated[Optional[List[int]], Depends(with_ids_param)] = None,
     state_id: Annotated[Optional[int], Query(alias="stateId")] = None,
     country_id: Annotated[Optional[int], Query(alias="countryId")] = None,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet, Depends(with_fields_param(CitySchema, NormalizedCitySchema))
+    ] = ALL_FIELDS,
 ):
+    load_plan = world_load_plan("city", format, fields)
     pagination_object = Pagination.from_query_params(params=pagination)
-    if name is not None:
+    if ids is not None:
+        cities = world_query.city.get_by_ids_in_order(
+            ids,
+            load_plan=load_plan,
+        )
+        pagination_object.total_count = len(cities)
+        pagination_object.has_next_page = False
+    elif name is not None:
         cities = world_query.city.get_by_name(
             pagination=pagination_object,
             name=name,
+            load_plan=load_plan,
         )
-        pagination_object.total_count = world_query.city.count_by_name(name=name)
+        if pagination_object.include_total and pagination_object.total_count is None:
+            pagination_object.total_count = world_query.city.count_by_name(name=name)
     else:
         cities = world_query.city.get_all(
             pagination=pagination_object,
             city_id=id,
             state_id=state_id,
             country_id=country_id,
+            load_plan=load_plan,
         )
-        pagination_object.total_count = world_query.city.count(
-            city_id=id,
-            state_id=state_id,
-            country_id=country_id,
+        if pagination_object.include_total:
+            pagination_object.total_count = world_query.city.count(
+                city_id=id,
+                state_id=state_id,
+                country_id=country_id,
+            )
+
+    return world_response(
+        response,
+        world_query,
+        world_cache,
+        pagination_object,
+        "city",
+        cities,
+        format,
+        locale,
+        fields,
+    )
+
+
+@world.get(
+    "/world/city/nearby",
+    operation_id="world_city_nearby_get",
+    response_model=Union[NearbyCityResponse, NormalizedNearbyCityResponse],
+)
+def _world_city_nearby(
+    response: Response,
+    world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
+    city_grid: Annotated[GridIndex, Depends(with_city_grid())],
+    lat: Annotated[float, Query(alias="lat", ge=-90, le=90)],
+    lng: Annotated[float, Query(alias="lng", ge=-180, le=180)],
+    radius: Annotated[float, Query(alias="radius", gt=0, le=MAX_NEARBY_RADIUS)] = 50,
+    limit: Annotated[int, Query(alias="limit", ge=1, le=MAX_NEARBY_LIMIT)] = 10,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet,
+        Depends(with_fields_param(NearbyCitySchema, NormalizedNearbyCitySchema)),
+    ] = ALL_FIELDS,
+):
+    distances = {
+        id_: distance for distance, id_ in city_grid.nearby(lat, lng, radius, limit)
+    }
+    city_fields = fields.get("city")
+    cities = world_query.city.get_by_ids_in_order(
+        list(distances.keys()),
+        load_plan=world_load_plan("city", format, city_fields),
+    )
+    translate_world_names(
+        world_query.session, "city", cities, format, locale, city_fields
+    )
+    included = world_included(world_query, world_cache, format, locale)
+    map_city = create_map_world(
+        world_query, world_cache, "city", format, locale, city_fields, included
+    )
+    nearby_city = NearbyCitySchema if included is None else NormalizedNearbyCitySchema
+    return world_model_response(
+        response,
+        NearbyCityResponse,
+        NormalizedNearbyCityResponse,
+        included,
+        fields,
+        results=[
+            build_sparse(
+                nearby_city,
+                fields,
+                distance=lambda: distances[city.id],
+                city=lambda: map_city(city),
+            )
+            for city in cities
+        ],
+    )
+
+
+@world.get(
+    "/world/search",
+    operation_id="world_search_get",
+    response_model=Union[WorldSearchResponse, NormalizedWorldSearchResponse],
+)
+def _world_search(
+    response: Response,
+    world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
+    q: Annotated[str, Query(alias="q", min_length=1)],
+    types: Annotated[List[WorldSearchType], Depends(with_search_types_param)],
+    limit: Annotated[int, Query(alias="limit", ge=1, le=MAX_SEARCH_LIMIT)] = 5,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet,
+        Depends(with_fields_param(WorldSearchSchema, NormalizedWorldSearchSchema)),
+    ] = ALL_FIELDS,
+):
+    """
+    _world_search searches every requested type at once, returning up to limit
+    results of each type ranked together by score.
+    """
+    included = world_included(world_query, world_cache, format, locale)
+    search_result = (
+        WorldSearchSchema if included is None else NormalizedWorldSearchSchema
+    )
+    results: List[BaseModel] = []
+    for kind in WORLD_SEARCH_TYPES:
+        if kind not in types:
+            continue
+        kind_fields = fields.get(kind)
+        map_row = create_map_world(
+            world_query, world_cache, kind, format, locale, kind_fields, included
+        )
+        ranked = getattr(world_query, kind).get_ranked_by_name(
+            q, limit, load_plan=world_load_plan(kind, format, kind_fields)
+        )
+        if fields.has(kind):
+            translate_world_names(
+                world_query.session,
+                kind,
+                [row for _, row in ranked],
+                format,
+                locale,
+                kind_fields,
+            )
+        results.extend(
+            search_result(
+                type=kind,
+                score=score,
+                **{kind: map_row(row) if fields.has(kind) else None},
+            )
+            for score, row in ranked
+        )
+    results.sort(key=lambda result: result.score, reverse=True)
+    return world_model_response(
+        response,
+        WorldSearchResponse,
+        NormalizedWorldSearchResponse,
+        included,
+        fields,
+        results=results,
+    )
+
+
+@world.get(
+    "/world/tree",
+    operation_id="world_tree_get",
+    response_model=WorldTreeResponse,
+)
+def _world_tree(
+    request: Request,
+    response: Response,
+    world_tree: Annotated[WorldTree, Depends(with_world_tree())],
+    root: Annotated[Optional[TreeNode], Depends(with_tree_root_param)] = None,
+    depth: Annotated[int, Query(alias="depth", ge=1, le=MAX_TREE_DEPTH)] = 1,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+):
+    if root is not None and not world_tree.has(root):
+        raise not_found()
+
+    compressed = world_tree.subtree(root, depth, locale)
+    response.headers["Vary"] = "Accept-Encoding"
+    if accepts_gzip(request):
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["ETag"] = gzip_etag(response.headers["ETag"])
+        tree = Response(content=compressed, media_type="application/json")
+    else:
+        tree = Response(
+            content=gzip.decompress(compressed), media_type="application/json"
         )
+    tree.raw_headers.extend(response.raw_headers)
+    return tree
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@world.get(
+    "/world/{type}/export",
+    operation_id="world_export_get",
+    response_class=StreamingResponse,
+)
+def _world_export(
+    request: Request,
+    response: Response,
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
+    type: Annotated[Literal["state", "city"], Path(alias="type")],
+    format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    state_id: Annotated[Optional[int], Query(alias="stateId")] = None,
+    country_id: Annotated[Optional[int], Query(alias="countryId")] = None,
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+):
+    """
+    _world_export streams every state or city matching the filters. The request
+    session is closed before a streaming body is sent, so the rows are read
+    through a server-side cursor of a session owned by the stream.
+    """
+
+    def export_schemas() -> Iterator[Sequence[BaseModel]]:
+        with open_db_session(read_write=False) as session:
+            world_query = WorldQuery(session)
+            if type == "state":
+                map_state = create_map_state(world_query, world_cache, locale)
+                for states in world_query.state.get_all_in_chunks(
+                    state_id=state_id,
+                    country_id=country_id,
+                ):
+                    # The session is read only, so translations are stored on
+                    # connections of their own.
+                    translate_world_names(None, "state", states, "nested", locale)
+                    yield [map_state(state) for state in states]
+            else:
+                map_city = create_map_city(world_query, world_cache, locale)
+                for cities in world_query.city.get_all_in_chunks(
+                    state_id=state_id,
+                    country_id=country_id,
+                    load_plan=CITY_LOAD_PLAN,
+                ):
+                    translate_world_names(None, "city", cities, "nested", locale)
+                    yield [map_city(city) for city in cities]
+
+    if format == "csv":
+        schema = StateSchema if type == "state" else CitySchema
+        chunks = encode_csv(csv_columns(schema), export_schemas())
+    else:
+        chunks = encode_ndjson(export_schemas())
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{type}.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = gzip_etag(response.headers["ETag"])
+
+    response.headers.update(headers)
+    streaming = StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[format])
+    streaming.raw_headers.extend(response.raw_headers)
+    return streaming
+
 
-    return CityResponse(
-        total_count=pagination_object.total_count or 0,
-        next_page_index=pagination_object.next_page_index,
-        results=list(map(map_city, cities)),
+def create_reverse_geocode(
+    world_query: WorldQuery,
+    world_cache: WorldCache,
+    city_grid: GridIndex,
+    format: ResponseFormat,
+    locale: Optional[Locale] = None,
+    fields: FieldSet = ALL_FIELDS,
+    included: Optional[WorldIncluded] = None,
+):
+    """
+    create_reverse_geocode maps every nearest city once to the schema of format,
+    and builds the result of every point.
+    """
+    map_city = create_map_world(
+        world_query, world_cache, "city", format, locale, fields, included
+    )
+    nearby_city = NearbyCitySchema if included is None else NormalizedNearbyCitySchema
+
+    def reverse_geocode(points: Sequence[Tuple[float, float]]) -> List[Any]:
+        try:
+            nearest = city_grid.nearest_many(points, WORLD_REVERSE_MAX_DISTANCES)
+        except ValueError:
+            raise invalid_request("Too many points far from every city")
+        found_cities = world_query.city.get_by_ids(
+            list({id_ for _, id_ in filter(None, nearest)}),
+            load_plan=world_load_plan("city", format, fields),
+        )
+        translate_world_names(
+            world_query.session, "city", found_cities, format, locale, fields
+        )
+        cities = {city.id: map_city(city) for city in found_cities}
+        results: List[Any] = []
+        for found in nearest:
+            city = cities.get(found[1]) if found is not None else None
+            results.append(
+                nearby_city(distance=found[0], city=city) if city is not None else None
+            )
+        return results
+
+    return reverse_geocode
+
+
+@world.get(
+    "/world/reverse",
+    operation_id="world_reverse_get",
+    response_model=Union[ReverseGeocodeResponse, NormalizedReverseGeocodeResponse],
+)
+def _world_reverse(
+    response: Response,
+    world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
+    city_grid: Annotated[GridIndex, Depends(with_city_grid())],
+    lat: Annotated[float, Query(alias="lat", ge=-90, le=90)],
+    lng: Annotated[float, Query(alias="lng", ge=-180, le=180)],
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet,
+        Depends(with_fields_param(NearbyCitySchema, NormalizedNearbyCitySchema)),
+    ] = ALL_FIELDS,
+):
+    included = world_included(world_query, world_cache, format, locale)
+    reverse_geocode = create_reverse_geocode(
+        world_query,
+        world_cache,
+        city_grid,
+        format,
+        locale,
+        fields.get("city"),
+        included,
+    )
+    return world_model_response(
+        response,
+        ReverseGeocodeResponse,
+        NormalizedReverseGeocodeResponse,
+        included,
+        fields,
+        result=reverse_geocode([(lat, lng)])[0],
+    )
+
+
+@world.post(
+    "/world/reverse",
+    operation_id="world_reverse_post",
+    response_model=Union[
+        ReverseGeocodeMultipleResponse, NormalizedReverseGeocodeMultipleResponse
+    ],
+)
+def _world_reverse_batch(
+    body: ReverseGeocodeRequest,
+    response: Response,
+    world_query: Annotated[WorldQuery, Depends(with_world_query())],
+    world_cache: Annotated[WorldCache, Depends(with_world_cache())],
+    city_grid: Annotated[GridIndex, Depends(with_city_grid())],
+    locale: Annotated[Optional[Locale], Query(alias="locale")] = None,
+    format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    fields: Annotated[
+        FieldSet,
+        Depends(with_fields_param(NearbyCitySchema, NormalizedNearbyCitySchema)),
+    ] = ALL_FIELDS,
+):
+    points = [(point.lat, point.lng) for point in body.points]
+    included = world_included(world_query, world_cache, format, locale)
+    reverse_geocode = create_reverse_geocode(
+        world_query,
+        world_cache,
+        city_grid,
+        format,
+        locale,
+        fields.get("city"),
+        included,
+    )
+    return world_model_response(
+        response,
+        ReverseGeocodeMultipleResponse,
+        NormalizedReverseGeocodeMultipleResponse,
+        included,
+        fields,
+        results=reverse_geocode(points),
     )
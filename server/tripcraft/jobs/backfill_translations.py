@@ -0,0 +1,125 @@
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Type, Union
+
+import sqlalchemy as sa
+
+from tripcraft.constants import LOG_LEVEL
+from tripcraft.logging import SlogFormatter, slog
+from tripcraft.models import City, State, open_db_session
+from tripcraft.queries.world_cache import bump_world_version
+from tripcraft.utils.translate import convert_many, to_chinese_simplified
+
+logger = logging.getLogger(__name__)
+
+MODELS = {
+    "states": State,
+    "cities": City,
+}
+
+
+def translate_name(name: str) -> Optional[str]:
+    try:
+        return to_chinese_simplified(name)
+    except Exception:
+        logger.exception("failed to translate", extra=slog(name=name))
+        return None
+
+
+def backfill(
+    model: Type[Union[State, City]],
+    chunk_size: int,
+    concurrency: int,
+):
+    """
+    backfill walks the rows without stored translations in id order, one chunk
+    per transaction, so an interrupted run resumes from where it stopped.
+    Rows that fail to translate are left empty and retried on the next run.
+    """
+    with open_db_session(read_write=False) as session:
+        remaining = session.execute(
+            sa.select(sa.func.count()).select_from(model).where(model.zh_hans.is_(None))
+        ).scalar_one()
+
+    logger.info(
+        "start backfilling translations",
+        extra=slog(table=model.__tablename__, remaining=remaining),
+    )
+
+    last_id = 0
+    done = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            with open_db_session() as session:
+                rows = session.execute(
+                    sa.select(model.id, model.name)
+                    .where(model.zh_hans.is_(None))
+                    .where(model.id > last_id)
+                    .order_by(model.id)
+                    .limit(chunk_size)
+                ).all()
+                if len(rows) == 0:
+                    break
+
+                translated = [
+                    (row, zh_hans)
+                    for row, zh_hans in zip(
+                        rows, executor.map(translate_name, [r.name for r in rows])
+                    )
+                    if zh_hans is not None
+                ]
+                zh_hants = convert_many([zh_hans for _, zh_hans in translated])
+                values = [
+                    {"id": row.id, "zh_hans": zh_hans, "zh_hant": zh_hant}
+                    for (row, zh_hans), zh_hant in zip(translated, zh_hants)
+                ]
+                if len(values) > 0:
+                    session.execute(sa.update(model), values)
+
+            last_id = rows[-1].id
+            done += len(rows)
+            logger.info(
+                "backfilled translations",
+                extra=slog(
+                    table=model.__tablename__,
+                    done=done,
+                    remaining=remaining,
+                    last_id=last_id,
+                ),
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Store zh-Hans and zh-Hant names of states and cities"
+    )
+    parser.add_argument(
+        "--table",
+        dest="tables",
+        action="append",
+        choices=list(MODELS.keys()),
+    )
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        SlogFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    logging.basicConfig(handlers=[stream_handler], level=LOG_LEVEL)
+
+    for table in args.tables or list(MODELS.keys()):
+        backfill(
+            MODELS[table],
+            chunk_size=args.chunk_size,
+            concurrency=args.concurrency,
+        )
+
+    with open_db_session() as session:
+        bump_world_version(session)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import logging
+
+from tripcraft.constants import LOG_LEVEL, WORLD_FILE_PATH
+from tripcraft.logging import SlogFormatter, slog
+from tripcraft.models import open_db_session
+from tripcraft.queries.world_file import write_world_file
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write the states and cities tables to a memory-mapped world file"
+    )
+    parser.add_argument("--output", default=WORLD_FILE_PATH)
+    args = parser.parse_args()
+    if not args.output:
+        parser.error("--output is required when WORLD_FILE_PATH is unset")
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        SlogFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    logging.basicConfig(handlers=[stream_handler], level=LOG_LEVEL)
+
+    with open_db_session(read_write=False) as session:
+        version = write_world_file(session, args.output)
+
+    logger.info("built world file", extra=slog(path=args.output, version=version))
+
+
+if __name__ == "__main__":
+    main()
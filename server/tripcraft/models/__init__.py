@@ -3,8 +3,10 @@ from .auth import Auth
 from .base import Base
 from .plan import Plan, PlanConfig
 from .plan_user import PlanUser, PlanUserRole
+from .translation import CachedTranslation
 from .user import User
 from .world import City, Country, Region, State, SubRegion
+from .world_metadata import WORLD_VERSION_KEY, WorldMetadata
 
 __all__ = [
     "create_app_engine",
@@ -18,8 +20,11 @@ __all__ = [
     "Country",
     "State",
     "City",
+    "WORLD_VERSION_KEY",
+    "WorldMetadata",
     "Plan",
     "PlanConfig",
     "PlanUser",
     "PlanUserRole",
+    "CachedTranslation",
 ]
@@ -10,10 +10,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from tripcraft.models.base import Base, TimestampMixin
 from tripcraft.schemas.world import Translations
-from tripcraft.utils.translate import (
-    chinese_simplified_to_traditional,
-    to_chinese_simplified,
-)
+from tripcraft.utils.translate import convert_many, to_chinese_simplified_many
 
 from .plan_user import PlanUser, PlanUserRole
 from .user import User
@@ -45,19 +42,25 @@ class PlanConfigDetail(BaseModel):
 
     @property
     def destination_holidays(self) -> Dict[str, Translations]:
-        result = {}
+        holiday_names: Dict[str, str] = {}
         for destination in self.destinations:
             destination_holidays = holidays.country_holidays(destination.country_iso2)
             holiday = destination_holidays.get(self.date, None)
             if holiday is not None:
-                en = holiday
-                zh_hans = to_chinese_simplified(en)
-                zh_hant = chinese_simplified_to_traditional(zh_hans)
-                result[destination.country_iso2] = Translations(
-                    en=en,
-                    zh_hans=zh_hans,
-                    zh_hant=zh_hant,
-                )
+                holiday_names[destination.country_iso2] = holiday
+
+        zh_hans_names = to_chinese_simplified_many(list(holiday_names.values()))
+        zh_hant_names = convert_many(zh_hans_names)
+
+        result = {}
+        for (country_iso2, en), zh_hans, zh_hant in zip(
+            holiday_names.items(), zh_hans_names, zh_hant_names
+        ):
+            result[country_iso2] = Translations(
+                en=en,
+                zh_hans=zh_hans,
+                zh_hant=zh_hant,
+            )
 
         return result
 
@@ -88,11 +91,29 @@ class Plan(Base, TimestampMixin):
 
     @property
     def config(self) -> PlanConfig:
-        return PlanConfig.model_validate_json(self._config)
+        """
+        config is parsed at most once per loaded value of the config column.
+        The parsed config remembers the raw value it was built from, so it is
+        parsed again once the setter runs or the row is reloaded.
+        """
+        raw = self._config
+        parsed = getattr(self, "_config_parsed", None)
+        if parsed is None or parsed[0] is not raw:
+            # Plans written before the column held objects hold JSON strings.
+            config = (
+                PlanConfig.model_validate_json(raw)
+                if isinstance(raw, str)
+                else PlanConfig.model_validate(raw)
+            )
+            parsed = (raw, config)
+            self._config_parsed = parsed
+        return parsed[1]
 
     @config.setter
     def config(self, value: PlanConfig):
-        self._config = value.model_dump_json()
+        raw = value.model_dump(mode="json")
+        self._config = raw
+        self._config_parsed = (raw, value)
 
     def is_visible(self, user: Optional[User]) -> bool:
         return self.public_visibility or user is not None
@@ -0,0 +1,12 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from tripcraft.models.base import Base, TimestampMixin
+
+
+class CachedTranslation(Base, TimestampMixin):
+    __tablename__ = "translation_cache"
+
+    source: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    locale: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    translation: Mapped[str] = mapped_column(sa.Text, nullable=False)
@@ -1,17 +1,70 @@
 import json
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship
 
-from tripcraft.schemas import Translations
-from tripcraft.utils import chinese_simplified_to_traditional, to_chinese_simplified
+from tripcraft.schemas import Locale, Translations
+from tripcraft.utils.translate import (
+    chinese_simplified_to_traditional,
+    to_chinese_simplified,
+)
 
 Base = declarative_base()
 
+_parsed_translations: Dict[Tuple[str, int], Tuple[str, str, Translations]] = {}
+"""
+_parsed_translations is shared by all sessions and keyed by table name and
+primary key. Entries remember the name and raw JSON they were built from, so a
+changed row is parsed again.
+"""
+
+
+class JSONTranslationsMixin:
+    """
+    JSONTranslationsMixin parses the translations JSON column of the small,
+    static world tables at most once per row and process.
+    """
+
+    __translations_key__: str
+
+    def _get_parsed_translations(self) -> Translations:
+        name = self.name
+        raw = self._translations
+        parsed = getattr(self, "_translations_parsed", None)
+        if parsed is None or parsed[0] != name or parsed[1] != raw:
+            key = (self.__tablename__, self.id)
+            parsed = _parsed_translations.get(key)
+            if parsed is None or parsed[0] != name or parsed[1] != raw:
+                parsed = (name, raw, self._parse_translations())
+                _parsed_translations[key] = parsed
+            self._translations_parsed = parsed
+        return parsed[2]
+
+    def _parse_translations(self) -> Translations:
+        translations = json.loads(self._translations)
+        key = self.__translations_key__
+        return Translations(
+            en=self.name,
+            zh_hans=translations[key] if key in translations else self.name,
+            zh_hant=(
+                chinese_simplified_to_traditional(translations[key])
+                if key in translations
+                else self.name
+            ),
+        )
+
+    @property
+    def translations(self) -> Translations:
+        return self._get_parsed_translations()
 
-class Region(Base):
+    def get_translations(self, locale: Optional[Locale] = None) -> Translations:
+        return self._get_parsed_translations().localize(locale)
+
+
+class Region(Base, JSONTranslationsMixin):
     __tablename__ = "regions"
+    __translations_key__ = "cn"
 
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
     name: Mapped[str] = mapped_column(sa.Text, nullable=False)
@@ -23,26 +76,10 @@ class Region(Base):
         "translations", sa.Text, nullable=False, unique=True
     )
 
-    @property
-    def translations(self) -> Translations:
-        translations = json.loads(self._translations)
-        en = self.name
-        zh_hans = translations["cn"] if "cn" in translations else self.name
-        zh_hant = (
-            chinese_simplified_to_traditional(translations["cn"])
-            if "cn" in translations
-            else self.name
-        )
-
-        return Translations(
-            en=en,
-            zh_hans=zh_hans,
-            zh_hant=zh_hant,
-        )
-
 
-class SubRegion(Base):
+class SubRegion(Base, JSONTranslationsMixin):
     __tablename__ = "subregions"
+    __translations_key__ = "chinese"
 
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
     name: Mapped[str] = mapped_column(sa.Text, nullable=False)
@@ -58,26 +95,10 @@ class SubRegion(Base):
         "translations", sa.Text, nullable=False, unique=True
     )
 
-    @property
-    def translations(self) -> Translations:
-        translations = json.loads(self._translations)
-        en = self.name
-        zh_hans = translations["chinese"] if "chinese" in translations else self.name
-        zh_hant = (
-            chinese_simplified_to_traditional(translations["chinese"])
-            if "chinese" in translations
-            else self.name
-        )
-
-        return Translations(
-            en=en,
-            zh_hans=zh_hans,
-            zh_hant=zh_hant,
-        )
 
-
-class Country(Base):
+class Country(Base, JSONTranslationsMixin):
     __tablename__ = "countries"
+    __translations_key__ = "cn"
 
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
     name: Mapped[str] = mapped_column(sa.Text, nullable=False)
@@ -106,23 +127,6 @@ class Country(Base):
         "translations", sa.Text, nullable=False, unique=True
     )
 
-    @property
-    def translations(self) -> Translations:
-        translations = json.loads(self._translations)
-        en = self.name
-        zh_hans = translations["cn"] if "cn" in translations else self.name
-        zh_hant = (
-            chinese_simplified_to_traditional(translations["cn"])
-            if "cn" in translations
-            else self.name
-        )
-
-        return Translations(
-            en=en,
-            zh_hans=zh_hans,
-            zh_hant=zh_hant,
-        )
-
 
 class State(Base):
     __tablename__ = "states"
@@ -131,6 +135,8 @@ class State(Base):
     name: Mapped[str] = mapped_column(sa.Text, nullable=False)
     latitude: Mapped[float] = mapped_column(sa.Numeric, nullable=True)
     longitude: Mapped[float] = mapped_column(sa.Numeric, nullable=True)
+    zh_hans: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
+    zh_hant: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
 
     country_id: Mapped[int] = mapped_column(sa.ForeignKey("countries.id"), index=True)
 
@@ -141,12 +147,22 @@ class State(Base):
 
     @property
     def translations(self) -> Translations:
-        en = self.name
-        zh_hans = to_chinese_simplified(en)
-        zh_hant = chinese_simplified_to_traditional(zh_hans)
-
-        return Translations(
-            en=en,
+        return self.get_translations()
+
+    def get_translations(self, locale: Optional[Locale] = None) -> Translations:
+        def zh_hans() -> str:
+            if self.zh_hans is not None:
+                return self.zh_hans
+            return to_chinese_simplified(self.name)
+
+        def zh_hant() -> str:
+            if self.zh_hant is not None:
+                return self.zh_hant
+            return chinese_simplified_to_traditional(zh_hans())
+
+        return Translations.localized(
+            locale,
+            en=lambda: self.name,
             zh_hans=zh_hans,
             zh_hant=zh_hant,
         )
@@ -159,6 +175,8 @@ class City(Base):
     name: Mapped[str] = mapped_column(sa.Text, nullable=False)
     latitude: Mapped[float] = mapped_column(sa.Numeric, nullable=True)
     longitude: Mapped[float] = mapped_column(sa.Numeric, nullable=True)
+    zh_hans: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
+    zh_hant: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
 
     state_id: Mapped[int] = mapped_column(sa.ForeignKey("states.id"), index=True)
     country_id: Mapped[int] = mapped_column(sa.ForeignKey("countries.id"), index=True)
@@ -172,12 +190,22 @@ class City(Base):
 
     @property
     def translations(self) -> Translations:
-        en = self.name
-        zh_hans = to_chinese_simplified(en)
-        zh_hant = chinese_simplified_to_traditional(zh_hans)
-
-        return Translations(
-            en=en,
+        return self.get_translations()
+
+    def get_translations(self, locale: Optional[Locale] = None) -> Translations:
+        def zh_hans() -> str:
+            if self.zh_hans is not None:
+                return self.zh_hans
+            return to_chinese_simplified(self.name)
+
+        def zh_hant() -> str:
+            if self.zh_hant is not None:
+                return self.zh_hant
+            return chinese_simplified_to_traditional(zh_hans())
+
+        return Translations.localized(
+            locale,
+            en=lambda: self.name,
             zh_hans=zh_hans,
             zh_hant=zh_hant,
         )
@@ -0,0 +1,17 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from tripcraft.models.base import Base, TimestampMixin
+
+WORLD_VERSION_KEY = "version"
+"""
+WORLD_VERSION_KEY is the key of the row which is bumped on every world dataset
+reload, so that in-process caches of the world tables know to reload.
+"""
+
+
+class WorldMetadata(Base, TimestampMixin):
+    __tablename__ = "world_metadata"
+
+    key: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    value: Mapped[str] = mapped_column(sa.Text, nullable=False)
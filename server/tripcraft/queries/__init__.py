@@ -1,5 +1,6 @@
 from .plan_query import PlanQuery, with_plan_query
 from .user_query import UserQuery, with_user_query
+from .world_cache import WorldCache, with_world_cache
 from .world_query import WorldQuery, with_world_query
 
 __all__ = [
@@ -7,6 +8,8 @@ __all__ = [
     "with_user_query",
     "WorldQuery",
     "with_world_query",
+    "WorldCache",
+    "with_world_cache",
     "PlanQuery",
     "with_plan_query",
 ]
@@ -1,13 +1,21 @@
+import bisect
 import logging
-from typing import Any, List, Optional, Sequence, TypeVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 
 import sqlalchemy as sa
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.interfaces import ORMOption
 
-from tripcraft.schemas import Pagination
+from tripcraft.schemas import Pagination, PaginationCursor
 
 T = TypeVar("T")
 
+LoadPlan = Sequence[ORMOption]
+"""
+LoadPlan is a set of loader options (e.g. selectinload) applied to a query so
+that the relationships it names are fetched up front instead of lazily.
+"""
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,18 +40,119 @@ class BaseQuery(object):
         result = self.session.execute(query).unique()
         return result.scalars().all()
 
-    def get_by_id(self, id_: int) -> Optional[T]:
-        query = self.query.where(self.Model.id == id_).limit(1)
+    def get_by_id(self, id_: int, load_plan: LoadPlan = ()) -> Optional[T]:
+        query = self.query.options(*load_plan).where(self.Model.id == id_).limit(1)
         result = self.session.execute(query)
         return result.scalars().first()
 
-    def get_by_ids(self, ids: Sequence[int]) -> List[T]:
-        query = self.query.where(self.Model.id.in_(ids))
+    def get_by_ids(self, ids: Sequence[int], load_plan: LoadPlan = ()) -> List[T]:
+        query = self.query.options(*load_plan).where(self.Model.id.in_(ids))
         result = self._all(query)
         return result
 
+    def get_by_ids_in_order(
+        self, ids: Sequence[int], load_plan: LoadPlan = ()
+    ) -> List[T]:
+        """
+        get_by_ids_in_order returns the rows in the order of ids, skipping the
+        ids which do not exist.
+        """
+        rows = {row.id: row for row in self.get_by_ids(ids, load_plan)}
+        return [rows[id_] for id_ in ids if id_ in rows]
+
     def _paginate(self, pagination: Pagination, query: sa.Select[Any]):
-        _query = query.offset(pagination.page_index * pagination.page_size).limit(
-            pagination.page_size
-        )
+        """
+        _paginate expects a query ordered by id. It fetches one extra row, which
+        _page uses to tell whether there is a next page.
+        """
+        if pagination.cursor is not None:
+            query = query.where(self.Model.id > pagination.cursor.id)
+        _query = query.offset(pagination.offset).limit(pagination.page_size + 1)
         return _query
+
+    def _paginate_by_score(
+        self, pagination: Pagination, statement: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        _paginate_by_score pages a raw SQL statement which selects a score column,
+        ordered by score descending then id. Like _paginate, it fetches one extra
+        row for _page. The rows also carry a total_count column, see _total_count.
+        """
+        keyset = ""
+        params: Dict[str, Any] = {}
+        if pagination.cursor is not None:
+            keyset = (
+                "WHERE score < :cursor_score "
+                "OR (score = :cursor_score AND id > :cursor_id) "
+            )
+            params = {
+                "cursor_score": pagination.cursor.score,
+                "cursor_id": pagination.cursor.id,
+            }
+        _statement = (
+            f"SELECT * FROM ({self._total_count(pagination, statement)}) AS results "
+            f"{keyset}"
+            "ORDER BY score DESC, id "
+            f"OFFSET {pagination.offset} "
+            f"LIMIT {pagination.page_size + 1}"
+        )
+        return _statement, params
+
+    def _total_count(self, pagination: Pagination, statement: str) -> str:
+        """
+        _total_count adds a total_count column to a raw SQL statement, counting
+        every row it matches before any OFFSET, LIMIT or cursor is applied, so
+        that a page and its total come from one round trip. The column is NULL
+        when the total is not requested, which keeps LIMIT able to stop early.
+        """
+        total_count = "COUNT(*) OVER ()" if pagination.include_total else "NULL"
+        return f"SELECT *, {total_count} AS total_count FROM ({statement}) AS matches"
+
+    def _paginate_ranked(
+        self, pagination: Pagination, ranked: Sequence[Tuple[float, int]]
+    ) -> Sequence[Tuple[float, int]]:
+        """
+        _paginate_ranked pages (score, id) pairs ordered by score descending then
+        id, the same way _paginate_by_score pages a statement.
+        """
+        if pagination.include_total:
+            pagination.total_count = len(ranked)
+        start = pagination.offset
+        if pagination.cursor is not None:
+            cursor = (-(pagination.cursor.score or 0.0), pagination.cursor.id)
+            start = bisect.bisect_right(ranked, cursor, key=lambda r: (-r[0], r[1]))
+        return self._page(
+            pagination,
+            ranked[start : start + pagination.page_size + 1],
+            lambda r: PaginationCursor(id=r[1], score=r[0]),
+        )
+
+    def _page(
+        self,
+        pagination: Pagination,
+        results: Sequence[T],
+        cursor: Optional[Callable[[T], PaginationCursor]] = None,
+    ) -> Sequence[T]:
+        pagination.has_next_page = len(results) > pagination.page_size
+        if pagination.has_next_page:
+            results = results[: pagination.page_size]
+            if cursor is not None and len(results) > 0:
+                pagination.next_cursor = cursor(results[-1])
+        return results
+
+    def _page_with_total_count(
+        self,
+        pagination: Pagination,
+        rows: Sequence[sa.Row[Any]],
+        cursor: Optional[Callable[[sa.Row[Any]], PaginationCursor]] = None,
+    ) -> List[T]:
+        """
+        _page_with_total_count pages rows of a model and a total_count column,
+        and returns the models. An empty first page has nothing to count.
+        """
+        if pagination.include_total:
+            if len(rows) > 0:
+                pagination.total_count = rows[0].total_count
+            elif pagination.cursor is None and pagination.offset == 0:
+                pagination.total_count = 0
+        return [row[0] for row in self._page(pagination, rows, cursor)]
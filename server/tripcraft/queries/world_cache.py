@@ -0,0 +1,337 @@
+import logging
+import threading
+import time
+from typing import (
+    Annotated,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import sqlalchemy as sa
+from fastapi import Depends
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from tripcraft.constants import WORLD_CACHE_TTL, WORLD_FRAGMENT_CACHE_SIZE
+from tripcraft.logging import slog
+from tripcraft.models import (
+    WORLD_VERSION_KEY,
+    Country,
+    Region,
+    SubRegion,
+    WorldMetadata,
+    open_db_session,
+)
+from tripcraft.schemas import (
+    ALL_FIELDS,
+    CountrySchema,
+    FieldSet,
+    Locale,
+    NormalizedCountrySchema,
+    NormalizedSubRegionSchema,
+    RegionSchema,
+    SubRegionSchema,
+)
+from tripcraft.utils import with_db_session
+from tripcraft.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LOCALES: Sequence[Optional[Locale]] = (None, "en", "zh_hans", "zh_hant")
+
+
+def build_region_schema(region: Region, locale: Optional[Locale]) -> RegionSchema:
+    return RegionSchema(
+        id=region.id,
+        name=region.get_translations(locale),
+    )
+
+
+def build_sub_region_schema(
+    sub_region: SubRegion, locale: Optional[Locale]
+) -> SubRegionSchema:
+    return SubRegionSchema(
+        id=sub_region.id,
+        name=sub_region.get_translations(locale),
+        region=build_region_schema(sub_region.region, locale),
+    )
+
+
+def build_country_schema(country: Country, locale: Optional[Locale]) -> CountrySchema:
+    return CountrySchema(
+        id=country.id,
+        name=country.get_translations(locale),
+        iso3=country.iso3,
+        iso2=country.iso2,
+        latitude=country.latitude,
+        longitude=country.longitude,
+        emoji=country.emoji,
+        region=(
+            build_region_schema(country.region, locale)
+            if country.region is not None
+            else None
+        ),
+        sub_region=(
+            build_sub_region_schema(country.sub_region, locale)
+            if country.sub_region is not None
+            else None
+        ),
+    )
+
+
+def build_normalized_sub_region_schema(
+    sub_region: SubRegion, locale: Optional[Locale]
+) -> NormalizedSubRegionSchema:
+    return NormalizedSubRegionSchema(
+        id=sub_region.id,
+        name=sub_region.get_translations(locale),
+        region_id=sub_region.region_id,
+    )
+
+
+def build_normalized_country_schema(
+    country: Country, locale: Optional[Locale]
+) -> NormalizedCountrySchema:
+    return NormalizedCountrySchema(
+        id=country.id,
+        name=country.get_translations(locale),
+        iso3=country.iso3,
+        iso2=country.iso2,
+        latitude=country.latitude,
+        longitude=country.longitude,
+        emoji=country.emoji,
+        region_id=country.region_id,
+        sub_region_id=country.sub_region_id,
+    )
+
+
+class WorldCache:
+    """
+    WorldCache is an immutable snapshot of the regions, subregions and countries
+    tables, with their schemas pre-built for every locale. It also memoizes the
+    JSON fragments of world entities served while its version is current.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        regions: Sequence[Region],
+        sub_regions: Sequence[SubRegion],
+        countries: Sequence[Country],
+    ):
+        self.version = version
+        self._regions: Dict[Optional[Locale], Dict[int, RegionSchema]] = {}
+        self._sub_regions: Dict[Optional[Locale], Dict[int, SubRegionSchema]] = {}
+        self._countries: Dict[Optional[Locale], Dict[int, CountrySchema]] = {}
+        self._normalized_sub_regions: Dict[
+            Optional[Locale], Dict[int, NormalizedSubRegionSchema]
+        ] = {}
+        self._normalized_countries: Dict[
+            Optional[Locale], Dict[int, NormalizedCountrySchema]
+        ] = {}
+        self._sub_region_region_ids = {s.id: s.region_id for s in sub_regions}
+        self._fragments: LRUCache[Tuple[str, int, Optional[Locale], str], bytes] = (
+            LRUCache(WORLD_FRAGMENT_CACHE_SIZE)
+        )
+        for locale in LOCALES:
+            self._regions[locale] = {
+                r.id: build_region_schema(r, locale) for r in regions
+            }
+            self._sub_regions[locale] = {
+                s.id: build_sub_region_schema(s, locale) for s in sub_regions
+            }
+            self._countries[locale] = {
+                c.id: build_country_schema(c, locale) for c in countries
+            }
+            self._normalized_sub_regions[locale] = {
+                s.id: build_normalized_sub_region_schema(s, locale) for s in sub_regions
+            }
+            self._normalized_countries[locale] = {
+                c.id: build_normalized_country_schema(c, locale) for c in countries
+            }
+
+    @classmethod
+    def load(cls, session: Session, version: str) -> "WorldCache":
+        # Load every table in the same session, so that the relationships
+        # between them resolve from the identity map.
+        regions = session.execute(sa.select(Region).order_by(Region.id))
+        sub_regions = session.execute(sa.select(SubRegion).order_by(SubRegion.id))
+        countries = session.execute(sa.select(Country).order_by(Country.id))
+        return cls(
+            version=version,
+            regions=regions.scalars().all(),
+            sub_regions=sub_regions.scalars().all(),
+            countries=countries.scalars().all(),
+        )
+
+    def region(
+        self, region_id: int, locale: Optional[Locale] = None
+    ) -> Optional[RegionSchema]:
+        return self._regions[locale].get(region_id)
+
+    def regions(
+        self,
+        locale: Optional[Locale] = None,
+        region_id: Optional[int] = None,
+    ) -> List[RegionSchema]:
+        return [
+            region
+            for region in self._regions[locale].values()
+            if region_id is None or region.id == region_id
+        ]
+
+    def sub_region(
+        self, sub_region_id: int, locale: Optional[Locale] = None
+    ) -> Optional[SubRegionSchema]:
+        return self._sub_regions[locale].get(sub_region_id)
+
+    def sub_regions(
+        self,
+        locale: Optional[Locale] = None,
+        sub_region_id: Optional[int] = None,
+        region_id: Optional[int] = None,
+    ) -> List[SubRegionSchema]:
+        return [
+            sub_region
+            for sub_region in self._sub_regions[locale].values()
+            if (sub_region_id is None or sub_region.id == sub_region_id)
+            and (
+                region_id is None
+                or self._sub_region_region_ids[sub_region.id] == region_id
+            )
+        ]
+
+    def country(
+        self, country_id: int, locale: Optional[Locale] = None
+    ) -> Optional[CountrySchema]:
+        return self._countries[locale].get(country_id)
+
+    def normalized_sub_region(
+        self, sub_region_id: int, locale: Optional[Locale] = None
+    ) -> Optional[NormalizedSubRegionSchema]:
+        return self._normalized_sub_regions[locale].get(sub_region_id)
+
+    def normalized_country(
+        self, country_id: int, locale: Optional[Locale] = None
+    ) -> Optional[NormalizedCountrySchema]:
+        return self._normalized_countries[locale].get(country_id)
+
+    def fragment(
+        self,
+        kind: str,
+        id_: int,
+        locale: Optional[Locale],
+        build: Callable[[], BaseModel],
+        fields: FieldSet = ALL_FIELDS,
+    ) -> bytes:
+        """
+        fragment returns the camelCase JSON of an entity trimmed to fields,
+        exactly as the world endpoints serialize it, building it with build on
+        a miss.
+        """
+        key = (kind, id_, locale, fields.key)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            schema = build()
+            fragment = schema.model_dump_json(
+                by_alias=True, include=fields.include(schema)
+            ).encode()
+            self._fragments.set(key, fragment)
+        return fragment
+
+
+def get_world_version(session: Session) -> str:
+    version = session.execute(
+        sa.select(WorldMetadata.value).where(WorldMetadata.key == WORLD_VERSION_KEY)
+    ).scalar()
+    return version if version is not None else ""
+
+
+def bump_world_version(session: Session):
+    """
+    bump_world_version must be called whenever the world tables are reloaded or
+    rewritten, so that every process drops its cached copy within WORLD_CACHE_TTL.
+    """
+    version = get_world_version(session)
+    metadata = WorldMetadata(
+        key=WORLD_VERSION_KEY,
+        value=str(int(version) + 1) if version.isdigit() else "1",
+    )
+    session.merge(metadata)
+    session.flush()
+
+
+class WorldSnapshot(Generic[T]):
+    """
+    WorldSnapshot holds a process-wide value derived from the world tables. The
+    world version is checked at most once every WORLD_CACHE_TTL seconds, and the
+    value is rebuilt with load when it has changed. A load which returns None
+    has failed, and is retried at the next check.
+    """
+
+    def __init__(self, name: str, load: Callable[[Session, str], T]):
+        self.name = name
+        self._load = load
+        self._value: Optional[T] = None
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._version is not None
+            and time.monotonic() - self._checked_at < WORLD_CACHE_TTL
+        )
+
+    def get(self, session: Session) -> T:
+        if self._is_fresh():
+            return self._value
+
+        with self._lock:
+            if self._is_fresh():
+                return self._value
+
+            version = get_world_version(session)
+            if self._version != version or self._value is None:
+                self._value = self._load(session, version)
+                self._version = version
+                if self._value is not None:
+                    logger.info(
+                        "loaded world snapshot",
+                        extra=slog(name=self.name, version=version),
+                    )
+            self._checked_at = time.monotonic()
+            return self._value
+
+
+_world_cache: WorldSnapshot[WorldCache] = WorldSnapshot("world cache", WorldCache.load)
+
+
+def load_world_cache(session: Session) -> WorldCache:
+    """
+    load_world_cache returns the process-wide WorldCache.
+    """
+    return _world_cache.get(session)
+
+
+def warm_up_world_cache():
+    try:
+        with open_db_session(read_write=False) as session:
+            load_world_cache(session)
+    except Exception:
+        logger.exception("failed to warm up world cache")
+
+
+def with_world_cache():
+    def depend_cache(session: Annotated[Session, Depends(with_db_session)]):
+        return load_world_cache(session)
+
+    return depend_cache
@@ -0,0 +1,347 @@
+import bisect
+import json
+import logging
+import math
+import mmap
+import os
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import instance_dict
+from sqlalchemy.orm.instrumentation import manager_of_class
+
+from tripcraft.constants import WORLD_FILE_PATH
+from tripcraft.logging import slog
+from tripcraft.models import City, State, open_db_session
+
+from .world_cache import WorldSnapshot, get_world_version
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAGIC = b"TCWORLD2"
+ALIGNMENT = 8
+
+TABLES: Dict[str, Tuple[Any, Sequence[Tuple[str, str]], Sequence[str]]] = {
+    "states": (
+        State,
+        (
+            ("id", "i"),
+            ("country_id", "i"),
+            ("latitude", "d"),
+            ("longitude", "d"),
+            ("name", "s"),
+            ("zh_hans", "s"),
+            ("zh_hant", "s"),
+        ),
+        ("country_id",),
+    ),
+    "cities": (
+        City,
+        (
+            ("id", "i"),
+            ("state_id", "i"),
+            ("country_id", "i"),
+            ("latitude", "d"),
+            ("longitude", "d"),
+            ("name", "s"),
+            ("zh_hans", "s"),
+            ("zh_hant", "s"),
+        ),
+        ("state_id", "country_id"),
+    ),
+}
+"""
+TABLES lists the columns of every table in a world file, with their array type
+codes ("s" for strings), and the foreign keys to index.
+"""
+
+
+class _Writer:
+    def __init__(self):
+        self.sections: List[bytes] = []
+        self.size = 0
+
+    def add(self, data: bytes) -> Tuple[int, int]:
+        offset = self.size
+        padding = -len(data) % ALIGNMENT
+        self.sections.append(data + b"\0" * padding)
+        self.size += len(data) + padding
+        return offset, len(data)
+
+
+def write_world_file(session: Session, path: str) -> str:
+    """
+    write_world_file writes the states and cities tables to a columnar file at
+    path, tagged with the current world version, and returns that version.
+
+    Every column is a flat array ordered by id. Strings are offsets into a
+    shared UTF-8 heap, where the strings of a column are contiguous, with a byte
+    per row marking nulls. Every foreign key has
+    a permutation of the rows ordered by that key then id.
+    """
+    version = get_world_version(session)
+    writer = _Writer()
+    heap = bytearray()
+    tables: Dict[str, Any] = {}
+
+    for table, (model, columns, foreign_keys) in TABLES.items():
+        arrays: Dict[str, Any] = {}
+        for name, typecode in columns:
+            arrays[name] = (
+                (array("Q", [0]), bytearray(), bytearray())
+                if typecode == "s"
+                else array(typecode)
+            )
+
+        rows = session.execute(
+            sa.select(*(getattr(model, name) for name, _ in columns))
+            .order_by(model.id)
+            .execution_options(yield_per=10000)
+        )
+        for row in rows:
+            for (name, typecode), value in zip(columns, row):
+                if typecode == "s":
+                    offsets, nulls, strings = arrays[name]
+                    if value is not None:
+                        strings.extend(value.encode())
+                    offsets.append(len(strings))
+                    nulls.append(value is None)
+                elif typecode == "d":
+                    arrays[name].append(math.nan if value is None else float(value))
+                else:
+                    arrays[name].append(value)
+
+        spec: Dict[str, Any] = {"count": len(arrays["id"]), "columns": {}}
+        for name, typecode in columns:
+            if typecode == "s":
+                offsets, nulls, strings = arrays[name]
+                offsets = array("Q", (len(heap) + offset for offset in offsets))
+                heap.extend(strings)
+                spec["columns"][name] = {
+                    "type": "s",
+                    "offsets": writer.add(offsets.tobytes()),
+                    "nulls": writer.add(bytes(nulls)),
+                }
+            else:
+                spec["columns"][name] = {
+                    "type": typecode,
+                    "data": writer.add(arrays[name].tobytes()),
+                }
+        spec["indexes"] = {}
+        for foreign_key in foreign_keys:
+            values = arrays[foreign_key]
+            order = array("i", sorted(range(len(values)), key=values.__getitem__))
+            spec["indexes"][foreign_key] = writer.add(order.tobytes())
+        tables[table] = spec
+
+    heap_section = writer.add(bytes(heap))
+    header = json.dumps(
+        {"version": version, "tables": tables, "heap": heap_section}
+    ).encode()
+    header += b" " * (-(len(MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for section in writer.sections:
+            f.write(section)
+    os.replace(tmp_path, path)
+    return version
+
+
+class WorldTable:
+    """
+    WorldTable reads one table of a world file. Lookups by id bisect the id
+    column, and lookups by foreign key bisect the permutation ordered by it.
+    """
+
+    def __init__(self, view: memoryview, spec: Dict[str, Any], heap: memoryview):
+        def section(offset_length: Sequence[int]) -> memoryview:
+            offset, length = offset_length
+            return view[offset : offset + length]
+
+        self.count: int = spec["count"]
+        self._heap = heap
+        self._columns: Dict[str, memoryview] = {}
+        self._offsets: Dict[str, memoryview] = {}
+        self._nulls: Dict[str, memoryview] = {}
+        for name, column in spec["columns"].items():
+            if column["type"] == "s":
+                self._offsets[name] = section(column["offsets"]).cast("Q")
+                self._nulls[name] = section(column["nulls"])
+            else:
+                self._columns[name] = section(column["data"]).cast(column["type"])
+        self._indexes = {
+            name: section(index).cast("i") for name, index in spec["indexes"].items()
+        }
+
+    def __len__(self) -> int:
+        return self.count
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    def number(self, name: str, row: int) -> Optional[float]:
+        value = self._columns[name][row]
+        return None if value != value else value
+
+    def string(self, name: str, row: int) -> Optional[str]:
+        if self._nulls[name][row]:
+            return None
+        offsets = self._offsets[name]
+        return bytes(self._heap[offsets[row] : offsets[row + 1]]).decode()
+
+    def row_of(self, id_: int) -> Optional[int]:
+        ids = self._columns["id"]
+        row = bisect.bisect_left(ids, id_)
+        if row < self.count and ids[row] == id_:
+            return row
+        return None
+
+    def rows_by(self, foreign_key: str, value: int) -> Sequence[int]:
+        """
+        rows_by returns the rows whose foreign_key is value, ordered by id.
+        """
+        order = self._indexes[foreign_key]
+        values = self._columns[foreign_key]
+        lo = bisect.bisect_left(order, value, key=values.__getitem__)
+        hi = bisect.bisect_right(order, value, lo=lo, key=values.__getitem__)
+        return order[lo:hi]
+
+    def rows_where(
+        self, id_: Optional[int] = None, **foreign_keys: int
+    ) -> Sequence[int]:
+        """
+        rows_where returns the rows matching the id and foreign keys which are not
+        None, ordered by id, or every row when there is no filter.
+        """
+        filters = {
+            name: value for name, value in foreign_keys.items() if value is not None
+        }
+        if id_ is not None:
+            row = self.row_of(id_)
+            rows: Sequence[int] = [] if row is None else [row]
+        elif len(filters) > 0:
+            name = next(iter(filters))
+            rows = self.rows_by(name, filters.pop(name))
+        else:
+            return range(self.count)
+        for name, value in filters.items():
+            column = self._columns[name]
+            rows = [row for row in rows if column[row] == value]
+        return rows
+
+
+def _new(model: Type[T], **values: Any) -> T:
+    """
+    _new creates a transient model the way the ORM loads rows, filling its
+    state directly instead of going through the attribute events of __init__.
+    """
+    instance = manager_of_class(model).new_instance()
+    instance_dict(instance).update(values)
+    return instance
+
+
+class WorldFile:
+    """
+    WorldFile is a world file mapped read-only into memory, so that every worker
+    process shares the same pages. Rows are returned as transient models which
+    are not attached to any session.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a world file")
+        header_length = int.from_bytes(view[len(MAGIC) : len(MAGIC) + 8], "little")
+        header_end = len(MAGIC) + 8 + header_length
+        header = json.loads(bytes(view[len(MAGIC) + 8 : header_end]))
+        sections = view[header_end:]
+
+        heap_offset, heap_length = header["heap"]
+        heap = sections[heap_offset : heap_offset + heap_length]
+        self.version: str = header["version"]
+        self.states = WorldTable(sections, header["tables"]["states"], heap)
+        self.cities = WorldTable(sections, header["tables"]["cities"], heap)
+
+    def state(self, row: int) -> State:
+        states = self.states
+        return _new(
+            State,
+            id=states.column("id")[row],
+            name=states.string("name", row),
+            latitude=states.number("latitude", row),
+            longitude=states.number("longitude", row),
+            zh_hans=states.string("zh_hans", row),
+            zh_hant=states.string("zh_hant", row),
+            country_id=states.column("country_id")[row],
+        )
+
+    def city(self, row: int) -> City:
+        cities = self.cities
+        state_id = cities.column("state_id")[row]
+        state_row = self.states.row_of(state_id)
+        return _new(
+            City,
+            id=cities.column("id")[row],
+            name=cities.string("name", row),
+            latitude=cities.number("latitude", row),
+            longitude=cities.number("longitude", row),
+            zh_hans=cities.string("zh_hans", row),
+            zh_hant=cities.string("zh_hant", row),
+            state_id=state_id,
+            country_id=cities.column("country_id")[row],
+            state=None if state_row is None else self.state(state_row),
+        )
+
+    @classmethod
+    def load(cls, session: Session, version: str) -> Optional["WorldFile"]:
+        if not WORLD_FILE_PATH:
+            return None
+        try:
+            world_file = cls(WORLD_FILE_PATH)
+        except (OSError, ValueError):
+            logger.exception(
+                "failed to open world file", extra=slog(path=WORLD_FILE_PATH)
+            )
+            return None
+        if world_file.version != version:
+            logger.warning(
+                "world file is outdated",
+                extra=slog(
+                    path=WORLD_FILE_PATH,
+                    file_version=world_file.version,
+                    version=version,
+                ),
+            )
+            return None
+        return world_file
+
+
+_world_file: WorldSnapshot[Optional[WorldFile]] = WorldSnapshot(
+    "world file", WorldFile.load
+)
+
+
+def load_world_file(session: Session) -> Optional[WorldFile]:
+    """
+    load_world_file returns the process-wide WorldFile, or None when
+    WORLD_FILE_PATH is unset or the file does not match the world version.
+    """
+    return _world_file.get(session)
+
+
+def warm_up_world_file():
+    try:
+        with open_db_session(read_write=False) as session:
+            load_world_file(session)
+    except Exception:
+        logger.exception("failed to warm up world file")
@@ -0,0 +1,446 @@
+import bisect
+import heapq
+import itertools
+import logging
+import math
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from tripcraft.constants import (
+    WORLD_FUZZY_MAX_CANDIDATES,
+    WORLD_SEARCH_CACHE_MAX_RESULTS,
+    WORLD_SEARCH_CACHE_SIZE,
+)
+from tripcraft.models import City, Country, Region, State, SubRegion, open_db_session
+from tripcraft.utils import chinese_traditional_to_simplified
+from tripcraft.utils.lru import LRUCache
+
+from .world_cache import WorldSnapshot
+
+logger = logging.getLogger(__name__)
+
+RankedIds = List[Tuple[float, int]]
+"""
+RankedIds are (score, id) pairs ordered by score descending then id, the same
+order as the name searches of ZomboDB.
+"""
+
+
+def normalize_name(s: str) -> str:
+    """
+    normalize_name folds case and accents, and turns punctuation into spaces.
+    """
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(c for c in s if not unicodedata.combining(c)).casefold()
+    return " ".join("".join(c if c.isalnum() else " " for c in s).split())
+
+
+def _is_wide(c: str) -> bool:
+    return unicodedata.east_asian_width(c) in ("W", "F")
+
+
+def simplify_query(name: str) -> str:
+    """
+    simplify_query converts the traditional Chinese characters of a query to
+    simplified ones, as only simplified names are indexed. Queries without wide
+    characters are returned as is, so they never reach OpenCC.
+    """
+    if any(_is_wide(c) for c in name):
+        return chinese_traditional_to_simplified(name)
+    return name
+
+
+def _suffixes(normalized: str) -> Iterator[Tuple[int, str]]:
+    """
+    _suffixes yields the suffixes of a normalized name which start a word, with
+    the position of that word. Like Elasticsearch, every CJK character is a word.
+    """
+    position = 0
+    for i, c in enumerate(normalized):
+        if c == " ":
+            continue
+        if i == 0 or normalized[i - 1] == " " or _is_wide(c):
+            yield position, normalized[i:]
+            position += 1
+
+
+def _bigrams(word: str) -> Sequence[str]:
+    """
+    _bigrams returns the distinct bigrams of a word, padded at its start only,
+    so that a partially typed word shares every bigram with the words it begins.
+    """
+    padded = f"${word}"
+    return list({padded[i : i + 2] for i in range(len(padded) - 1)})
+
+
+def _prefix_distance(query: str, word: str, max_distance: int) -> int:
+    """
+    _prefix_distance returns the optimal string alignment distance between the
+    query and the closest prefix of the word, or max_distance + 1 when it is
+    over max_distance. A transposition counts as one edit.
+    """
+    previous: List[int] = []
+    current = list(range(len(word) + 1))
+    for i in range(1, len(query) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(word)
+        for j in range(1, len(word) + 1):
+            cost = 0 if query[i - 1] == word[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + cost,
+            )
+            if (
+                i > 1
+                and j > 1
+                and query[i - 1] == word[j - 2]
+                and query[i - 2] == word[j - 1]
+            ):
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+    return min(current)
+
+
+def _max_distance(word: str) -> int:
+    if len(word) < 3:
+        return 0
+    if len(word) <= 5:
+        return 1
+    return 2
+
+
+class FuzzyIndex:
+    """
+    FuzzyIndex finds the words within a few edits of a query word. An edit
+    changes at most 3 bigrams of a word, so only the words sharing enough
+    bigrams with the query are candidates. Only the max_candidates of them
+    sharing the most bigrams are compared by edit distance.
+    """
+
+    def __init__(
+        self,
+        words: Dict[str, Dict[int, float]],
+        max_candidates: int = WORLD_FUZZY_MAX_CANDIDATES,
+    ):
+        self.max_candidates = max_candidates
+        self._words = sorted(words)
+        self._offsets = array("q", [0])
+        self._ids = array("q")
+        self._popularities = array("d")
+        postings: Dict[str, List[int]] = {}
+        for i, word in enumerate(self._words):
+            for id_, popularity in sorted(words[word].items()):
+                self._ids.append(id_)
+                self._popularities.append(popularity)
+            self._offsets.append(len(self._ids))
+            for bigram in _bigrams(word):
+                postings.setdefault(bigram, []).append(i)
+        self._postings = {
+            bigram: array("i", indexes) for bigram, indexes in postings.items()
+        }
+
+    def search_word(self, query: str) -> Dict[int, float]:
+        """
+        search_word scores the ids of every word close to the query word. Closer
+        and shorter words score higher, up to 1.5 with the popularity.
+        """
+        max_distance = _max_distance(query)
+        bigrams = _bigrams(query)
+        shared = Counter(
+            itertools.chain.from_iterable(
+                self._postings.get(bigram, ()) for bigram in bigrams
+            )
+        )
+        min_shared = max(1, len(bigrams) - 3 * max_distance)
+        min_length = len(query) - max_distance
+        # Among the words sharing as many bigrams, prefer those of the query's
+        # length, as they are the most likely to be within max_distance.
+        candidates = heapq.nsmallest(
+            self.max_candidates,
+            (
+                (-count, abs(len(self._words[i]) - len(query)), i)
+                for i, count in shared.most_common(4 * self.max_candidates)
+                if count >= min_shared and len(self._words[i]) >= min_length
+            ),
+        )
+
+        scores: Dict[int, float] = {}
+        for _, _, i in candidates:
+            word = self._words[i]
+            distance = _prefix_distance(query, word, max_distance)
+            if distance > max_distance:
+                continue
+            closeness = 0.5 * (1 - distance / (1 + len(query))) + 0.5 / (1 + len(word))
+            for j in range(self._offsets[i], self._offsets[i + 1]):
+                score = closeness + self._popularities[j]
+                id_ = self._ids[j]
+                if scores.get(id_, -1.0) < score:
+                    scores[id_] = score
+        return scores
+
+    def search(self, query: str) -> RankedIds:
+        """
+        search returns the ids close to every word of a normalized query, scored
+        by the mean of their word scores, which stays below 1.5.
+        """
+        words = [word for word in query.split() if len(word) >= 2]
+        if len(words) == 0 or any(_is_wide(c) for c in query):
+            return []
+
+        scores = self.search_word(words[0])
+        for word in words[1:]:
+            word_scores = self.search_word(word)
+            scores = {
+                id_: score + word_scores[id_]
+                for id_, score in scores.items()
+                if id_ in word_scores
+            }
+        return sorted(
+            ((score / len(words), id_) for id_, score in scores.items()),
+            key=lambda r: (-r[0], r[1]),
+        )
+
+
+def _popularity(count: int, max_count: int) -> float:
+    if max_count <= 0:
+        return 0.0
+    return 0.5 * math.log1p(count) / math.log1p(max_count)
+
+
+class NameIndex:
+    """
+    NameIndex is a sorted array of every name suffix which starts a word, so that
+    a phrase prefix search is a bisect followed by a scan of the matching range.
+
+    A match scores 4 if it is the whole name, 2 if it starts the name, plus the
+    popularity of the row (below 0.5) and a bonus for short names (below 0.5).
+
+    When no name matches, search_fuzzy tolerates typos through a FuzzyIndex of
+    the words of every name. Its scores stay below 2, under any prefix match at
+    the start of a name.
+
+    Results are cached by query, unless they rank more than cache_max_results
+    rows. Those come from short queries matching much of the table, and would
+    make the memory of the cache unbounded by its size.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[Tuple[int, Iterable[Optional[str]], float]],
+        cache_size: int = WORLD_SEARCH_CACHE_SIZE,
+        cache_max_results: int = WORLD_SEARCH_CACHE_MAX_RESULTS,
+    ):
+        entries: Dict[Tuple[str, int], float] = {}
+        words: Dict[str, Dict[int, float]] = {}
+        for id_, names, popularity in rows:
+            for name in names:
+                if not name:
+                    continue
+                normalized = normalize_name(name)
+                for word in normalized.split():
+                    if len(word) >= 2 and not any(_is_wide(c) for c in word):
+                        words.setdefault(word, {})[id_] = popularity
+                for position, suffix in _suffixes(normalized):
+                    score = popularity + 1 / (1 + len(normalized))
+                    if position == 0:
+                        score += 2
+                    key = (suffix, id_)
+                    if entries.get(key, -1.0) < score:
+                        entries[key] = score
+
+        self._keys: List[str] = []
+        self._ids = array("q")
+        self._scores = array("d")
+        for (key, id_), score in sorted(entries.items()):
+            self._keys.append(key)
+            self._ids.append(id_)
+            self._scores.append(score)
+        self._results: LRUCache[str, RankedIds] = LRUCache(cache_size)
+        self._cache_max_results = cache_max_results
+        self._fuzzy = FuzzyIndex(words)
+        self._fuzzy_results: LRUCache[str, RankedIds] = LRUCache(cache_size)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def search(self, name: str) -> RankedIds:
+        """
+        search ranks the rows with a name containing name. A name without any
+        letter or digit matches nothing, rather than every row.
+        """
+        query = normalize_name(simplify_query(name))
+        if query == "":
+            return []
+        ranked = self._results.get(query)
+        if ranked is not None:
+            return ranked
+
+        scores: Dict[int, float] = {}
+        lo = bisect.bisect_left(self._keys, query)
+        hi = bisect.bisect_left(self._keys, query + "\U0010ffff", lo)
+        for i in range(lo, hi):
+            score = self._scores[i]
+            # Only suffixes at the start of a name score 2 or more.
+            if score >= 2 and self._keys[i] == query:
+                score += 4
+            id_ = self._ids[i]
+            if scores.get(id_, -1.0) < score:
+                scores[id_] = score
+
+        ranked = sorted(
+            ((score, id_) for id_, score in scores.items()),
+            key=lambda r: (-r[0], r[1]),
+        )
+        if len(ranked) <= self._cache_max_results:
+            self._results.set(query, ranked)
+        return ranked
+
+    def search_fuzzy(self, name: str) -> RankedIds:
+        query = normalize_name(simplify_query(name))
+        if query == "":
+            return []
+        ranked = self._fuzzy_results.get(query)
+        if ranked is None:
+            ranked = self._fuzzy.search(query)
+            self._fuzzy_results.set(query, ranked)
+        return ranked
+
+
+def _count_by(session: Session, column: sa.Column) -> Dict[int, int]:
+    rows = session.execute(sa.select(column, sa.func.count()).group_by(column))
+    return {id_: count for id_, count in rows}
+
+
+def _translated_names(obj) -> Sequence[Optional[str]]:
+    return (obj.name, obj.translations.zh_hans)
+
+
+class WorldIndex:
+    """
+    WorldIndex is an in-process search engine over the names of the world tables,
+    in English and zh-Hans. zh-Hant names are converted from zh-Hans, so zh-Hant
+    queries are converted back before searching. Rows are ranked by their number
+    of countries or cities, and capitals come first among cities.
+    """
+
+    def __init__(
+        self,
+        regions: NameIndex,
+        sub_regions: NameIndex,
+        countries: NameIndex,
+        states: NameIndex,
+        cities: NameIndex,
+    ):
+        self.regions = regions
+        self.sub_regions = sub_regions
+        self.countries = countries
+        self.states = states
+        self.cities = cities
+
+    @classmethod
+    def load(cls, session: Session, version: str) -> "WorldIndex":
+        countries_by_region = _count_by(session, Country.region_id)
+        countries_by_sub_region = _count_by(session, Country.sub_region_id)
+        cities_by_country = _count_by(session, City.country_id)
+        cities_by_state = _count_by(session, City.state_id)
+        max_countries_by_region = max(countries_by_region.values(), default=0)
+        max_countries_by_sub_region = max(countries_by_sub_region.values(), default=0)
+        max_cities_by_country = max(cities_by_country.values(), default=0)
+        max_cities_by_state = max(cities_by_state.values(), default=0)
+
+        regions = session.execute(sa.select(Region)).scalars().all()
+        sub_regions = session.execute(sa.select(SubRegion)).scalars().all()
+        countries = session.execute(sa.select(Country)).scalars().all()
+        capitals = {
+            country.id: normalize_name(country.capital)
+            for country in countries
+            if country.capital
+        }
+
+        states = session.execute(sa.select(State.id, State.name, State.zh_hans))
+        cities = session.execute(
+            sa.select(City.id, City.name, City.zh_hans, City.country_id)
+        )
+
+        return cls(
+            regions=NameIndex(
+                (
+                    region.id,
+                    _translated_names(region),
+                    _popularity(
+                        countries_by_region.get(region.id, 0),
+                        max_countries_by_region,
+                    ),
+                )
+                for region in regions
+            ),
+            sub_regions=NameIndex(
+                (
+                    sub_region.id,
+                    _translated_names(sub_region),
+                    _popularity(
+                        countries_by_sub_region.get(sub_region.id, 0),
+                        max_countries_by_sub_region,
+                    ),
+                )
+                for sub_region in sub_regions
+            ),
+            countries=NameIndex(
+                (
+                    country.id,
+                    (*_translated_names(country), country.iso2, country.iso3),
+                    _popularity(
+                        cities_by_country.get(country.id, 0),
+                        max_cities_by_country,
+                    ),
+                )
+                for country in countries
+            ),
+            states=NameIndex(
+                (
+                    state.id,
+                    (state.name, state.zh_hans),
+                    _popularity(
+                        cities_by_state.get(state.id, 0),
+                        max_cities_by_state,
+                    ),
+                )
+                for state in states
+            ),
+            cities=NameIndex(
+                (
+                    city.id,
+                    (city.name, city.zh_hans),
+                    (
+                        0.5
+                        if capitals.get(city.country_id) == normalize_name(city.name)
+                        else 0.0
+                    ),
+                )
+                for city in cities
+            ),
+        )
+
+
+_world_index: WorldSnapshot[WorldIndex] = WorldSnapshot("world index", WorldIndex.load)
+
+
+def load_world_index(session: Session) -> WorldIndex:
+    """
+    load_world_index returns the process-wide WorldIndex.
+    """
+    return _world_index.get(session)
+
+
+def warm_up_world_index():
+    try:
+        with open_db_session(read_write=False) as session:
+            load_world_index(session)
+    except Exception:
+        logger.exception("failed to warm up world index")
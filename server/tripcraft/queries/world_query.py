@@ -1,17 +1,200 @@
-from typing import Annotated, Literal, Optional, Sequence
+import bisect
+import logging
+from abc import ABC, abstractmethod
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 import sqlalchemy as sa
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
+from tripcraft.constants import (
+    WORLD_COUNT_CACHE_SIZE,
+    WORLD_COUNT_CACHE_TTL,
+    WORLD_SEARCH_BACKEND,
+)
 from tripcraft.models import City, Country, Region, State, SubRegion
-from tripcraft.schemas import Pagination, Translations
+from tripcraft.schemas import Pagination, PaginationCursor, Translations
 from tripcraft.utils import with_db_session
+from tripcraft.utils.lru import TTLCache
+
+from .base_query import BaseQuery, LoadPlan
+from .world_cache import load_world_cache
+from .world_file import WorldFile, WorldTable, load_world_file
+from .world_index import (
+    NameIndex,
+    RankedIds,
+    WorldIndex,
+    load_world_index,
+    simplify_query,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DestinationType = Literal["country", "state", "city"]
+
+_counts: TTLCache[Tuple[Any, ...], int] = TTLCache(
+    WORLD_COUNT_CACHE_SIZE, WORLD_COUNT_CACHE_TTL
+)
+
+
+def _count(session: Session, query: sa.Select[Any], key: Tuple[Any, ...]) -> int:
+    """
+    _count caches the totals of listings filtered by ids for WORLD_COUNT_CACHE_TTL,
+    as they only change when the world tables are reloaded. The totals are keyed
+    by world version, so a reload is picked up with the WorldCache.
+    """
+    key = (load_world_cache(session).version, *key)
+    count = _counts.get(key)
+    if count is None:
+        count = session.execute(query).scalar_one()
+        _counts.set(key, count)
+    return count
+
+
+NAME_PREFIX_QUERY = (
+    "dsl.or("
+    "dsl.match_phrase_prefix('name', :name), "
+    "dsl.match_phrase_prefix('zh_hans', :name))"
+)
+"""
+NAME_PREFIX_QUERY matches the states or cities whose English or zh-Hans name
+starts with :name.
+"""
+
+CITY_LOAD_PLAN: LoadPlan = (selectinload(City.state),)
+"""
+CITY_LOAD_PLAN only loads the states of cities. Countries, subregions and
+regions are served from the WorldCache.
+"""
+
+
+class WorldSearchQuery(BaseQuery):
+    def _search(
+        self,
+        name: str,
+        pagination: Optional[Pagination],
+        load_plan: LoadPlan,
+        index: Callable[[WorldIndex], NameIndex],
+        zombodb: Callable[[str], Sequence[T]],
+    ) -> Sequence[T]:
+        """
+        _search serves name searches from the in-process WorldIndex. With
+        WORLD_SEARCH_BACKEND=zombodb, ZomboDB is queried first and the WorldIndex
+        is only used when Elasticsearch cannot be reached or finds nothing on
+        the first page. A later page past the last match of ZomboDB stays empty,
+        so that a listing is not paged through two different rankings.
+        When no name starts with the query, the search tolerates typos instead.
+        """
+        if WORLD_SEARCH_BACKEND == "zombodb":
+            try:
+                with self.session.begin_nested():
+                    results = zombodb(simplify_query(name))
+                if len(results) > 0 or (
+                    pagination is not None and not pagination.is_first_page
+                ):
+                    return results
+            except sa.exc.DBAPIError:
+                logger.exception("failed to search with zombodb")
+
+        ranked = self._ranked(name, index)
+        if pagination is not None:
+            ranked = self._paginate_ranked(pagination, ranked)
+        return self.get_by_ids_in_order([id_ for _, id_ in ranked], load_plan)
 
-from .base_query import BaseQuery
+    def _ranked(self, name: str, index: Callable[[WorldIndex], NameIndex]) -> RankedIds:
+        name_index = index(load_world_index(self.session))
+        ranked = name_index.search(name)
+        if len(ranked) == 0:
+            ranked = name_index.search_fuzzy(name)
+        return ranked
 
+    def _search_ranked(
+        self,
+        name: str,
+        limit: int,
+        load_plan: LoadPlan,
+        index: Callable[[WorldIndex], NameIndex],
+    ) -> List[Tuple[float, Any]]:
+        """
+        _search_ranked returns the limit best matches from the WorldIndex with
+        their scores. Every NameIndex scores the same way, so the scores of
+        different world tables can be merged into one ranking.
+        """
+        ranked = self._ranked(name, index)[:limit]
+        if len(ranked) == 0:
+            return []
+        rows = {
+            row.id: row
+            for row in self.get_by_ids([id_ for _, id_ in ranked], load_plan)
+        }
+        return [(score, rows[id_]) for score, id_ in ranked if id_ in rows]
+
+
+class WorldFileQuery(WorldSearchQuery, ABC):
+    """
+    WorldFileQuery serves lookups by id and foreign key from the WorldFile when
+    WORLD_FILE_PATH is set. Rows from the WorldFile are transient, with only the
+    relationships named in CITY_LOAD_PLAN set, so load plans are ignored.
+    """
+
+    @abstractmethod
+    def _table(self, world_file: WorldFile) -> WorldTable: ...
+
+    @abstractmethod
+    def _row(self, world_file: WorldFile, row: int) -> Any: ...
+
+    def get_by_ids(self, ids: Sequence[int], load_plan: LoadPlan = ()) -> List[Any]:
+        world_file = load_world_file(self.session)
+        if world_file is None:
+            return super().get_by_ids(ids, load_plan)
+
+        table = self._table(world_file)
+        rows = (table.row_of(id_) for id_ in ids)
+        return [self._row(world_file, row) for row in rows if row is not None]
+
+    def _get_all_from_file(
+        self,
+        world_file: WorldFile,
+        pagination: Optional[Pagination],
+        id_: Optional[int],
+        **foreign_keys: Optional[int],
+    ) -> Sequence[Any]:
+        table = self._table(world_file)
+        rows = table.rows_where(id_, **foreign_keys)
 
-class RegionQuery(BaseQuery):
+        if pagination is not None:
+            ids = table.column("id")
+            start = pagination.offset
+            if pagination.cursor is not None:
+                start = bisect.bisect_right(
+                    rows, pagination.cursor.id, key=ids.__getitem__
+                )
+            rows = self._page(
+                pagination,
+                rows[start : start + pagination.page_size + 1],
+                lambda row: PaginationCursor(id=ids[row]),
+            )
+
+        return [self._row(world_file, row) for row in rows]
+
+
+class RegionQuery(WorldSearchQuery):
     def __init__(self, session: Session) -> None:
         super().__init__(session, Region)
 
@@ -24,13 +207,22 @@ class RegionQuery(BaseQuery):
         return self._all(_query)
 
     def get_by_name(self, name: str) -> Sequence[Region]:
+        return self._search(
+            name,
+            None,
+            (),
+            lambda index: index.regions,
+            lambda name: self._get_by_name_from_zombodb(name),
+        )
+
+    def _get_by_name_from_zombodb(self, name: str) -> Sequence[Region]:
         _query = self.query.from_statement(
             sa.sql.text("SELECT * FROM regions WHERE regions ==> :name"),
         ).params(name=f"{name}*")
         return self._all(_query)
 
 
-class SubRegionQuery(BaseQuery):
+class SubRegionQuery(WorldSearchQuery):
     def __init__(self, session: Session) -> None:
         super().__init__(session, SubRegion)
 
@@ -38,8 +230,9 @@ class SubRegionQuery(BaseQuery):
         self,
         sub_region_id: Optional[int] = None,
         region_id: Optional[int] = None,
+        load_plan: LoadPlan = (),
     ) -> Sequence[SubRegion]:
-        _query = self.query
+        _query = self.query.options(*load_plan)
 
         if sub_region_id is not None:
             _query = _query.where(SubRegion.id == sub_region_id)
@@ -49,14 +242,29 @@ class SubRegionQuery(BaseQuery):
 
         return self._all(_query)
 
-    def get_by_name(self, name: str) -> Sequence[SubRegion]:
-        _query = self.query.from_statement(
-            sa.sql.text("SELECT * FROM subregions WHERE subregions ==> :name"),
-        ).params(name=f"{name}*")
+    def get_by_name(self, name: str, load_plan: LoadPlan = ()) -> Sequence[SubRegion]:
+        return self._search(
+            name,
+            None,
+            load_plan,
+            lambda index: index.sub_regions,
+            lambda name: self._get_by_name_from_zombodb(name, load_plan),
+        )
+
+    def _get_by_name_from_zombodb(
+        self, name: str, load_plan: LoadPlan = ()
+    ) -> Sequence[SubRegion]:
+        _query = (
+            self.query.options(*load_plan)
+            .from_statement(
+                sa.sql.text("SELECT * FROM subregions WHERE subregions ==> :name"),
+            )
+            .params(name=f"{name}*")
+        )
         return self._all(_query)
 
 
-class CountryQuery(BaseQuery):
+class CountryQuery(WorldSearchQuery):
     def __init__(self, session: Session) -> None:
         super().__init__(session, Country)
 
@@ -66,8 +274,9 @@ class CountryQuery(BaseQuery):
         country_id: Optional[int] = None,
         sub_region_id: Optional[int] = None,
         region_id: Optional[int] = None,
+        load_plan: LoadPlan = (),
     ) -> Sequence[Country]:
-        _query = self.query
+        _query = self.query.options(*load_plan)
 
         if country_id is not None:
             _query = _query.where(Country.id == country_id)
@@ -78,24 +287,59 @@ class CountryQuery(BaseQuery):
         if region_id is not None:
             _query = _query.where(Country.region_id == region_id)
 
-        if pagination is not None:
-            _query = self._paginate(pagination, _query)
+        if pagination is None:
+            return self._all(_query)
 
-        return self._all(_query)
+        _query = self._paginate(pagination, _query.order_by(Country.id))
+        return self._page(
+            pagination,
+            self._all(_query),
+            lambda country: PaginationCursor(id=country.id),
+        )
 
     def get_by_name(
         self,
         name: str,
         pagination: Optional[Pagination] = None,
+        load_plan: LoadPlan = (),
     ) -> Sequence[Country]:
-        _query = self.query.from_statement(
-            sa.sql.text(
-                "SELECT * FROM countries WHERE countries ==> :name "
-                f"OFFSET {pagination.page_index * pagination.page_size} "
-                f"LIMIT {pagination.page_size}"
-            ),
-        ).params(name=f"{name}*")
-        return self._all(_query)
+        return self._search(
+            name,
+            pagination,
+            load_plan,
+            lambda index: index.countries,
+            lambda name: self._get_by_name_from_zombodb(name, pagination, load_plan),
+        )
+
+    def get_ranked_by_name(
+        self, name: str, limit: int, load_plan: LoadPlan = ()
+    ) -> List[Tuple[float, Country]]:
+        return self._search_ranked(
+            name, limit, load_plan, lambda index: index.countries
+        )
+
+    def _get_by_name_from_zombodb(
+        self,
+        name: str,
+        pagination: Optional[Pagination] = None,
+        load_plan: LoadPlan = (),
+    ) -> Sequence[Country]:
+        statement, params = self._paginate_by_score(
+            pagination,
+            "SELECT zdb.score(ctid) AS score, * FROM countries "
+            "WHERE countries ==> :name",
+        )
+        _query = (
+            sa.select(Country, sa.column("score"), sa.column("total_count"))
+            .options(*load_plan)
+            .from_statement(sa.sql.text(statement))
+            .params(name=f"{name}*", **params)
+        )
+        return self._page_with_total_count(
+            pagination,
+            self.session.execute(_query).all(),
+            lambda row: PaginationCursor(id=row[0].id, score=row.score),
+        )
 
     def count(
         self,
@@ -114,28 +358,44 @@ class CountryQuery(BaseQuery):
         if sub_region_id is not None:
             _query = _query.where(Country.region_id == sub_region_id)
 
-        count_result = self.session.execute(_query)
-        return count_result.scalar_one()
+        return _count(
+            self.session,
+            _query,
+            (Country.__tablename__, country_id, region_id, sub_region_id),
+        )
 
     def count_by_name(self, name: str):
         count_result = self.session.execute(
             sa.sql.text("SELECT COUNT(*) FROM countries WHERE countries ==> :name"),
-            {"name": f"{name}*"},
+            {"name": f"{simplify_query(name)}*"},
         )
         return count_result.scalar_one()
 
 
-class StateQuery(BaseQuery):
+class StateQuery(WorldFileQuery):
     def __init__(self, session: Session) -> None:
         super().__init__(session, State)
 
+    def _table(self, world_file: WorldFile) -> WorldTable:
+        return world_file.states
+
+    def _row(self, world_file: WorldFile, row: int) -> State:
+        return world_file.state(row)
+
     def get_all(
         self,
         pagination: Optional[Pagination] = None,
         state_id: Optional[int] = None,
         country_id: Optional[int] = None,
+        load_plan: LoadPlan = (),
     ) -> Sequence[State]:
-        _query = self.query
+        world_file = load_world_file(self.session)
+        if world_file is not None:
+            return self._get_all_from_file(
+                world_file, pagination, state_id, country_id=country_id
+            )
+
+        _query = self.query.options(*load_plan)
 
         if state_id is not None:
             _query = _query.where(State.id == state_id)
@@ -143,25 +403,79 @@ class StateQuery(BaseQuery):
         if country_id is not None:
             _query = _query.where(State.country_id == country_id)
 
-        if pagination is not None:
-            _query = self._paginate(pagination, _query)
+        if pagination is None:
+            return self._all(_query)
 
-        return self._all(_query)
+        _query = self._paginate(pagination, _query.order_by(State.id))
+        return self._page(
+            pagination,
+            self._all(_query),
+            lambda state: PaginationCursor(id=state.id),
+        )
+
+    def get_all_in_chunks(
+        self,
+        state_id: Optional[int] = None,
+        country_id: Optional[int] = None,
+        load_plan: LoadPlan = (),
+        chunk_size: int = 1000,
+    ) -> Iterator[Sequence[State]]:
+        """
+        get_all_in_chunks streams the states in id order through a server-side
+        cursor, chunk_size rows at a time.
+        """
+        _query = self.query.options(*load_plan).order_by(State.id)
+
+        if state_id is not None:
+            _query = _query.where(State.id == state_id)
+
+        if country_id is not None:
+            _query = _query.where(State.country_id == country_id)
+
+        result = self.session.execute(_query.execution_options(yield_per=chunk_size))
+        return result.scalars().partitions()
 
     def get_by_name(
         self,
         name: str,
         pagination: Optional[Pagination] = None,
+        load_plan: LoadPlan = (),
     ) -> Sequence[State]:
-        _query = self.query.from_statement(
-            sa.sql.text(
-                "SELECT zdb.score(ctid), * FROM states WHERE states ==> dsl.match_phrase_prefix('name', :name) "
-                "ORDER BY score desc "
-                f"OFFSET {pagination.page_index * pagination.page_size} "
-                f"LIMIT {pagination.page_size}"
-            ),
-        ).params(name=name)
-        return self._all(_query)
+        return self._search(
+            name,
+            pagination,
+            load_plan,
+            lambda index: index.states,
+            lambda name: self._get_by_name_from_zombodb(name, pagination, load_plan),
+        )
+
+    def get_ranked_by_name(
+        self, name: str, limit: int, load_plan: LoadPlan = ()
+    ) -> List[Tuple[float, State]]:
+        return self._search_ranked(name, limit, load_plan, lambda index: index.states)
+
+    def _get_by_name_from_zombodb(
+        self,
+        name: str,
+        pagination: Optional[Pagination] = None,
+        load_plan: LoadPlan = (),
+    ) -> Sequence[State]:
+        statement, params = self._paginate_by_score(
+            pagination,
+            "SELECT zdb.score(ctid) AS score, * FROM states "
+            f"WHERE states ==> {NAME_PREFIX_QUERY}",
+        )
+        _query = (
+            sa.select(State, sa.column("score"), sa.column("total_count"))
+            .options(*load_plan)
+            .from_statement(sa.sql.text(statement))
+            .params(name=name, **params)
+        )
+        return self._page_with_total_count(
+            pagination,
+            self.session.execute(_query).all(),
+            lambda row: PaginationCursor(id=row[0].id, score=row.score),
+        )
 
     def count(
         self,
@@ -176,31 +490,47 @@ class StateQuery(BaseQuery):
         if country_id is not None:
             _query = _query.where(State.country_id == country_id)
 
-        count_result = self.session.execute(_query)
-        return count_result.scalar_one()
+        return _count(self.session, _query, (State.__tablename__, state_id, country_id))
 
     def count_by_name(self, name: str):
         count_result = self.session.execute(
             sa.sql.text(
-                "SELECT COUNT(*) FROM states WHERE states ==> dsl.match_phrase_prefix('name', :name)"
+                f"SELECT COUNT(*) FROM states WHERE states ==> {NAME_PREFIX_QUERY}"
             ),
-            {"name": name},
+            {"name": simplify_query(name)},
         )
         return count_result.scalar_one()
 
 
-class CityQuery(BaseQuery):
+class CityQuery(WorldFileQuery):
     def __init__(self, session: Session) -> None:
         super().__init__(session, City)
 
+    def _table(self, world_file: WorldFile) -> WorldTable:
+        return world_file.cities
+
+    def _row(self, world_file: WorldFile, row: int) -> City:
+        return world_file.city(row)
+
     def get_all(
         self,
         pagination: Optional[Pagination] = None,
         city_id: Optional[int] = None,
         state_id: Optional[int] = None,
         country_id: Optional[int] = None,
+        load_plan: LoadPlan = (),
     ) -> Sequence[City]:
-        _query = self.query
+        world_file = load_world_file(self.session)
+        if world_file is not None:
+            return self._get_all_from_file(
+                world_file,
+                pagination,
+                city_id,
+                state_id=state_id,
+                country_id=country_id,
+            )
+
+        _query = self.query.options(*load_plan)
 
         if city_id is not None:
             _query = _query.where(City.id == city_id)
@@ -211,25 +541,83 @@ class CityQuery(BaseQuery):
         if country_id is not None:
             _query = _query.where(City.country_id == country_id)
 
-        if pagination is not None:
-            _query = self._paginate(pagination, _query)
+        if pagination is None:
+            return self._all(_query)
 
-        return self._all(_query)
+        _query = self._paginate(pagination, _query.order_by(City.id))
+        return self._page(
+            pagination,
+            self._all(_query),
+            lambda city: PaginationCursor(id=city.id),
+        )
+
+    def get_all_in_chunks(
+        self,
+        city_id: Optional[int] = None,
+        state_id: Optional[int] = None,
+        country_id: Optional[int] = None,
+        load_plan: LoadPlan = (),
+        chunk_size: int = 1000,
+    ) -> Iterator[Sequence[City]]:
+        """
+        get_all_in_chunks streams the cities in id order through a server-side
+        cursor, chunk_size rows at a time.
+        """
+        _query = self.query.options(*load_plan).order_by(City.id)
+
+        if city_id is not None:
+            _query = _query.where(City.id == city_id)
+
+        if state_id is not None:
+            _query = _query.where(City.state_id == state_id)
+
+        if country_id is not None:
+            _query = _query.where(City.country_id == country_id)
+
+        result = self.session.execute(_query.execution_options(yield_per=chunk_size))
+        return result.scalars().partitions()
 
     def get_by_name(
         self,
         name: str,
         pagination: Optional[Pagination] = None,
+        load_plan: LoadPlan = (),
     ) -> Sequence[City]:
-        _query = self.query.from_statement(
-            sa.sql.text(
-                "SELECT zdb.score(ctid), * FROM cities WHERE cities ==> dsl.match_phrase_prefix('name', :name) "
-                "ORDER BY score desc "
-                f"OFFSET {pagination.page_index * pagination.page_size} "
-                f"LIMIT {pagination.page_size}"
-            ),
-        ).params(name=name)
-        return self._all(_query)
+        return self._search(
+            name,
+            pagination,
+            load_plan,
+            lambda index: index.cities,
+            lambda name: self._get_by_name_from_zombodb(name, pagination, load_plan),
+        )
+
+    def get_ranked_by_name(
+        self, name: str, limit: int, load_plan: LoadPlan = ()
+    ) -> List[Tuple[float, City]]:
+        return self._search_ranked(name, limit, load_plan, lambda index: index.cities)
+
+    def _get_by_name_from_zombodb(
+        self,
+        name: str,
+        pagination: Optional[Pagination] = None,
+        load_plan: LoadPlan = (),
+    ) -> Sequence[City]:
+        statement, params = self._paginate_by_score(
+            pagination,
+            "SELECT zdb.score(ctid) AS score, * FROM cities "
+            f"WHERE cities ==> {NAME_PREFIX_QUERY}",
+        )
+        _query = (
+            sa.select(City, sa.column("score"), sa.column("total_count"))
+            .options(*load_plan)
+            .from_statement(sa.sql.text(statement))
+            .params(name=name, **params)
+        )
+        return self._page_with_total_count(
+            pagination,
+            self.session.execute(_query).all(),
+            lambda row: PaginationCursor(id=row[0].id, score=row.score),
+        )
 
     def count(
         self,
@@ -248,13 +636,16 @@ class CityQuery(BaseQuery):
         if country_id is not None:
             _query = _query.where(City.country_id == country_id)
 
-        count_result = self.session.execute(_query)
-        return count_result.scalar_one()
+        return _count(
+            self.session, _query, (City.__tablename__, city_id, state_id, country_id)
+        )
 
     def count_by_name(self, name: str):
         count_result = self.session.execute(
-            sa.sql.text("SELECT COUNT(*) FROM cities WHERE cities ==> dsl.match_phrase_prefix('name', :name)"),
-            {"name": name},
+            sa.sql.text(
+                f"SELECT COUNT(*) FROM cities WHERE cities ==> {NAME_PREFIX_QUERY}"
+            ),
+            {"name": simplify_query(name)},
         )
         return count_result.scalar_one()
 
@@ -268,39 +659,39 @@ class WorldQuery:
         self.state = StateQuery(session)
         self.city = CityQuery(session)
 
-    def get_country_iso2_by_type_id(
-        self, type: Literal["country", "state", "city"], id: str
-    ) -> Optional[str]:
-        if type == "country":
-            country = self.country.get_by_id(id)
-            if country is not None:
-                return country.iso2
-        if type == "state":
-            state = self.state.get_by_id(id)
-            if state is not None:
-                return state.country.iso2
-        if type == "city":
-            city = self.city.get_by_id(id)
-            if city is not None:
-                return city.country.iso2
-        return None
-
-    def get_name_by_type_id(
-        self, type: Literal["country", "state", "city"], id: str
-    ) -> Optional[Translations]:
-        if type == "country":
-            country = self.country.get_by_id(id)
+    def get_destinations_by_type_ids(
+        self, type_ids: Iterable[Tuple[DestinationType, int]]
+    ) -> Dict[Tuple[DestinationType, int], Tuple[Translations, str]]:
+        """
+        get_destinations_by_type_ids returns the name and country iso2 of every
+        destination which exists, keyed by type and id. Countries are read from
+        the WorldCache, and states and cities are fetched with one get_by_ids
+        per type.
+        """
+        ids: Dict[DestinationType, Set[int]] = {
+            "country": set(),
+            "state": set(),
+            "city": set(),
+        }
+        for type_, id_ in type_ids:
+            ids[type_].add(id_)
+
+        world_cache = load_world_cache(self.session)
+        destinations: Dict[Tuple[DestinationType, int], Tuple[Translations, str]] = {}
+        for id_ in ids["country"]:
+            country = world_cache.country(id_)
             if country is not None:
-                return country.translations
-        if type == "state":
-            state = self.state.get_by_id(id)
-            if state is not None:
-                return state.translations
-        if type == "city":
-            city = self.city.get_by_id(id)
-            if city is not None:
-                return city.translations
-        return None
+                destinations[("country", id_)] = (country.name, country.iso2)
+        for type_, query in (("state", self.state), ("city", self.city)):
+            if len(ids[type_]) == 0:
+                continue
+            # Rows from the WorldFile have no country loaded, so the country is
+            # looked up by country_id.
+            for row in query.get_by_ids(sorted(ids[type_])):
+                country = world_cache.country(row.country_id)
+                if country is not None:
+                    destinations[(type_, row.id)] = (row.translations, country.iso2)
+        return destinations
 
 
 def with_world_query():
@@ -0,0 +1,300 @@
+import bisect
+import heapq
+import itertools
+import logging
+import math
+from array import array
+from typing import Annotated, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from tripcraft.models import City, open_db_session
+from tripcraft.utils import with_db_session
+
+from .world_cache import WorldSnapshot
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+ROUNDING_KM = 1e-6
+
+
+def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    haversine returns the great-circle distance between two points in km.
+    """
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    GridIndex buckets points into cells of cell_size degrees. Points are sorted
+    by cell, so that every cell is a slice of the coordinate arrays, and a radius
+    search only measures the points of the cells overlapping the radius. The
+    occupied rows and the occupied columns of every row are kept sorted, so that
+    searches skip empty cells, which cover most of the globe.
+    """
+
+    def __init__(
+        self,
+        points: Iterable[Tuple[int, float, float]],
+        cell_size: float = 0.5,
+    ):
+        self.cell_size = cell_size
+        self._columns = round(360 / cell_size)
+        self._ids = array("q")
+        self._lats = array("d")
+        self._lngs = array("d")
+        self._cells: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        self._row_columns: Dict[int, List[int]] = {}
+
+        cells = sorted(
+            (self._cell(lat, lng), id_, lat, lng) for id_, lat, lng in points
+        )
+        for i, (cell, id_, lat, lng) in enumerate(cells):
+            self._ids.append(id_)
+            self._lats.append(lat)
+            self._lngs.append(lng)
+            start, _ = self._cells.get(cell, (i, i))
+            self._cells[cell] = (start, i + 1)
+        # Cells are sorted by row, then column.
+        for row, column in self._cells:
+            self._row_columns.setdefault(row, []).append(column)
+        self._rows = sorted(self._row_columns)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _column(self, lng: float) -> int:
+        half = self._columns // 2
+        return (math.floor(lng / self.cell_size) + half) % self._columns - half
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size), self._column(lng)
+
+    def _columns_within(self, lat: float, lng: float, radius: float) -> Iterable[int]:
+        half = self._columns // 2
+        all_columns = range(-half, self._columns - half)
+        lat_span = radius / KM_PER_DEGREE
+        widest_lat = abs(lat) + lat_span
+        if widest_lat >= 90:
+            return all_columns
+        lng_span = lat_span / math.cos(math.radians(widest_lat))
+        if lng_span >= 180:
+            return all_columns
+        first = math.floor((lng - lng_span) / self.cell_size)
+        last = math.floor((lng + lng_span) / self.cell_size)
+        return {
+            self._column(column * self.cell_size) for column in range(first, last + 1)
+        }
+
+    def nearby(
+        self, lat: float, lng: float, radius: float, limit: int
+    ) -> List[Tuple[float, int]]:
+        """
+        nearby returns up to limit (distance in km, id) pairs within radius km of
+        the point, nearest first.
+        """
+        lat_span = radius / KM_PER_DEGREE
+        rows = range(
+            math.floor((lat - lat_span) / self.cell_size),
+            math.floor((lat + lat_span) / self.cell_size) + 1,
+        )
+        columns = self._columns_within(lat, lng, radius)
+
+        found: List[Tuple[float, int]] = []
+        for row in rows:
+            occupied = self._row_columns.get(row)
+            if occupied is None:
+                continue
+            if len(occupied) < len(columns):
+                row_columns: Iterable[int] = (c for c in occupied if c in columns)
+            else:
+                row_columns = columns
+            for column in row_columns:
+                start, end = self._cells.get((row, column), (0, 0))
+                self._measure(lat, lng, start, end, radius, found)
+        return heapq.nsmallest(limit, found)
+
+    def _measure(
+        self,
+        lat: float,
+        lng: float,
+        start: int,
+        end: int,
+        radius: float,
+        found: List[Tuple[float, int]],
+    ):
+        for i in range(start, end):
+            distance = haversine(lat, lng, self._lats[i], self._lngs[i])
+            if distance <= radius:
+                found.append((distance, self._ids[i]))
+
+    def _row_distance(self, lat: float, row: int) -> float:
+        """
+        _row_distance is a lower bound of the distance in km from lat to the
+        points of row: the distance along the meridian to the nearest latitude
+        of the row.
+        """
+        south = row * self.cell_size
+        north = south + self.cell_size
+        return max(south - lat, lat - north, 0.0) * KM_PER_DEGREE
+
+    def _column_gap(self, lng: float, column: int) -> float:
+        """
+        _column_gap returns the longitude in degrees between lng and the nearest
+        longitude of column, going around the antimeridian when shorter.
+        """
+        west = column * self.cell_size
+        if (lng - west) % 360 < self.cell_size:
+            return 0.0
+        return min((west - lng) % 360, (lng - west - self.cell_size) % 360)
+
+    def nearest(self, lat: float, lng: float) -> Optional[Tuple[float, int]]:
+        """
+        nearest returns the (distance in km, id) of the point nearest to lat/lng.
+        """
+        return self._nearest(lat, lng)[0]
+
+    def nearest_many(
+        self, points: Sequence[Tuple[float, float]], max_distances: int
+    ) -> List[Optional[Tuple[float, int]]]:
+        """
+        nearest_many returns the nearest of every point, searching each distinct
+        point once. It raises ValueError once more than max_distances distances
+        have been measured, which caps the work of a batch of remote points.
+        """
+        nearest: Dict[Tuple[float, float], Optional[Tuple[float, int]]] = {}
+        measured = 0
+        for point in points:
+            if point in nearest:
+                continue
+            nearest[point], point_measured = self._nearest(*point)
+            measured += point_measured
+            if measured > max_distances:
+                raise ValueError(f"Measured more than {max_distances} distances")
+        return [nearest[point] for point in points]
+
+    def _nearest(
+        self, lat: float, lng: float
+    ) -> Tuple[Optional[Tuple[float, int]], int]:
+        """
+        _nearest returns the nearest point and the number of distances measured
+        to find it. Cells are measured best first, by a lower bound of their
+        distance, until that bound exceeds the nearest point found. Occupied
+        rows are queued by their distance to lat, and once a row is reached its
+        occupied columns are queued one at a time, outwards from lng.
+        """
+        best: Optional[Tuple[float, int]] = None
+        measured = 0
+        queue: List[Tuple[float, int, Tuple[int, ...]]] = []
+        pushed = itertools.count()
+
+        def push_row(index: int, step: int):
+            if 0 <= index < len(self._rows):
+                distance = self._row_distance(lat, self._rows[index])
+                heapq.heappush(queue, (distance, next(pushed), (index, step)))
+
+        def push_column(row: int, east: int, west: int, remaining: int):
+            # The columns not queued yet form an arc, so the column at either
+            # end of it has the smallest longitude gap of them.
+            if remaining == 0:
+                return
+            columns = self._row_columns[row]
+            east_gap = self._column_gap(lng, columns[east])
+            west_gap = self._column_gap(lng, columns[west])
+            if east_gap <= west_gap:
+                column, gap = columns[east], east_gap
+                east = (east + 1) % len(columns)
+            else:
+                column, gap = columns[west], west_gap
+                west = (west - 1) % len(columns)
+            distance = self._cell_distance(lat, row, gap)
+            cell = (row, column, east, west, remaining - 1)
+            heapq.heappush(queue, (distance, next(pushed), cell))
+
+        above = bisect.bisect_left(self._rows, math.floor(lat / self.cell_size))
+        push_row(above - 1, -1)
+        push_row(above, 1)
+        while len(queue) > 0:
+            distance, _, entry = heapq.heappop(queue)
+            # Allow for rounding, as the distances queued are lower bounds.
+            if best is not None and distance - ROUNDING_KM > best[0]:
+                break
+            if len(entry) == 2:
+                index, step = entry
+                push_row(index + step, step)
+                row = self._rows[index]
+                columns = self._row_columns[row]
+                east = bisect.bisect_left(columns, self._column(lng)) % len(columns)
+                push_column(row, east, (east - 1) % len(columns), len(columns))
+                continue
+
+            row, column, east, west, remaining = entry
+            push_column(row, east, west, remaining)
+            start, end = self._cells[(row, column)]
+            measured += end - start
+            for i in range(start, end):
+                distance = haversine(lat, lng, self._lats[i], self._lngs[i])
+                if best is None or distance < best[0]:
+                    best = (distance, self._ids[i])
+        return best, measured
+
+    def _cell_distance(self, lat: float, row: int, gap: float) -> float:
+        """
+        _cell_distance returns the distance in km from lat to the nearest point
+        of the cells of row gap degrees of longitude away. Along a meridian gap
+        degrees away, the cosine of the distance is A sin(lat2) + B cos(lat2),
+        which peaks at lat2 = atan2(A, B), so it peaks over the row either there
+        or at the latitude of the row nearest to it.
+        """
+        phi = math.radians(lat)
+        a = math.sin(phi)
+        b = math.cos(phi) * math.cos(math.radians(gap))
+        south = math.radians(max(row * self.cell_size, -90))
+        north = math.radians(min((row + 1) * self.cell_size, 90))
+        peak = min(max(math.atan2(a, b), south), north)
+        cos_distance = a * math.sin(peak) + b * math.cos(peak)
+        return EARTH_RADIUS_KM * math.acos(max(-1.0, min(1.0, cos_distance)))
+
+    @classmethod
+    def load_cities(cls, session: Session, version: str) -> "GridIndex":
+        rows = session.execute(
+            sa.select(City.id, City.latitude, City.longitude).where(
+                City.latitude.is_not(None), City.longitude.is_not(None)
+            )
+        )
+        return cls((id_, float(lat), float(lng)) for id_, lat, lng in rows)
+
+
+_city_grid: WorldSnapshot[GridIndex] = WorldSnapshot("city grid", GridIndex.load_cities)
+
+
+def load_city_grid(session: Session) -> GridIndex:
+    """
+    load_city_grid returns the process-wide GridIndex of cities.
+    """
+    return _city_grid.get(session)
+
+
+def warm_up_city_grid():
+    try:
+        with open_db_session(read_write=False) as session:
+            load_city_grid(session)
+    except Exception:
+        logger.exception("failed to warm up city grid")
+
+
+def with_city_grid():
+    def depend_city_grid(session: Annotated[Session, Depends(with_db_session)]):
+        return load_city_grid(session)
+
+    return depend_city_grid
@@ -0,0 +1,169 @@
+import gzip
+import json
+import logging
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from tripcraft.constants import WORLD_TREE_CACHE_SIZE
+from tripcraft.models import Country, Region, State, SubRegion, open_db_session
+from tripcraft.schemas import WORLD_TREE_LEVELS, Locale, Translations, WorldTreeLevel
+from tripcraft.utils import with_db_session
+from tripcraft.utils.lru import LRUCache
+from tripcraft.utils.translate import chinese_simplified_to_traditional
+
+from .world_cache import LOCALES, WorldSnapshot
+
+logger = logging.getLogger(__name__)
+
+TreeNode = Tuple[WorldTreeLevel, int]
+
+
+def _stored_state_translations(state: State) -> Translations:
+    """
+    _stored_state_translations returns the names of state stored in its zh_hans
+    and zh_hant columns, falling back to its English name. Unlike
+    State.translations, it never calls the translator, which would cost a
+    request for every state without a stored name when the tree is loaded.
+    """
+    zh_hans = state.zh_hans if state.zh_hans is not None else state.name
+    zh_hant = state.zh_hant
+    if zh_hant is None:
+        zh_hant = (
+            chinese_simplified_to_traditional(state.zh_hans)
+            if state.zh_hans is not None
+            else state.name
+        )
+    return Translations(en=state.name, zh_hans=zh_hans, zh_hant=zh_hant)
+
+
+class WorldTree:
+    """
+    WorldTree is an adjacency index of the regions, subregions, countries and
+    states, holding the ids of the children of every node and the names of
+    every node in every locale. Serialized subtrees are cached gzip-compressed.
+    """
+
+    def __init__(
+        self,
+        names: Dict[WorldTreeLevel, Dict[int, Translations]],
+        parents: Dict[WorldTreeLevel, Sequence[Tuple[int, Optional[int]]]],
+        cache_size: int = WORLD_TREE_CACHE_SIZE,
+    ):
+        self._names: Dict[Optional[Locale], Dict[WorldTreeLevel, Dict[int, Any]]] = {
+            locale: {
+                level: {
+                    id_: translations.localize(locale).model_dump(by_alias=True)
+                    for id_, translations in level_names.items()
+                }
+                for level, level_names in names.items()
+            }
+            for locale in LOCALES
+        }
+        self._children: Dict[WorldTreeLevel, Dict[Optional[int], List[int]]] = {}
+        for level, pairs in parents.items():
+            children: Dict[Optional[int], List[int]] = {}
+            for id_, parent_id in sorted(pairs):
+                children.setdefault(parent_id, []).append(id_)
+            self._children[level] = children
+        self._subtrees: LRUCache[
+            Tuple[Optional[TreeNode], int, Optional[Locale]], bytes
+        ] = LRUCache(cache_size)
+
+    def has(self, node: TreeNode) -> bool:
+        level, id_ = node
+        return id_ in self._names[None][level]
+
+    def _node(
+        self, depth: int, id_: int, remaining: int, locale: Optional[Locale]
+    ) -> Dict[str, Any]:
+        level = WORLD_TREE_LEVELS[depth]
+        node: Dict[str, Any] = {"id": id_, "name": self._names[locale][level][id_]}
+        if remaining > 0 and depth + 1 < len(WORLD_TREE_LEVELS):
+            child_level = WORLD_TREE_LEVELS[depth + 1]
+            node["children"] = [
+                self._node(depth + 1, child_id, remaining - 1, locale)
+                for child_id in self._children[child_level].get(id_, ())
+            ]
+        return node
+
+    def subtree(
+        self, root: Optional[TreeNode], depth: int, locale: Optional[Locale] = None
+    ) -> bytes:
+        """
+        subtree returns the gzip-compressed JSON of the nodes depth levels below
+        root, or of the regions and depth - 1 levels below them without a root.
+        """
+        key = (root, depth, locale)
+        compressed = self._subtrees.get(key)
+        if compressed is not None:
+            return compressed
+
+        if root is None:
+            top = 0
+            results = [
+                self._node(0, id_, depth - 1, locale)
+                for id_ in self._children["region"].get(None, ())
+            ]
+        else:
+            level, id_ = root
+            top = WORLD_TREE_LEVELS.index(level)
+            results = [self._node(top, id_, depth, locale)]
+
+        levels = WORLD_TREE_LEVELS[top : top + depth + (root is not None)]
+        content = json.dumps(
+            {"levels": levels, "results": results},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+        compressed = gzip.compress(content, mtime=0)
+        self._subtrees.set(key, compressed)
+        return compressed
+
+    @classmethod
+    def load(cls, session: Session, version: str) -> "WorldTree":
+        regions = session.execute(sa.select(Region)).scalars().all()
+        sub_regions = session.execute(sa.select(SubRegion)).scalars().all()
+        countries = session.execute(sa.select(Country)).scalars().all()
+        states = session.execute(sa.select(State)).scalars().all()
+        return cls(
+            names={
+                "region": {r.id: r.translations for r in regions},
+                "sub_region": {s.id: s.translations for s in sub_regions},
+                "country": {c.id: c.translations for c in countries},
+                "state": {s.id: _stored_state_translations(s) for s in states},
+            },
+            parents={
+                "region": [(r.id, None) for r in regions],
+                "sub_region": [(s.id, s.region_id) for s in sub_regions],
+                "country": [(c.id, c.sub_region_id) for c in countries],
+                "state": [(s.id, s.country_id) for s in states],
+            },
+        )
+
+
+_world_tree: WorldSnapshot[WorldTree] = WorldSnapshot("world tree", WorldTree.load)
+
+
+def load_world_tree(session: Session) -> WorldTree:
+    """
+    load_world_tree returns the process-wide WorldTree.
+    """
+    return _world_tree.get(session)
+
+
+def warm_up_world_tree():
+    try:
+        with open_db_session(read_write=False) as session:
+            load_world_tree(session)
+    except Exception:
+        logger.exception("failed to warm up world tree")
+
+
+def with_world_tree():
+    def depend_world_tree(session: Annotated[Session, Depends(with_db_session)]):
+        return load_world_tree(session)
+
+    return depend_world_tree
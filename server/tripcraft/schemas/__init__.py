@@ -1,30 +1,83 @@
 from .auth import LoginRequest, LoginResponse, SignupRequest, SignupResponse
 from .error import ApiError
+from .fields import (
+    ALL_FIELDS,
+    FieldSet,
+    ResponseFormat,
+    build_sparse,
+    with_fields_param,
+)
 from .pagination import (
     PaginatedResponse,
     Pagination,
+    PaginationCursor,
     PaginationParams,
+    paginated_response_json,
     with_pagination_params,
 )
 from .plan import (
+    NormalizedPlanMultipleResponse,
+    NormalizedPlanSchema,
+    NormalizedPlanSingleResponse,
     PlanConfigSchema,
+    PlanIncludedSchema,
     PlanMultipleResponse,
     PlanRequest,
     PlanSchema,
     PlanSingleResponse,
 )
 from .world import (
+    MAX_IDS,
+    MAX_NEARBY_LIMIT,
+    MAX_NEARBY_RADIUS,
+    MAX_REVERSE_POINTS,
+    MAX_SEARCH_LIMIT,
+    MAX_TREE_DEPTH,
+    WORLD_SEARCH_TYPES,
+    WORLD_TREE_LEVELS,
     CityResponse,
     CitySchema,
     CountryResponse,
     CountrySchema,
+    GeoPoint,
+    Locale,
+    LocalizedTranslations,
+    NearbyCityResponse,
+    NearbyCitySchema,
+    NormalizedCityResponse,
+    NormalizedCitySchema,
+    NormalizedCountryResponse,
+    NormalizedCountrySchema,
+    NormalizedNearbyCityResponse,
+    NormalizedNearbyCitySchema,
+    NormalizedReverseGeocodeMultipleResponse,
+    NormalizedReverseGeocodeResponse,
+    NormalizedStateResponse,
+    NormalizedStateSchema,
+    NormalizedSubRegionSchema,
+    NormalizedWorldSearchResponse,
+    NormalizedWorldSearchSchema,
     RegionResponse,
     RegionSchema,
+    ReverseGeocodeMultipleResponse,
+    ReverseGeocodeRequest,
+    ReverseGeocodeResponse,
     StateResponse,
     StateSchema,
     SubRegionResponse,
     SubRegionSchema,
     Translations,
+    WorldIncludedSchema,
+    WorldSearchResponse,
+    WorldSearchSchema,
+    WorldSearchType,
+    WorldTreeLevel,
+    WorldTreeNodeSchema,
+    WorldTreeResponse,
+    select_locale,
+    with_ids_param,
+    with_search_types_param,
+    with_tree_root_param,
 )
 
 __all__ = [
@@ -34,16 +87,63 @@ __all__ = [
     "SignupResponse",
     "ApiError",
     "Pagination",
+    "PaginationCursor",
     "PaginatedResponse",
     "PaginationParams",
     "with_pagination_params",
+    "paginated_response_json",
+    "ALL_FIELDS",
+    "FieldSet",
+    "ResponseFormat",
+    "build_sparse",
+    "with_fields_param",
+    "Locale",
+    "MAX_IDS",
+    "MAX_NEARBY_RADIUS",
+    "MAX_NEARBY_LIMIT",
+    "MAX_REVERSE_POINTS",
+    "MAX_SEARCH_LIMIT",
+    "WORLD_SEARCH_TYPES",
+    "WorldSearchType",
+    "with_ids_param",
+    "with_search_types_param",
+    "MAX_TREE_DEPTH",
+    "WORLD_TREE_LEVELS",
+    "WorldTreeLevel",
+    "with_tree_root_param",
+    "select_locale",
     "Translations",
+    "LocalizedTranslations",
     "CitySchema",
     "StateSchema",
     "CountrySchema",
     "RegionSchema",
     "SubRegionSchema",
     "CityResponse",
+    "NearbyCitySchema",
+    "NearbyCityResponse",
+    "GeoPoint",
+    "ReverseGeocodeRequest",
+    "ReverseGeocodeResponse",
+    "ReverseGeocodeMultipleResponse",
+    "WorldSearchSchema",
+    "WorldSearchResponse",
+    "WorldTreeNodeSchema",
+    "WorldTreeResponse",
+    "WorldIncludedSchema",
+    "NormalizedSubRegionSchema",
+    "NormalizedCountrySchema",
+    "NormalizedStateSchema",
+    "NormalizedCitySchema",
+    "NormalizedCountryResponse",
+    "NormalizedStateResponse",
+    "NormalizedCityResponse",
+    "NormalizedNearbyCitySchema",
+    "NormalizedNearbyCityResponse",
+    "NormalizedReverseGeocodeResponse",
+    "NormalizedReverseGeocodeMultipleResponse",
+    "NormalizedWorldSearchSchema",
+    "NormalizedWorldSearchResponse",
     "StateResponse",
     "RegionResponse",
     "SubRegionResponse",
@@ -53,4 +153,8 @@ __all__ = [
     "PlanRequest",
     "PlanSingleResponse",
     "PlanMultipleResponse",
+    "PlanIncludedSchema",
+    "NormalizedPlanSchema",
+    "NormalizedPlanSingleResponse",
+    "NormalizedPlanMultipleResponse",
 ]
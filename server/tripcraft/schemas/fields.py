@@ -0,0 +1,229 @@
+import collections.abc
+import typing
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Literal,
+    Optional,
+    Type,
+    TypeVar,
+)
+
+from fastapi import Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+ResponseFormat = Literal["nested", "normalized"]
+"""
+ResponseFormat is the shape of world and plan responses. Nested responses embed
+the parents of every result, while normalized responses reference them by id
+and list each of them once in included.
+"""
+
+
+def _field_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    """
+    _field_model returns the model held by a field, or by each item of a field
+    holding a sequence, if any.
+    """
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _field_model(args[0]) if len(args) == 1 else None
+    if origin in (list, collections.abc.Sequence):
+        return _field_model(typing.get_args(annotation)[0])
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+class FieldSet:
+    """
+    FieldSet is a sparse fieldset: the fields of a schema that a response is
+    trimmed to, by field name, each with the subfields selected. A FieldSet
+    without fields selects every field.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, "FieldSet"]] = None):
+        self._fields = fields
+
+    @property
+    def is_all(self) -> bool:
+        return self._fields is None
+
+    @property
+    def names(self) -> Optional[FrozenSet[str]]:
+        return None if self._fields is None else frozenset(self._fields)
+
+    def has(self, name: str) -> bool:
+        return self._fields is None or name in self._fields
+
+    def get(self, name: str) -> "FieldSet":
+        """
+        get returns the subfields selected of name, or every subfield when name
+        is selected whole or not selected at all.
+        """
+        if self._fields is None:
+            return ALL_FIELDS
+        return self._fields.get(name, ALL_FIELDS)
+
+    def include(self, schema: BaseModel) -> Optional[Dict[Any, Any]]:
+        """
+        include returns the include argument of model_dump which trims schema
+        to the fields selected. Sequences are trimmed item by item, as pydantic
+        cannot apply __all__ to the items of a Sequence field.
+        """
+        if self._fields is None:
+            return None
+        return {
+            name: _include(fields, getattr(schema, name, None))
+            for name, fields in self._fields.items()
+        }
+
+    def plus(self, name: str) -> "FieldSet":
+        """
+        plus returns this FieldSet with name selected whole as well.
+        """
+        if self._fields is None:
+            return ALL_FIELDS
+        return FieldSet({**self._fields, name: ALL_FIELDS})
+
+    def within(self, name: str, model: Type[BaseModel]) -> "FieldSet":
+        """
+        within returns the fields of a response model, with the results held by
+        name trimmed to this FieldSet and every other field selected whole.
+        """
+        if self._fields is None:
+            return ALL_FIELDS
+        fields: Dict[str, FieldSet] = {
+            field: ALL_FIELDS for field in model.model_fields
+        }
+        fields[name] = self
+        return FieldSet(fields)
+
+    @property
+    def key(self) -> str:
+        """
+        key identifies the fields selected, regardless of the order in which
+        they were requested.
+        """
+        if self._fields is None:
+            return ""
+        return ",".join(
+            name if fields.is_all else f"{name}({fields.key})"
+            for name, fields in sorted(self._fields.items())
+        )
+
+    @classmethod
+    def parse(cls, fields: str, model: Type[BaseModel]) -> "FieldSet":
+        """
+        parse reads comma separated dotted aliases, e.g. id,name,country.iso2,
+        raising ValueError on a field which model does not have.
+        """
+        tree: Dict[str, Any] = {}
+        for path in fields.split(","):
+            aliases = path.strip().split(".")
+            if aliases == [""]:
+                continue
+            node: Optional[Dict[str, Any]] = tree
+            for alias in aliases[:-1]:
+                node = node.setdefault(alias, {})
+                if node is None:
+                    break
+            if node is not None:
+                node[aliases[-1]] = None
+        if len(tree) == 0:
+            raise ValueError("Expected at least one field")
+        return cls._from_tree(tree, model, "")
+
+    @classmethod
+    def _from_tree(
+        cls, tree: Dict[str, Any], model: Type[BaseModel], prefix: str
+    ) -> "FieldSet":
+        names = {
+            field.alias or name: name for name, field in model.model_fields.items()
+        }
+        fields: Dict[str, FieldSet] = {}
+        for alias, subtree in tree.items():
+            name = names.get(alias)
+            if name is None:
+                raise ValueError(f"Unknown field {prefix}{alias}")
+            submodel = _field_model(model.model_fields[name].annotation)
+            if subtree is None:
+                fields[name] = ALL_FIELDS
+            elif submodel is None:
+                raise ValueError(f"Field {prefix}{alias} has no subfields")
+            else:
+                fields[name] = cls._from_tree(subtree, submodel, f"{prefix}{alias}.")
+        return cls(fields)
+
+
+ALL_FIELDS = FieldSet()
+
+
+def _include(fields: FieldSet, value: Any) -> Any:
+    if fields.is_all or value is None:
+        return True
+    if isinstance(value, (list, tuple)):
+        return {i: _include(fields, item) for i, item in enumerate(value)}
+    return fields.include(value)
+
+
+def build_sparse(model: Type[M], fields: FieldSet, **values: Callable[[], Any]) -> M:
+    """
+    build_sparse builds a schema from the values of the fields selected, only
+    calling their callables. The fields which are not selected are left unset,
+    so a sparse schema must be serialized with the include of fields.
+    """
+    if fields.is_all:
+        return model(**{name: value() for name, value in values.items()})
+    # Construct the fields selected first, so that they are serialized in the
+    # order of the schema, then validate their values in place.
+    names = [name for name in values if fields.has(name)]
+    schema = model.model_construct(**dict.fromkeys(names))
+    for name in names:
+        model.__pydantic_validator__.validate_assignment(schema, name, values[name]())
+    return schema
+
+
+def with_fields_param(
+    model: Type[BaseModel], normalized_model: Optional[Type[BaseModel]] = None
+):
+    """
+    with_fields_param parses the sparse fieldset of a response against the
+    schema of its results, or of its normalized results when the response
+    format is normalized.
+    """
+
+    def depend_fields(
+        fields: Annotated[Optional[str], Query(alias="fields")] = None,
+        format: Annotated[ResponseFormat, Query(alias="format")] = "nested",
+    ) -> FieldSet:
+        if fields is None:
+            return ALL_FIELDS
+        try:
+            return FieldSet.parse(
+                fields,
+                (
+                    normalized_model
+                    if format == "normalized" and normalized_model is not None
+                    else model
+                ),
+            )
+        except ValueError as e:
+            raise RequestValidationError(
+                [
+                    {
+                        "loc": ("query", "fields"),
+                        "msg": str(e),
+                        "type": "value_error",
+                    }
+                ]
+            )
+
+    return depend_fields
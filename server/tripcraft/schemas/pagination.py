@@ -1,36 +1,99 @@
-from typing import Annotated, Generic, Optional, Sequence, TypeVar
+import base64
+import binascii
+import json
+from typing import Annotated, Generic, Iterable, Optional, Sequence, TypeVar
 
 from fastapi import Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 
 from .base import BaseModelWithCamelCaseAlias
 
 T = TypeVar("T")
 
 
+class PaginationCursor(BaseModel):
+    """
+    PaginationCursor is the position after the last row of a page. Listings are
+    ordered by id, and name searches by score descending then id.
+    """
+
+    id: int
+    score: Optional[float] = None
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(
+            self.model_dump_json(exclude_none=True).encode()
+        ).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "PaginationCursor":
+        return cls.model_validate_json(base64.urlsafe_b64decode(cursor.encode()))
+
+
 def with_pagination_params(
-    page_index: Annotated[int, Query(alias="pageIndex")] = 0,
-    page_size: Annotated[int, Query(alias="pageSize")] = 10,
+    page_index: Annotated[int, Query(alias="pageIndex", ge=0)] = 0,
+    page_size: Annotated[int, Query(alias="pageSize", ge=1)] = 10,
+    cursor: Annotated[Optional[str], Query(alias="cursor")] = None,
+    include_total: Annotated[bool, Query(alias="includeTotal")] = True,
 ):
-    return PaginationParams(page_index=page_index, page_size=page_size)
+    try:
+        pagination_cursor = (
+            PaginationCursor.decode(cursor) if cursor is not None else None
+        )
+    except (binascii.Error, ValidationError):
+        raise RequestValidationError(
+            [
+                {
+                    "loc": ("query", "cursor"),
+                    "msg": "Invalid cursor",
+                    "type": "value_error",
+                }
+            ]
+        )
+    return PaginationParams(
+        page_index=page_index,
+        page_size=page_size,
+        cursor=pagination_cursor,
+        include_total=include_total,
+    )
 
 
 class PaginationParams(BaseModelWithCamelCaseAlias):
     page_index: int
     page_size: int
+    cursor: Optional[PaginationCursor] = None
+    include_total: bool = True
 
 
 class Pagination(BaseModelWithCamelCaseAlias):
     page_index: int
     page_size: int
+    cursor: Optional[PaginationCursor] = None
+    include_total: bool = True
     _total_count: Optional[int] = None
+    _has_next_page: Optional[bool] = None
+    _next_cursor: Optional[PaginationCursor] = None
 
     @classmethod
     def from_query_params(cls, params: PaginationParams) -> "Pagination":
         return Pagination(
             page_index=params.page_index,
             page_size=params.page_size,
+            cursor=params.cursor,
+            include_total=params.include_total,
         )
 
+    @property
+    def is_first_page(self) -> bool:
+        return self.cursor is None and self.page_index == 0
+
+    @property
+    def offset(self) -> int:
+        if self.cursor is not None:
+            return 0
+        return self.page_index * self.page_size
+
     def _next_page(self) -> "Pagination":
         return Pagination(
             page_index=self.page_index + 1,
@@ -39,6 +102,10 @@ class Pagination(BaseModelWithCamelCaseAlias):
 
     @property
     def next_page_index(self) -> Optional[int]:
+        if self.cursor is not None:
+            return None
+        if self.has_next_page is not None:
+            return self.page_index + 1 if self.has_next_page else None
         if self.total_count is None:
             return None
         next_pagination = self._next_page()
@@ -56,8 +123,57 @@ class Pagination(BaseModelWithCamelCaseAlias):
     def total_count(self, value: Optional[int]):
         self._total_count = value
 
+    @property
+    def has_next_page(self) -> Optional[bool]:
+        return self._has_next_page
+
+    @has_next_page.setter
+    def has_next_page(self, value: Optional[bool]):
+        self._has_next_page = value
+
+    @property
+    def next_cursor(self) -> Optional[PaginationCursor]:
+        return self._next_cursor
+
+    @next_cursor.setter
+    def next_cursor(self, value: Optional[PaginationCursor]):
+        self._next_cursor = value
+
+    @property
+    def encoded_next_cursor(self) -> Optional[str]:
+        if self.next_cursor is None:
+            return None
+        return self.next_cursor.encode()
+
 
 class PaginatedResponse(BaseModelWithCamelCaseAlias, Generic[T]):
-    total_count: int
+    total_count: Optional[int]
     next_page_index: Optional[int]
+    next_cursor: Optional[str] = None
     results: Sequence[T]
+
+
+def paginated_response_json(
+    pagination: Pagination,
+    results: Iterable[bytes],
+    included: Optional[bytes] = None,
+) -> bytes:
+    """
+    paginated_response_json splices the JSON of the results into the envelope
+    of a PaginatedResponse, with the same keys in the same order, followed by
+    the JSON of included for normalized responses.
+    """
+    return b"".join(
+        (
+            b'{"totalCount":',
+            json.dumps(pagination.total_count).encode(),
+            b',"nextPageIndex":',
+            json.dumps(pagination.next_page_index).encode(),
+            b',"nextCursor":',
+            json.dumps(pagination.encoded_next_cursor).encode(),
+            b',"results":[',
+            b",".join(results),
+            b"]" if included is None else b'],"included":' + included,
+            b"}",
+        )
+    )
@@ -14,6 +14,11 @@ class PlanConfigDetailDestinationSchema(BaseModelWithCamelCaseAlias):
     country_iso2: Optional[str] = None
 
 
+class PlanConfigDetailDestinationReferenceSchema(BaseModelWithCamelCaseAlias):
+    type: Literal["country", "state", "city"]
+    id: int
+
+
 class PlanConfigDetailScheduleSchema(BaseModelWithCamelCaseAlias):
     place: str
     time_start: datetime
@@ -33,6 +38,30 @@ class PlanConfigSchema(BaseModelWithCamelCaseAlias):
     details: Sequence[PlanConfigDetailSchema] = Field([])
 
 
+class NormalizedPlanConfigDetailSchema(BaseModelWithCamelCaseAlias):
+    date: date
+    destinations: Sequence[PlanConfigDetailDestinationReferenceSchema]
+    destination_holidays: Dict[str, Translations] = Field({})
+    schedules: Sequence[PlanConfigDetailScheduleSchema]
+
+
+class NormalizedPlanConfigSchema(BaseModelWithCamelCaseAlias):
+    date_start: date
+    date_end: date
+    details: Sequence[NormalizedPlanConfigDetailSchema] = Field([])
+
+
+class PlanIncludedSchema(BaseModelWithCamelCaseAlias):
+    """
+    PlanIncludedSchema holds the destinations referenced by normalized plans,
+    keyed by the type then the id of the reference.
+    """
+
+    country: Dict[int, PlanConfigDetailDestinationSchema] = Field({})
+    state: Dict[int, PlanConfigDetailDestinationSchema] = Field({})
+    city: Dict[int, PlanConfigDetailDestinationSchema] = Field({})
+
+
 class PlanSchema(BaseModelWithCamelCaseAlias):
     id: str
     name: str
@@ -40,6 +69,13 @@ class PlanSchema(BaseModelWithCamelCaseAlias):
     is_editable: bool
 
 
+class NormalizedPlanSchema(BaseModelWithCamelCaseAlias):
+    id: str
+    name: str
+    config: NormalizedPlanConfigSchema
+    is_editable: bool
+
+
 class PlanRequest(BaseModelWithCamelCaseAlias):
     name: str
     config: PlanConfigSchema
@@ -53,3 +89,12 @@ class PlanMultipleResponse(BaseModelWithCamelCaseAlias):
 
 class PlanSingleResponse(PlanSchema):
     pass
+
+
+class NormalizedPlanMultipleResponse(BaseModelWithCamelCaseAlias):
+    results: Sequence[NormalizedPlanSchema]
+    included: PlanIncludedSchema
+
+
+class NormalizedPlanSingleResponse(NormalizedPlanSchema):
+    included: PlanIncludedSchema
@@ -1,7 +1,139 @@
-from typing import Optional, Sequence
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from fastapi import Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import (
+    Field,
+    SerializeAsAny,
+    SerializerFunctionWrapHandler,
+    model_serializer,
+)
 
 from tripcraft.schemas import PaginatedResponse
 from tripcraft.schemas.base import BaseModelWithCamelCaseAlias
+from tripcraft.schemas.fields import FieldSet
+
+Locale = Literal["en", "zh_hans", "zh_hant"]
+
+WorldSearchType = Literal["country", "state", "city"]
+
+WORLD_SEARCH_TYPES: Sequence[WorldSearchType] = ("country", "state", "city")
+
+WorldTreeLevel = Literal["region", "sub_region", "country", "state"]
+
+WORLD_TREE_LEVELS: Sequence[WorldTreeLevel] = (
+    "region",
+    "sub_region",
+    "country",
+    "state",
+)
+
+MAX_IDS = 100
+"""
+MAX_IDS is the most ids a world endpoint accepts in one request.
+"""
+
+MAX_NEARBY_RADIUS = 500
+"""
+MAX_NEARBY_RADIUS is the widest radius in km of a nearby search.
+"""
+
+MAX_NEARBY_LIMIT = 100
+
+MAX_REVERSE_POINTS = 1000
+"""
+MAX_REVERSE_POINTS is the most points a batch reverse geocoding request accepts.
+"""
+
+MAX_SEARCH_LIMIT = 20
+"""
+MAX_SEARCH_LIMIT is the most results of each type a unified search returns.
+"""
+
+MAX_TREE_DEPTH = len(WORLD_TREE_LEVELS)
+
+
+def with_ids_param(
+    ids: Annotated[Optional[str], Query(alias="ids")] = None,
+) -> Optional[List[int]]:
+    """
+    with_ids_param parses a comma separated list of ids, keeping the first
+    occurrence of each id in request order.
+    """
+    if ids is None:
+        return None
+    try:
+        parsed = list(dict.fromkeys(int(id_) for id_ in ids.split(",") if id_.strip()))
+    except ValueError:
+        parsed = None
+    if parsed is None or len(parsed) > MAX_IDS:
+        raise RequestValidationError(
+            [
+                {
+                    "loc": ("query", "ids"),
+                    "msg": f"Expected at most {MAX_IDS} comma separated ids",
+                    "type": "value_error",
+                }
+            ]
+        )
+    return parsed
+
+
+def with_tree_root_param(
+    root: Annotated[Optional[str], Query(alias="root")] = None,
+) -> Optional[Tuple[WorldTreeLevel, int]]:
+    """
+    with_tree_root_param parses the root of a world tree, written as its level
+    and id, e.g. country:1.
+    """
+    if root is None:
+        return None
+    level, _, id_ = root.partition(":")
+    if level not in WORLD_TREE_LEVELS or not id_.isdigit():
+        raise RequestValidationError(
+            [
+                {
+                    "loc": ("query", "root"),
+                    "msg": "Expected a level and an id, e.g. country:1",
+                    "type": "value_error",
+                }
+            ]
+        )
+    return level, int(id_)
+
+
+def with_search_types_param(
+    types: Annotated[Optional[str], Query(alias="types")] = None,
+) -> List[WorldSearchType]:
+    """
+    with_search_types_param parses a comma separated list of world types to
+    search, defaulting to every type.
+    """
+    if types is None:
+        return list(WORLD_SEARCH_TYPES)
+    parsed = {type_.strip() for type_ in types.split(",") if type_.strip()}
+    if len(parsed) == 0 or not parsed.issubset(WORLD_SEARCH_TYPES):
+        raise RequestValidationError(
+            [
+                {
+                    "loc": ("query", "types"),
+                    "msg": "Expected a comma separated list of "
+                    + ", ".join(WORLD_SEARCH_TYPES),
+                    "type": "value_error",
+                }
+            ]
+        )
+    return [type_ for type_ in WORLD_SEARCH_TYPES if type_ in parsed]
 
 
 class Translations(BaseModelWithCamelCaseAlias):
@@ -9,21 +141,77 @@ class Translations(BaseModelWithCamelCaseAlias):
     zh_hant: str
     zh_hans: str
 
+    @classmethod
+    def localized(
+        cls,
+        locale: Optional[Locale],
+        en: Callable[[], str],
+        zh_hans: Callable[[], str],
+        zh_hant: Callable[[], str],
+    ) -> "Translations":
+        """
+        localized only computes the language of locale, or every language if
+        locale is None.
+        """
+        if locale == "en":
+            return LocalizedTranslations(en=en())
+        if locale == "zh_hans":
+            return LocalizedTranslations(zh_hans=zh_hans())
+        if locale == "zh_hant":
+            return LocalizedTranslations(zh_hant=zh_hant())
+        return cls(en=en(), zh_hans=zh_hans(), zh_hant=zh_hant())
+
+    def localize(self, locale: Optional[Locale]) -> "Translations":
+        if locale is None:
+            return self
+        return LocalizedTranslations(**{locale: getattr(self, locale)})
+
+
+class LocalizedTranslations(Translations):
+    """
+    LocalizedTranslations holds the language of the locale requested only, and
+    leaves the others out when serialized.
+    """
+
+    en: Optional[str] = None
+    zh_hant: Optional[str] = None
+    zh_hans: Optional[str] = None
+
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler: SerializerFunctionWrapHandler) -> Dict[str, Any]:
+        return {k: v for k, v in handler(self).items() if v is not None}
+
+
+# Names are documented as Translations, and serialized as the model they hold,
+# so that LocalizedTranslations leave the languages not requested out.
+NameTranslations = SerializeAsAny[Translations]
+
+
+def select_locale(name: FieldSet, locale: Optional[Locale]) -> Optional[Locale]:
+    """
+    select_locale narrows locale to the only language selected of a name, so
+    that the other languages are not computed.
+    """
+    languages = name.names
+    if locale is None and languages is not None and len(languages) == 1:
+        return next(iter(languages))
+    return locale
+
 
 class RegionSchema(BaseModelWithCamelCaseAlias):
     id: int
-    name: Translations
+    name: NameTranslations
 
 
 class SubRegionSchema(BaseModelWithCamelCaseAlias):
     id: int
-    name: Translations
+    name: NameTranslations
     region: RegionSchema
 
 
 class CountrySchema(BaseModelWithCamelCaseAlias):
     id: int
-    name: Translations
+    name: NameTranslations
     iso3: str
     iso2: str
     latitude: Optional[float] = None
@@ -35,7 +223,7 @@ class CountrySchema(BaseModelWithCamelCaseAlias):
 
 class StateSchema(BaseModelWithCamelCaseAlias):
     id: int
-    name: Translations
+    name: NameTranslations
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     country: CountrySchema
@@ -43,13 +231,60 @@ class StateSchema(BaseModelWithCamelCaseAlias):
 
 class CitySchema(BaseModelWithCamelCaseAlias):
     id: int
-    name: Translations
+    name: NameTranslations
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     country: CountrySchema
     state: StateSchema
 
 
+class NormalizedSubRegionSchema(BaseModelWithCamelCaseAlias):
+    id: int
+    name: NameTranslations
+    region_id: int
+
+
+class NormalizedCountrySchema(BaseModelWithCamelCaseAlias):
+    id: int
+    name: NameTranslations
+    iso3: str
+    iso2: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    emoji: str
+    region_id: Optional[int]
+    sub_region_id: Optional[int]
+
+
+class NormalizedStateSchema(BaseModelWithCamelCaseAlias):
+    id: int
+    name: NameTranslations
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    country_id: int
+
+
+class NormalizedCitySchema(BaseModelWithCamelCaseAlias):
+    id: int
+    name: NameTranslations
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    country_id: int
+    state_id: int
+
+
+class WorldIncludedSchema(BaseModelWithCamelCaseAlias):
+    """
+    WorldIncludedSchema holds the parents referenced by a normalized response,
+    keyed by the type then the id of the reference.
+    """
+
+    region: Dict[int, RegionSchema] = Field({})
+    sub_region: Dict[int, NormalizedSubRegionSchema] = Field({})
+    country: Dict[int, NormalizedCountrySchema] = Field({})
+    state: Dict[int, NormalizedStateSchema] = Field({})
+
+
 class RegionResponse(BaseModelWithCamelCaseAlias):
     results: Sequence[RegionSchema]
 
@@ -68,3 +303,107 @@ class StateResponse(PaginatedResponse):
 
 class CityResponse(PaginatedResponse):
     results: Sequence[CitySchema]
+
+
+class NormalizedCountryResponse(PaginatedResponse):
+    results: Sequence[NormalizedCountrySchema]
+    included: WorldIncludedSchema
+
+
+class NormalizedStateResponse(PaginatedResponse):
+    results: Sequence[NormalizedStateSchema]
+    included: WorldIncludedSchema
+
+
+class NormalizedCityResponse(PaginatedResponse):
+    results: Sequence[NormalizedCitySchema]
+    included: WorldIncludedSchema
+
+
+class NearbyCitySchema(BaseModelWithCamelCaseAlias):
+    distance: float
+    city: CitySchema
+
+
+class NearbyCityResponse(BaseModelWithCamelCaseAlias):
+    results: Sequence[NearbyCitySchema]
+
+
+class NormalizedNearbyCitySchema(BaseModelWithCamelCaseAlias):
+    distance: float
+    city: NormalizedCitySchema
+
+
+class NormalizedNearbyCityResponse(BaseModelWithCamelCaseAlias):
+    results: Sequence[NormalizedNearbyCitySchema]
+    included: WorldIncludedSchema
+
+
+class GeoPoint(BaseModelWithCamelCaseAlias):
+    lat: Annotated[float, Field(ge=-90, le=90)]
+    lng: Annotated[float, Field(ge=-180, le=180)]
+
+
+class ReverseGeocodeRequest(BaseModelWithCamelCaseAlias):
+    points: Annotated[List[GeoPoint], Field(max_length=MAX_REVERSE_POINTS)]
+
+
+class ReverseGeocodeResponse(BaseModelWithCamelCaseAlias):
+    result: Optional[NearbyCitySchema]
+
+
+class ReverseGeocodeMultipleResponse(BaseModelWithCamelCaseAlias):
+    results: Sequence[Optional[NearbyCitySchema]]
+
+
+class NormalizedReverseGeocodeResponse(BaseModelWithCamelCaseAlias):
+    result: Optional[NormalizedNearbyCitySchema]
+    included: WorldIncludedSchema
+
+
+class NormalizedReverseGeocodeMultipleResponse(BaseModelWithCamelCaseAlias):
+    results: Sequence[Optional[NormalizedNearbyCitySchema]]
+    included: WorldIncludedSchema
+
+
+class WorldSearchSchema(BaseModelWithCamelCaseAlias):
+    type: WorldSearchType
+    score: float
+    country: Optional[CountrySchema] = None
+    state: Optional[StateSchema] = None
+    city: Optional[CitySchema] = None
+
+
+class WorldSearchResponse(BaseModelWithCamelCaseAlias):
+    results: Sequence[WorldSearchSchema]
+
+
+class NormalizedWorldSearchSchema(BaseModelWithCamelCaseAlias):
+    type: WorldSearchType
+    score: float
+    country: Optional[NormalizedCountrySchema] = None
+    state: Optional[NormalizedStateSchema] = None
+    city: Optional[NormalizedCitySchema] = None
+
+
+class NormalizedWorldSearchResponse(BaseModelWithCamelCaseAlias):
+    results: Sequence[NormalizedWorldSearchSchema]
+    included: WorldIncludedSchema
+
+
+class WorldTreeNodeSchema(BaseModelWithCamelCaseAlias):
+    """
+    WorldTreeNodeSchema is a region, subregion, country or state of the world
+    tree. Only the Chinese names of states stored by the backfill_translations
+    job are served: states without them are named in English in every
+    language, whereas /world/state translates their names.
+    """
+
+    id: int
+    name: NameTranslations
+    children: Optional[List["WorldTreeNodeSchema"]] = None
+
+
+class WorldTreeResponse(BaseModelWithCamelCaseAlias):
+    levels: List[WorldTreeLevel]
+    results: Sequence[WorldTreeNodeSchema]
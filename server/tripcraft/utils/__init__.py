@@ -1,12 +1,27 @@
 from .db import with_db_session
+from .encoding import accepts_gzip
+from .etag import etag_matches, gzip_etag, make_etag
 from .jwt import decode, encode
 from .random import random_otp
-from .translate import chinese_simplified_to_traditional, to_chinese_simplified
+from .translate import (
+    chinese_simplified_to_traditional,
+    chinese_traditional_to_simplified,
+    convert_many,
+    to_chinese_simplified,
+    to_chinese_simplified_many,
+)
 
 __all__ = [
     "chinese_simplified_to_traditional",
+    "chinese_traditional_to_simplified",
+    "convert_many",
     "to_chinese_simplified",
+    "to_chinese_simplified_many",
     "with_db_session",
+    "accepts_gzip",
+    "etag_matches",
+    "gzip_etag",
+    "make_etag",
     "decode",
     "encode",
     "random_otp",
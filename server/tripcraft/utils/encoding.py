@@ -0,0 +1,34 @@
+from typing import Dict
+
+from fastapi import Request
+
+
+def accepts_gzip(request: Request) -> bool:
+    """
+    accepts_gzip tells whether the Accept-Encoding of a request allows gzip, by
+    the weight of gzip, or else of *. A weight of q=0 refuses the coding.
+    """
+    header = request.headers.get("Accept-Encoding")
+    if header is None:
+        return False
+
+    weights: Dict[str, float] = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if coding == "":
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in weights:
+            return weights[coding] > 0
+    return False
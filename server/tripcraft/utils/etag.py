@@ -0,0 +1,34 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request
+
+
+def make_etag(version: str, request: Request) -> str:
+    """
+    make_etag derives a strong ETag from a dataset version and the request path
+    and query parameters, regardless of the order of the parameters.
+    """
+    params = "&".join(
+        f"{key}={value}" for key, value in sorted(request.query_params.multi_items())
+    )
+    digest = hashlib.sha256(f"{version}\n{request.url.path}\n{params}".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def gzip_etag(etag: str) -> str:
+    """
+    gzip_etag returns the ETag of the gzip-compressed representation of the
+    response tagged with etag, as it differs byte for byte.
+    """
+    return f'{etag[:-1]}-gzip"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -0,0 +1,89 @@
+import csv
+import io
+import typing
+import zlib
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+CsvColumn = Tuple[str, Sequence[str]]
+"""
+CsvColumn is a dotted column name and the aliases leading to its value in a
+model dumped by alias.
+"""
+
+
+def _model_of(annotation: Any) -> Any:
+    for arg in typing.get_args(annotation) or (annotation,):
+        if isinstance(arg, type) and issubclass(arg, BaseModel):
+            return arg
+    return None
+
+
+def csv_columns(model: Type[BaseModel], path: Sequence[str] = ()) -> List[CsvColumn]:
+    """
+    csv_columns flattens the fields of a model, and of the models nested in it,
+    into columns named by their dotted aliases, in field order.
+    """
+    columns: List[CsvColumn] = []
+    for name, field in model.model_fields.items():
+        field_path = (*path, field.alias or name)
+        nested = _model_of(field.annotation)
+        if nested is None:
+            columns.append((".".join(field_path), field_path))
+        else:
+            columns.extend(csv_columns(nested, field_path))
+    return columns
+
+
+def _csv_value(dump: Any, path: Sequence[str]) -> Any:
+    for key in path:
+        if not isinstance(dump, dict):
+            return None
+        dump = dump.get(key)
+    return dump
+
+
+def encode_csv(
+    columns: Sequence[CsvColumn], schemas: Iterable[Iterable[BaseModel]]
+) -> Iterator[bytes]:
+    """
+    encode_csv writes a header then one row per schema, yielding a chunk of
+    bytes per batch of schemas. Missing and null values are left empty.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([name for name, _ in columns])
+    for batch in schemas:
+        for schema in batch:
+            dump = schema.model_dump(mode="json", by_alias=True)
+            writer.writerow([_csv_value(dump, path) for _, path in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell() > 0:
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(schemas: Iterable[Iterable[BaseModel]]) -> Iterator[bytes]:
+    """
+    encode_ndjson writes one JSON document per line, yielding a chunk of bytes
+    per batch of schemas.
+    """
+    for batch in schemas:
+        yield b"".join(
+            schema.model_dump_json(by_alias=True).encode() + b"\n" for schema in batch
+        )
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    gzip_chunks compresses a stream incrementally, so that only the current
+    chunk is held in memory.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
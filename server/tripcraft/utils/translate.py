@@ -1,12 +1,311 @@
+import itertools
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
 import opencc
+import sqlalchemy as sa
 from deep_translator import GoogleTranslator
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from tripcraft.constants import (
+    CHINESE_CONVERSION_CACHE_SIZE,
+    TRANSLATION_CACHE_SIZE,
+    TRANSLATOR_BACKEND,
+)
+from tripcraft.models.__meta__ import get_db_engine
+from tripcraft.models.translation import CachedTranslation
+from tripcraft.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CHINESE_SIMPLIFIED = "zh-CN"
+
+
+class Translator(ABC):
+    @abstractmethod
+    def translate(self, s: str, target: str) -> str: ...
+
+
+class GoogleTranslatorBackend(Translator):
+    def translate(self, s: str, target: str) -> str:
+        translator = GoogleTranslator(source="auto", target=target)
+        return translator.translate(s)
+
+
+class IdentityTranslatorBackend(Translator):
+    """
+    IdentityTranslatorBackend returns the source text unchanged.
+    It lets tests and benchmarks run without reaching the network.
+    """
+
+    def translate(self, s: str, target: str) -> str:
+        return s
+
+
+class TranslationStore:
+    """
+    TranslationStore is the persistent layer behind the in-process LRU.
+    The base class stores nothing.
+    """
+
+    def get_many(
+        self, sources: Sequence[str], locale: str, session: Optional[Session] = None
+    ) -> Dict[str, str]:
+        return {}
+
+    def set_many(
+        self,
+        translations: Dict[str, str],
+        locale: str,
+        session: Optional[Session] = None,
+    ):
+        pass
+
+
+@contextmanager
+def _open_connection(
+    session: Optional[Session],
+) -> Iterator[Union[Session, sa.Connection]]:
+    """
+    _open_connection runs statements on session within a savepoint, so that a
+    failure does not abort the transaction of the request, or on a connection
+    of its own without a session.
+    """
+    if session is None:
+        with get_db_engine().begin() as conn:
+            yield conn
+    else:
+        with session.begin_nested():
+            yield session
+
+
+class DatabaseTranslationStore(TranslationStore):
+    """
+    DatabaseTranslationStore reads and writes the translations of many sources
+    in one statement each, on the session of the request when given one.
+    """
+
+    def get_many(
+        self, sources: Sequence[str], locale: str, session: Optional[Session] = None
+    ) -> Dict[str, str]:
+        query = sa.select(
+            CachedTranslation.source, CachedTranslation.translation
+        ).where(
+            CachedTranslation.source.in_(sources),
+            CachedTranslation.locale == locale,
+        )
+        try:
+            with _open_connection(session) as conn:
+                return dict(conn.execute(query).tuples().all())
+        except sa.exc.SQLAlchemyError:
+            logger.exception("failed to read translation cache")
+            return {}
+
+    def set_many(
+        self,
+        translations: Dict[str, str],
+        locale: str,
+        session: Optional[Session] = None,
+    ):
+        query = (
+            insert(CachedTranslation)
+            .values(
+                [
+                    {"source": source, "locale": locale, "translation": translation}
+                    for source, translation in translations.items()
+                ]
+            )
+            .on_conflict_do_nothing()
+        )
+        try:
+            with _open_connection(session) as conn:
+                conn.execute(query)
+        except sa.exc.SQLAlchemyError:
+            logger.exception("failed to write translation cache")
+
+
+class TranslationCache:
+    """
+    TranslationCache keeps recently used translations in an in-process LRU,
+    backed by a TranslationStore. The translator is only consulted when both miss.
+    """
+
+    def __init__(
+        self,
+        translator: Translator,
+        store: TranslationStore,
+        max_size: int = TRANSLATION_CACHE_SIZE,
+    ):
+        self.translator = translator
+        self.store = store
+        self._entries: LRUCache[Tuple[str, str], str] = LRUCache(max_size)
+
+    def translate(self, s: str, target: str) -> str:
+        return self.translate_many([s], target)[0]
+
+    def translate_many(
+        self, strings: Sequence[str], target: str, session: Optional[Session] = None
+    ) -> List[str]:
+        """
+        translate_many reads the strings missing from the LRU from the store in
+        one query, and writes those the translator translated in another.
+        """
+        results = {s: self._entries.get((s, target)) for s in strings}
+        missing = [s for s, translation in results.items() if translation is None]
+        if len(missing) > 0:
+            stored = self.store.get_many(missing, target, session)
+            translated = {
+                s: self.translator.translate(s, target)
+                for s in missing
+                if s not in stored
+            }
+            if len(translated) > 0:
+                self.store.set_many(translated, target, session)
+            for s, translation in itertools.chain(stored.items(), translated.items()):
+                self._entries.set((s, target), translation)
+                results[s] = translation
+        return [results[s] for s in strings]
+
+    def clear(self):
+        self._entries.clear()
+
+
+class ChineseConverter:
+    """
+    ChineseConverter shares one OpenCC instance across the process and memoizes
+    the converted strings.
+    """
+
+    def __init__(self, config: str, max_size: int = CHINESE_CONVERSION_CACHE_SIZE):
+        self._converter = opencc.OpenCC(config)
+        self._lock = threading.Lock()
+        self._entries: LRUCache[str, str] = LRUCache(max_size)
+
+    def convert(self, s: str) -> str:
+        converted = self._entries.get(s)
+        if converted is None:
+            with self._lock:
+                converted = self._converter.convert(s)
+            self._entries.set(s, converted)
+        return converted
+
+    def convert_many(self, strings: List[str]) -> List[str]:
+        """
+        convert_many converts all strings missing from the memo in a single
+        OpenCC call by joining them with line breaks.
+        """
+        results = [self._entries.get(s) for s in strings]
+        missing = list(
+            dict.fromkeys(
+                s
+                for s, converted in zip(strings, results)
+                if converted is None and "\n" not in s
+            )
+        )
+        if len(missing) > 0:
+            with self._lock:
+                converted = self._converter.convert("\n".join(missing)).split("\n")
+            if len(converted) == len(missing):
+                for s, c in zip(missing, converted):
+                    self._entries.set(s, c)
+
+        return [
+            converted if converted is not None else self.convert(s)
+            for s, converted in zip(strings, results)
+        ]
+
+
+def create_translator(backend: str) -> Translator:
+    if backend == "google":
+        return GoogleTranslatorBackend()
+    if backend == "identity":
+        return IdentityTranslatorBackend()
+    raise ValueError(f"Unknown translator backend {backend}")
+
+
+_translation_cache: Optional[TranslationCache] = None
+
+
+def get_translation_cache() -> TranslationCache:
+    global _translation_cache
+    if _translation_cache:
+        return _translation_cache
+    _translation_cache = TranslationCache(
+        translator=create_translator(TRANSLATOR_BACKEND),
+        store=DatabaseTranslationStore(),
+    )
+    return _translation_cache
+
+
+def configure_translation_cache(
+    translator: Optional[Translator] = None,
+    store: Optional[TranslationStore] = None,
+) -> TranslationCache:
+    """
+    configure_translation_cache replaces the process-wide translation cache,
+    e.g. to plug in IdentityTranslatorBackend and TranslationStore in tests.
+    """
+    global _translation_cache
+    _translation_cache = TranslationCache(
+        translator=(
+            translator
+            if translator is not None
+            else create_translator(TRANSLATOR_BACKEND)
+        ),
+        store=store if store is not None else DatabaseTranslationStore(),
+    )
+    return _translation_cache
+
+
+_simplified_to_traditional: Optional[ChineseConverter] = None
+_simplified_to_traditional_lock = threading.Lock()
+
+
+def get_simplified_to_traditional_converter() -> ChineseConverter:
+    global _simplified_to_traditional
+    if _simplified_to_traditional:
+        return _simplified_to_traditional
+    with _simplified_to_traditional_lock:
+        if _simplified_to_traditional is None:
+            _simplified_to_traditional = ChineseConverter("s2t.json")
+    return _simplified_to_traditional
+
+
+_traditional_to_simplified: Optional[ChineseConverter] = None
+_traditional_to_simplified_lock = threading.Lock()
+
+
+def get_traditional_to_simplified_converter() -> ChineseConverter:
+    global _traditional_to_simplified
+    if _traditional_to_simplified:
+        return _traditional_to_simplified
+    with _traditional_to_simplified_lock:
+        if _traditional_to_simplified is None:
+            _traditional_to_simplified = ChineseConverter("t2s.json")
+    return _traditional_to_simplified
 
 
 def chinese_simplified_to_traditional(s: str):
-    converter = opencc.OpenCC("s2t.json")
-    return converter.convert(s)
+    return get_simplified_to_traditional_converter().convert(s)
+
+
+def chinese_traditional_to_simplified(s: str):
+    return get_traditional_to_simplified_converter().convert(s)
+
+
+def convert_many(strings: List[str]) -> List[str]:
+    return get_simplified_to_traditional_converter().convert_many(strings)
 
 
 def to_chinese_simplified(s: str):
-    translator = GoogleTranslator(source="auto", target="zh-CN")
-    return translator.translate(s)
+    return get_translation_cache().translate(s, CHINESE_SIMPLIFIED)
+
+
+def to_chinese_simplified_many(
+    strings: Sequence[str], session: Optional[Session] = None
+) -> List[str]:
+    return get_translation_cache().translate_many(strings, CHINESE_SIMPLIFIED, session)